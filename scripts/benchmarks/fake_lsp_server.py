@@ -0,0 +1,84 @@
+"""Fake language server that replays recorded responses, used by lsp_transport.py.
+
+Writes every recorded message with `Content-Length` framing to stdout and
+exits. Each line of a recording is one JSON-RPC message; without a recording,
+large `textDocument/completion` and `textDocument/documentSymbol` responses
+are generated.
+
+    python scripts/benchmarks/fake_lsp_server.py [recording.jsonl] [--repeat N]
+"""
+
+import json
+import sys
+
+
+def completion(id: int, items: int = 8000) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": id,
+        "result": {
+            "isIncomplete": False,
+            "items": [
+                {
+                    "label": f"symbol_{i}",
+                    "kind": 3,
+                    "detail": f"def symbol_{i}(arg: int, other: str = 'default') -> None",
+                    "sortText": f"{i:08d}",
+                    "insertText": f"symbol_{i}",
+                    "documentation": {"kind": "markdown", "value": "Docs " * 20},
+                }
+                for i in range(items)
+            ],
+        },
+    }
+
+
+def document_symbols(id: int, symbols: int = 6000) -> dict:
+    def range_(line: int) -> dict:
+        return {
+            "start": {"line": line, "character": 0},
+            "end": {"line": line + 5, "character": 10},
+        }
+
+    return {
+        "jsonrpc": "2.0",
+        "id": id,
+        "result": [
+            {
+                "name": f"function_{i}",
+                "kind": 12,
+                "range": range_(i * 6),
+                "selectionRange": range_(i * 6),
+                "children": [],
+            }
+            for i in range(symbols)
+        ],
+    }
+
+
+def recording(path: str | None) -> list[bytes]:
+    if path:
+        with open(path, "rb") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    messages = [completion(1), document_symbols(2)]
+    # small messages in between, like diagnostics and progress notifications
+    messages += [
+        {"jsonrpc": "2.0", "method": "$/progress", "params": {"token": 1, "value": {}}}
+    ] * 200
+    return [json.dumps(message).encode() for message in messages]
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    repeat = 1
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i : i + 2]
+
+    out = sys.stdout.buffer
+    for _ in range(repeat):
+        for body in recording(args[0] if args else None):
+            out.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    out.flush()
@@ -0,0 +1,110 @@
+"""Time to open large text files, and how long the event loop is blocked meanwhile.
+
+Compares the old loader, which wrote every 4 KiB chunk followed by `update()`
+and polled the queue every 100 ms, with `FileLoader`. Needs a display.
+
+    python scripts/benchmarks/file_load.py [size_mb ...]
+"""
+
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tkinter as tk
+
+from biscuit.editor.text.loader import FileLoader
+
+LINE = "    result = [item * 42 for item in range(value) if item % 3]  # comment\n"
+
+
+def make_file(size: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".py")
+    line = LINE.encode()
+    with os.fdopen(fd, "wb") as f:
+        f.write(line * (size // len(line) + 1))
+    return path
+
+
+class Ticker:
+    """Measures the longest time the event loop was blocked"""
+
+    def __init__(self, root: tk.Tk) -> None:
+        self.root = root
+        self.last = time.perf_counter()
+        self.longest = 0.0
+        self.running = True
+        self.tick()
+
+    def tick(self) -> None:
+        now = time.perf_counter()
+        self.longest = max(self.longest, now - self.last)
+        self.last = now
+        if self.running:
+            self.root.after(1, self.tick)
+
+
+def old_loader(text: tk.Text, path: str, done) -> None:
+    chunks = queue.Queue()
+
+    def read():
+        with open(path, "r", encoding="utf-8", buffering=4096) as f:
+            while chunk := f.read(4096):
+                chunks.put(chunk)
+        chunks.put(None)
+
+    def process():
+        try:
+            while True:
+                chunk = chunks.get_nowait()
+                if chunk is None:
+                    return done()
+                text.insert(tk.END, chunk)
+                text.update()
+        except queue.Empty:
+            text.after(100, process)
+
+    threading.Thread(target=read, daemon=True).start()
+    process()
+
+
+def new_loader(text: tk.Text, path: str, done) -> None:
+    write = lambda chunk: text.insert(tk.END, chunk)
+    FileLoader(text, path, "utf-8", write, on_done=done).start()
+
+
+def run(root: tk.Tk, label: str, load, path: str) -> None:
+    text = tk.Text(root)
+    text.pack()
+    finished = []
+    ticker = Ticker(root)
+
+    start = time.perf_counter()
+    load(text, path, lambda: finished.append(time.perf_counter()))
+    while not finished:
+        root.update()
+    ticker.running = False
+
+    print(
+        f"{label:<12} load {finished[0] - start:>7.2f} s"
+        f"   longest event loop stall {ticker.longest * 1000:>8.1f} ms"
+    )
+    text.destroy()
+
+
+if __name__ == "__main__":
+    sizes = [float(i) for i in sys.argv[1:]] or [10, 100]
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit(f"needs a display: {e}")
+
+    for size in sizes:
+        path = make_file(int(size * 1024 * 1024))
+        try:
+            print(f"{size:.0f} MB")
+            run(root, "old loader", old_loader, path)
+            run(root, "FileLoader", new_loader, path)
+        finally:
+            os.remove(path)
@@ -0,0 +1,66 @@
+"""Time and memory to open a large log in the large file viewer's model.
+
+Measures opening the mapped file and decoding the first window, a search from
+the top for a line at the end, building the full line index in the background
+and then jumping to the last line, along with the resident memory of the
+process (Linux only).
+
+    python scripts/benchmarks/large_file_open.py [size_mb ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from biscuit.editor.largefile import MappedFile
+
+LINE = "2024-05-01 12:00:00,123 INFO  [worker-3] request handled in 42 ms id=%08d\n"
+WINDOW = 60
+
+
+def make_file(size: int) -> str:
+    fd, path = tempfile.mkstemp(suffix=".log")
+    block = "".join(LINE % i for i in range(10000)).encode()
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(size // len(block) + 1):
+            f.write(block)
+        f.write(b"needle\n")
+    return path
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"  {label:<28} {(time.perf_counter() - start) * 1000:>9.1f} ms   rss {rss_mb():>7.1f} MB")
+    return result
+
+
+if __name__ == "__main__":
+    sizes = [float(i) for i in sys.argv[1:]] or [2048]
+    for size in sizes:
+        path = make_file(int(size * 1024 * 1024))
+        try:
+            print(f"{size:.0f} MB, rss before {rss_mb():.1f} MB")
+            mapped = timed(
+                "open + first window", lambda: (m := MappedFile(path), m.lines(0, WINDOW))[0]
+            )
+            thread = timed("start indexing", mapped.start_indexing)
+            timed("search from the top", lambda: mapped.search("needle"))
+            timed("complete line index", thread.join)
+            timed("goto last line", lambda: mapped.lines(mapped.line_count - WINDOW, WINDOW))
+            print(f"  {mapped.line_count} lines")
+            mapped.close()
+        finally:
+            os.remove(path)
@@ -0,0 +1,81 @@
+"""Throughput of the language server transport on large responses.
+
+Starts fake_lsp_server.py, which replays recorded responses (a few MB of
+completion and document symbol results by default), and polls the transport
+every 50 ms like the client loop does. Compares the old transport, which read
+the output one byte at a time and drained it byte by byte on the Tk thread,
+with `IO`, which reads in large chunks and frames messages on the reader
+thread. Reports the time until everything arrived and the time spent reading
+on the polling (Tk) thread.
+
+    python scripts/benchmarks/lsp_transport.py [recording.jsonl] [--repeat N]
+"""
+
+import logging
+import os
+import queue
+import sys
+import time
+import types
+
+from biscuit.common.io import IO, FrameParser
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_lsp_server.py")
+POLL_INTERVAL = 0.05
+
+
+class LegacyIO(IO):
+    """The transport before messages were framed on the reader thread"""
+
+    def _process_out(self) -> None:
+        while self.alive:
+            data = self.p.stdout.read(1)
+            if not data:
+                break
+            self.out_queue.put(data)
+
+    def read_messages(self) -> list[bytes]:
+        buf = bytearray()
+        while True:
+            try:
+                buf += self.out_queue.get(block=False)
+            except queue.Empty:
+                break
+        return [bytes(buf)] if buf else []
+
+
+def run(label: str, transport: type[IO], args: list[str]) -> None:
+    master = types.SimpleNamespace(base=types.SimpleNamespace(logger=logging.getLogger()))
+    cmd = " ".join(f'"{arg}"' for arg in (sys.executable, SERVER, *args))
+    io = transport(master, cmd, os.getcwd())
+
+    parser = FrameParser()
+    received = messages = 0
+    reading = 0.0
+    start = time.perf_counter()
+    io.start()
+    while True:
+        t = time.perf_counter()
+        batch = io.read_messages()
+        reading += time.perf_counter() - t
+
+        for data in batch:
+            received += len(data)
+            # the old transport hands over raw bytes, count the messages in them
+            messages += len(parser.feed(data)) if transport is LegacyIO else 1
+        if not batch and not io.t_out.is_alive() and io.out_queue.empty():
+            break
+        time.sleep(POLL_INTERVAL)
+    total = time.perf_counter() - start
+    io.stop()
+
+    print(
+        f"{label:<10} {received / 1024 / 1024:>7.1f} MB  {messages:>5} messages"
+        f"   total {total:>6.2f} s   reading on the polling thread {reading * 1000:>8.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    run("old", LegacyIO, args)
+    run("IO", IO, args)
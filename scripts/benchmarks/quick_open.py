@@ -0,0 +1,48 @@
+"""Time to fuzzy search the paths of a large workspace, as quick open does.
+
+Types each query a character at a time like in the palette, and prints for
+each keystroke the time to the first results (one frame of searching) and to
+the final ones. Paths of the folder are repeated up to the count.
+
+    python scripts/benchmarks/quick_open.py [folder] [count] [query ...]
+"""
+
+import os
+import sys
+import time
+
+from biscuit.common.fuzzy import FuzzySearch
+from biscuit.common.gitignore import walk_files
+
+# seconds of a frame spent searching, as in the explorer
+FRAME_BUDGET = 0.008
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.__file__)
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500_000
+    queries = sys.argv[3:] or ["searchindex", "tkinit", "testsettings"]
+
+    found = [os.path.relpath(path, root) for path in walk_files(root)]
+    paths = []
+    while found and len(paths) < count:
+        paths.extend(f"copy{len(paths) // len(found)}{os.sep}{path}" for path in found)
+    paths = paths[:count]
+    paths.sort(key=lambda path: (path.count(os.sep), path))
+    print(f"{len(paths)} paths")
+
+    for query in queries:
+        search = None
+        for end in range(1, len(query) + 1):
+            start = time.perf_counter()
+            search = search.refine(query[:end]) if search else FuzzySearch(query[:end], paths)
+            search.step(FRAME_BUDGET)
+            first = time.perf_counter() - start
+            while not search.step(FRAME_BUDGET):
+                pass
+            total = time.perf_counter() - start
+            best = search.results()[:1]
+            print(
+                f"{query[:end]!r:<16} first {first * 1000:>6.1f} ms   all {total * 1000:>7.1f} ms"
+                f"   {len(search.matched):>7} matches   {best[0] if best else ''}"
+            )
@@ -0,0 +1,94 @@
+"""Allocation per keystroke of incremental tree-sitter parsing on a large file.
+
+Compares the old path, which re-encoded the whole buffer for every reparse,
+with parsing through the `Document.read` callback. py-tree-sitter never
+releases what the read callback returns, so the source buffers counted for it
+stay allocated for good.
+
+    python scripts/benchmarks/ts_parse_alloc.py [size_mb]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from tree_sitter_language_pack import get_parser
+
+from biscuit.editor.text import document
+from biscuit.editor.text.document import Document
+
+FUNCTION = '''def function_{0}(value, *args, **kwargs):
+    """Docstring for function {0}"""
+    result = [item * {0} for item in range(value) if item % 3]
+    return {{"name": "function_{0}", "result": result, "args": args}}
+
+
+'''
+
+
+def make_source(size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = FUNCTION.format(i)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return "".join(parts)
+
+
+def keystroke(doc: Document, tree, row: int):
+    # type inside a function name, like renaming an identifier
+    point = (row, 6)
+    start_byte = doc.point_to_byte(point)
+    doc.insert(point, "x")
+    tree.edit(
+        start_byte=start_byte,
+        old_end_byte=start_byte,
+        new_end_byte=start_byte + 1,
+        start_point=point,
+        old_end_point=point,
+        new_end_point=(row, 7),
+    )
+
+
+def run(label: str, source_for, size: int, keystrokes: int = 50) -> None:
+    parser = get_parser("python")
+    doc = Document()
+    doc.set_text(make_source(size))
+    tree = parser.parse(doc.read)
+
+    lines_per_function = FUNCTION.count("\n")
+    step = max(1, doc.line_count // keystrokes // lines_per_function) * lines_per_function
+    # py-tree-sitter allocates the trees through PyMem as well, so count the
+    # buffer allocations made by the document separately from the total peak
+    document_only = tracemalloc.Filter(True, document.__file__)
+
+    source_bytes, peaks, elapsed = 0, 0, 0.0
+    for k in range(keystrokes):
+        keystroke(doc, tree, k * step)
+
+        tracemalloc.start()
+        t = time.perf_counter()
+        source = source_for(doc)
+        tree = parser.parse(source, tree)
+        elapsed += time.perf_counter() - t
+        snapshot = tracemalloc.take_snapshot().filter_traces((document_only,))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del source
+
+        source_bytes += sum(stat.size for stat in snapshot.statistics("filename"))
+        peaks = max(peaks, peak)
+
+    print(
+        f"{label:<16} source buffers/keystroke {source_bytes / keystrokes / 1024:>9.1f} KiB"
+        f"   peak incl. tree {peaks / 1024:>9.1f} KiB"
+        f"   parse {elapsed / keystrokes * 1000:>7.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 else 5 * 1024 * 1024
+    print(f"{size / 1024 / 1024:.1f} MB python source")
+    run("full re-encode", lambda doc: doc.to_bytes(), size)
+    run("read callback", lambda doc: doc.read, size)
@@ -0,0 +1,200 @@
+"""Tcl calls made by the tree-sitter highlighter, per language.
+
+For every language with a bundled `queries/<lang>/highlights.scm`, the largest
+matching file under the given directory is highlighted in full and then
+re-highlighted after an edit in the middle of the file. The tag calls are
+counted for the old path, which made one `tag add` per captured node and one
+`tag remove` per capture name and range, and for the batched highlighter.
+When a display is available the recorded calls are replayed into a Tk text
+widget to time them.
+
+    python scripts/benchmarks/ts_tag_calls.py [directory]
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from tree_sitter import Query, QueryCursor
+from tree_sitter_language_pack import get_language
+
+from biscuit.editor.text.document import Document
+from biscuit.editor.text.ts_highlighter import (
+    EXTENSION_MAP,
+    QUERIES_DIR,
+    TreeSitterHighlighter,
+)
+
+SKIP_DIRS = {".git", "node_modules", "__pycache__", ".venv", "venv", "build", "dist"}
+
+
+class RecordingText:
+    """Stands in for the text widget, records the tag calls it receives"""
+
+    _w = "text"
+
+    def __init__(self, path: str, content: str, tag_colors: dict) -> None:
+        self.path = path
+        self.base = SimpleNamespace(theme=SimpleNamespace(treesitter_syntax=tag_colors))
+        self.document = Document()
+        self.document.set_text(content)
+        self.tk = self
+        self.calls = []
+        self.idle = []
+
+    def call(self, *args) -> None:
+        self.calls.append(args[1:])
+
+    def tag_add(self, tag: str, *indices: str) -> None:
+        self.calls.append(("tag", "add", tag) + indices)
+
+    def tag_configure(self, *_, **__) -> None: ...
+
+    def index(self, index: str) -> str:
+        return "1.0" if index == "@0,0" else "60.0"
+
+    def winfo_height(self) -> int:
+        return 800
+
+    def after_idle(self, callback) -> str:
+        self.idle.append(callback)
+        return str(len(self.idle))
+
+    def after_cancel(self, job: str) -> None:
+        self.idle[int(job) - 1] = None
+
+    def run_idle(self) -> None:
+        while any(self.idle):
+            callbacks, self.idle = self.idle, []
+            for callback in filter(None, callbacks):
+                callback()
+
+
+def sample_files(root: str) -> dict[str, str]:
+    """Largest file per language with a bundled highlight query"""
+
+    languages = {p.name for p in QUERIES_DIR.iterdir() if (p / "highlights.scm").exists()}
+    samples, sizes = {}, {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            language = EXTENSION_MAP.get(os.path.splitext(name)[1])
+            if language not in languages:
+                continue
+            path = os.path.join(dirpath, name)
+            size = os.path.getsize(path)
+            if size > sizes.get(language, 0):
+                samples[language], sizes[language] = path, size
+    return samples
+
+
+def legacy_calls(highlighter: TreeSitterHighlighter, ranges: list) -> list:
+    """Tag calls the highlighter made before batching, for the same line ranges"""
+
+    calls = []
+    cursor = QueryCursor(highlighter.query)
+    for start, end in ranges:
+        for name in highlighter.tag_colors:
+            calls.append(("tag", "remove", f"ts.{name}", f"{start + 1}.0", f"{end + 1}.0"))
+        cursor.set_point_range((start, 0), (end, 0))
+        for name, nodes in cursor.captures(highlighter.tree.root_node).items():
+            tag = highlighter._resolve_tag(name)
+            if not tag:
+                continue
+            for node in nodes:
+                (srow, scol), (erow, ecol) = node.start_point, node.end_point
+                calls.append(("tag", "add", tag, f"{srow + 1}.{scol}", f"{erow + 1}.{ecol}"))
+    return calls
+
+
+def replay(widget, calls: list) -> float:
+    t = time.perf_counter()
+    for args in calls:
+        widget.tk.call(widget._w, *args)
+    widget.update_idletasks()
+    return time.perf_counter() - t
+
+
+def run(language: str, path: str, widget=None) -> None:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        content = f.read()
+
+    # a theme with a color for every capture name of the query
+    query_text = (QUERIES_DIR / language / "highlights.scm").read_text(encoding="utf-8")
+    query = Query(get_language(language), query_text)
+    tag_colors = {query.capture_name(i): "#000000" for i in range(query.capture_count)}
+    text = RecordingText(path, content, tag_colors)
+    highlighter = TreeSitterHighlighter(text, language)
+    if not highlighter.query:
+        print(f"{language:<12} skipped, grammar not available")
+        return
+
+    ranges = []
+    highlight_ranges = highlighter._highlight_ranges
+
+    def record(batch):
+        ranges.extend(batch)
+        highlight_ranges(batch)
+
+    highlighter._highlight_ranges = record
+
+    highlighter.highlight()
+    text.run_idle()
+    full_old, full_new = legacy_calls(highlighter, ranges), text.calls
+
+    # edit in the middle of the file
+    row = text.document.line_count // 2
+    point = (row, 0)
+    start_byte = text.document.point_to_byte(point)
+    text.document.insert(point, "x\n")
+    ranges.clear()
+    text.calls = []
+    highlighter.incremental_highlight(
+        [
+            {
+                "start_byte": start_byte,
+                "old_end_byte": start_byte,
+                "new_end_byte": start_byte + 2,
+                "start_point": point,
+                "old_end_point": point,
+                "new_end_point": (row + 1, 0),
+            }
+        ]
+    )
+    text.run_idle()
+    edit_old, edit_new = legacy_calls(highlighter, ranges), text.calls
+
+    timing = ""
+    if widget is not None:
+        widget.delete("1.0", "end")
+        widget.insert("1.0", content)
+        for tag in tag_colors:
+            widget.tag_configure(f"ts.{tag}", foreground="red")
+        old_ms = replay(widget, full_old) * 1000
+        new_ms = replay(widget, full_new) * 1000
+        timing = f"   full tk time {old_ms:>8.1f} -> {new_ms:.1f} ms"
+
+    print(
+        f"{language:<12} {text.document.line_count:>7} lines"
+        f"   full {len(full_old):>7} -> {len(full_new):<4} calls"
+        f"   edit {len(edit_old):>5} -> {len(edit_new):<4} calls{timing}"
+    )
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else "."
+
+    widget = None
+    try:
+        import tkinter as tk
+
+        widget = tk.Text(tk.Tk())
+    except Exception:
+        print("no display, counting calls only")
+
+    for language, path in sorted(sample_files(root).items()):
+        try:
+            run(language, path, widget)
+        except Exception as e:
+            print(f"{language:<12} skipped, {e}")
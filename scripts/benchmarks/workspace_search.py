@@ -0,0 +1,58 @@
+"""Time to search a folder, scanning every file and through the trigram index.
+
+Builds the index of the folder in a temporary file, then runs each query with
+`SearchEngine` over the whole folder and over the candidates of the index.
+Defaults to the standard library of the running python.
+
+    python scripts/benchmarks/workspace_search.py [folder] [query ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from biscuit.common.search import SearchEngine, SearchQuery
+from biscuit.common.searchindex import IndexFile, build_index, query_trigrams
+
+
+def search(root: str, query: SearchQuery, **kwargs) -> tuple[float, int]:
+    start = time.perf_counter()
+    engine = SearchEngine(root, query, **kwargs)
+    engine.start()
+    matches = 0
+    while not (engine.done.is_set() and engine.results.empty()):
+        try:
+            matches += len(engine.results.get(timeout=0.001)[1])
+        except Exception:
+            pass
+    return time.perf_counter() - start, matches
+
+
+if __name__ == "__main__":
+    root = sys.argv[1] if len(sys.argv) > 1 else os.path.dirname(os.__file__)
+    queries = sys.argv[2:] or ["ProcessPoolExecutor", "def __init__", "no such text anywhere"]
+
+    path = os.path.join(tempfile.mkdtemp(), "search-index.bin")
+    start = time.perf_counter()
+    build_index(root, path)
+    index = IndexFile(path)
+    print(
+        f"index     {time.perf_counter() - start:>7.2f} s   {index.file_count} files"
+        f"   {os.path.getsize(path) / 1024 / 1024:.1f} MB"
+    )
+
+    for text in queries:
+        query = SearchQuery(text)
+        scan, matches = search(root, query)
+
+        start = time.perf_counter()
+        candidates = [index.file(i)[0] for i in index.candidates(query_trigrams(query))]
+        lookup = time.perf_counter() - start
+        indexed, _ = search(root, query, paths=candidates, backend="python")
+        indexed += lookup
+        print(
+            f"{text!r:<26} {matches:>6} matches   scan {scan * 1000:>8.1f} ms"
+            f"   indexed {indexed * 1000:>8.1f} ms ({len(candidates)} candidates)"
+        )
+    index.close()
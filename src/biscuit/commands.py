@@ -445,6 +445,12 @@ class Commands:
     def show_logs(self, *_) -> None:
         self.base.panel.show_logs()
 
+    def log_editor_render_timings(self, *_) -> None:
+        if editor := self.base.editorsmanager.active_editor:
+            if log := getattr(editor.content, "log_render_timings", None):
+                log()
+                self.base.panel.show_logs()
+
     def show_welcome(self, *_) -> None:
         self.base.editorsmanager.add_welcome()
 
@@ -1,5 +1,6 @@
 from .actionset import ActionSet
 from .classdrill import *
+from .fileindex import FileIndex
 from .fixedstack import FixedSizeStack
 from .games import *
 from .helpers import *
@@ -9,6 +10,7 @@ from .menu import Checkable, Command, Dropdown, Menu
 from .notifications import Notification, Notifications
 from .open_editors import OpenEditors
 from .palette import Palette
+from .searchindex import SearchIndex
 from .sysinfo import SysInfo
 from .text_editor_menu import TextEditorContextMenu
 from .textutils import *
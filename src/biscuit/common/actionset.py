@@ -9,6 +9,9 @@ class ActionSet(list):
     The pinned actions are displayed at the top of the palette, their command can be a format string,
     the palette will format the command with the search term.
     eg: pinned=[["Search on Google: {}", foo_method],]
+
+    Ranked action sets are already matched against the search term and ordered by the owner,
+    the palette displays them as they are.
     """
 
     def __init__(
@@ -17,6 +20,7 @@ class ActionSet(list):
         prefix: str,
         items: List[List[str | Callable]] = [],
         pinned: List[List[str | Callable[[str], None]]] = [],
+        ranked: bool = False,
         *args,
         **kwargs
     ) -> None:
@@ -27,11 +31,13 @@ class ActionSet(list):
             prefix (str): The prefix of the actionset.
             items (List[Tuple[str | Callable]], optional): The list of actions. Defaults to [].
             pinned (List[List[str | Callable[[str], None]]], optional): The list of pinned actions. Defaults to [].
+            ranked (bool, optional): Whether the items are already matched and ordered. Defaults to False.
         """
 
         super().__init__(items, *args, **kwargs)
         self.description: str = description
         self.prefix: str = prefix
+        self.ranked: bool = ranked
 
         self.pinned: List[Tuple[str, Callable[[str], None]]] = (
             pinned  # [[command, callback], ...]
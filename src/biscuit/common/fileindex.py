@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import threading
+import typing
+
+from .gitignore import IgnoreMatcher, walk_files
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable, List
+
+    from biscuit import App
+
+# files added to the index at a time while it's being built
+BATCH_SIZE = 1000
+
+
+class FileIndex:
+    """Paths of the files of the active workspace, for quick open
+
+    The workspace is walked once in a background thread when a folder is
+    opened, skipping what its .gitignore files ignore and the `ignore`d
+    folders. The explorer's watcher keeps it current afterwards. Paths are
+    relative to the workspace, files near its root come first.
+
+    Args:
+        base (App): The application
+        ignore (Iterable[str], optional): Names of folders to leave out"""
+
+    def __init__(self, base: App, ignore: Iterable[str] = ()) -> None:
+        self.base = base
+        self.ignore = tuple(ignore)
+
+        self.root: str | None = None
+        self.matcher: IgnoreMatcher | None = None
+        self.ready = False
+        # bumped on every change, searches of an older version are redone
+        self.version = 0
+
+        self._files: dict[str, None] = {}
+        self._paths: List[str] | None = None
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.base.bind("<<DirectoryChanged>>", self.open, add=True)
+
+    def open(self, *_) -> None:
+        """Index the active directory"""
+
+        self.close()
+        if not self.base.active_directory:
+            return
+
+        self.root = os.path.abspath(self.base.active_directory)
+        self.matcher = IgnoreMatcher(self.root, always=(".git", *self.ignore))
+        threading.Thread(
+            target=self._build,
+            args=(self.root, self.matcher, self._generation),
+            daemon=True,
+        ).start()
+
+    def close(self) -> None:
+        self._generation += 1
+        self.ready = False
+        self.root = self.matcher = None
+        with self._lock:
+            self._files = {}
+            self._changed()
+
+    def paths(self) -> List[str]:
+        """Relative paths of the indexed files, while building the ones found
+        so far"""
+
+        with self._lock:
+            if self._paths is None:
+                self._paths = list(self._files)
+            return self._paths
+
+    def changed(self, path: str, is_dir: bool = False) -> None:
+        """Add or remove a created, moved or deleted path, called from the watcher"""
+
+        root, matcher = self.root, self.matcher
+        if not matcher or matcher.excluded(path, is_dir):
+            return
+
+        relpath = os.path.relpath(os.path.abspath(path), root)
+        with self._lock:
+            if os.path.isfile(path):
+                self._files[relpath] = None
+            elif os.path.isdir(path):
+                for directory, _, files in os.walk(path):
+                    for name in files:
+                        file = os.path.join(directory, name)
+                        if not matcher.excluded(file):
+                            self._files[os.path.relpath(file, root)] = None
+            else:
+                self._files.pop(relpath, None)
+                if is_dir:
+                    prefix = relpath + os.sep
+                    for file in [f for f in self._files if f.startswith(prefix)]:
+                        del self._files[file]
+            self._changed()
+
+    def _changed(self) -> None:
+        self._paths = None
+        self.version += 1
+
+    def _build(self, root: str, matcher: IgnoreMatcher, generation: int) -> None:
+        cancelled = lambda: generation != self._generation
+        start = len(root) + 1
+
+        batch = []
+        for path in walk_files(root, matcher, cancelled):
+            batch.append(path[start:])
+            if len(batch) >= BATCH_SIZE:
+                self._add(batch, generation)
+                batch = []
+        self._add(batch, generation)
+
+        # files near the root first, they are searched first
+        with self._lock:
+            found = list(self._files)
+        found.sort(key=lambda path: (path.count(os.sep), path))
+        with self._lock:
+            if cancelled():
+                return
+            files = dict.fromkeys(f for f in found if f in self._files)
+            files.update(self._files)
+            self._files = files
+            self._changed()
+        self.ready = True
+
+    def _add(self, paths: List[str], generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._files.update(dict.fromkeys(paths))
+            self._changed()
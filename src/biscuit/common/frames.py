@@ -0,0 +1,5 @@
+# time spent per frame on work done in batches on the Tk thread (seconds),
+# the rest waits for the next frame
+FRAME_BUDGET = 0.008
+# delay between frames (ms), about 60 frames per second
+FRAME_INTERVAL = 16
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import heapq
+import re
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from typing import List, Sequence
+
+# score of each matched character
+SCORE_MATCH = 16
+# penalty of the first character of a gap between matches
+SCORE_GAP_START = -3
+# penalty of each following character of a gap
+SCORE_GAP_EXTENSION = -1
+# bonus of a match at the start of a file or folder name
+BONUS_SEPARATOR = 9
+# bonus of a match after a space, - _ . and other non word characters
+BONUS_BOUNDARY = 8
+# bonus of a match at a camelCase hump or the first digit of a number
+BONUS_CAMEL = 7
+# least bonus of each character of a run of consecutive matches
+BONUS_CONSECUTIVE = 4
+# the bonus of the first character of the query counts this many times
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+# number of best matches kept
+LIMIT = 50
+# candidates checked between two looks at the clock
+CHUNK_SIZE = 256
+
+# character classes
+_SEPARATOR, _NONWORD, _LOWER, _UPPER, _DIGIT = range(5)
+
+
+def _char_class(c: str) -> int:
+    if c in "/\\":
+        return _SEPARATOR
+    if c.isdigit():
+        return _DIGIT
+    if c.isupper():
+        return _UPPER
+    if c.isalpha():
+        return _LOWER
+    return _NONWORD
+
+
+_CLASSES = {chr(i): _char_class(chr(i)) for i in range(128)}
+
+
+def _bonus(previous: int, current: int) -> int:
+    """Bonus of a match, from the classes of it and the character before"""
+
+    if current == _SEPARATOR:
+        return BONUS_SEPARATOR
+    if current == _NONWORD:
+        return BONUS_BOUNDARY
+    if previous == _SEPARATOR:
+        return BONUS_SEPARATOR
+    if previous == _NONWORD:
+        return BONUS_BOUNDARY
+    if (previous == _LOWER and current == _UPPER) or (
+        previous != _DIGIT and current == _DIGIT
+    ):
+        return BONUS_CAMEL
+    return 0
+
+
+_BONUS = [[_bonus(p, c) for c in range(5)] for p in range(5)]
+
+
+def fuzzy_score(query: str, text: str, case_sensitive: bool | None = None) -> int | None:
+    """Score of the text for a fuzzy query, None if it doesn't match
+
+    The characters of the query have to appear in the text in order. Like fzf,
+    the shortest run of the text holding them is scored: matches at the start
+    of names, after separators and at camelCase humps score more, gaps between
+    matches cost.
+
+    Args:
+        query (str): The query, typed by the user
+        text (str): The text to match, eg. a path
+        case_sensitive (bool, optional): Defaults to smart case, ignoring case
+            unless the query has uppercase characters"""
+
+    if not query:
+        return 0
+    if case_sensitive is None:
+        case_sensitive = query != query.lower()
+    haystack = text if case_sensitive else text.lower()
+    if not case_sensitive:
+        query = query.lower()
+
+    # first occurrence of the query, then back to the latest start for it
+    end = 0
+    for c in query:
+        end = haystack.find(c, end) + 1
+        if not end:
+            return None
+    start = end
+    for c in reversed(query):
+        start = haystack.rfind(c, 0, start)
+
+    classes = _CLASSES
+    score = 0
+    in_gap = False
+    consecutive = 0
+    first_bonus = 0
+    qi = 0
+    previous = classes.get(text[start - 1], _LOWER) if start else _SEPARATOR
+    for i in range(start, end):
+        c = text[i]
+        current = classes.get(c, _LOWER)
+        if haystack[i] == query[qi]:
+            score += SCORE_MATCH
+            bonus = _BONUS[previous][current]
+            if consecutive == 0:
+                first_bonus = bonus
+            else:
+                if bonus >= BONUS_BOUNDARY and bonus > first_bonus:
+                    first_bonus = bonus
+                bonus = max(bonus, first_bonus, BONUS_CONSECUTIVE)
+            score += bonus * BONUS_FIRST_CHAR_MULTIPLIER if qi == 0 else bonus
+            in_gap = False
+            consecutive += 1
+            qi += 1
+            if qi == len(query):
+                break
+        else:
+            score += SCORE_GAP_EXTENSION if in_gap else SCORE_GAP_START
+            in_gap = True
+            consecutive = 0
+            first_bonus = 0
+        previous = current
+    return score
+
+
+class FuzzySearch:
+    """Best fuzzy matches of a query among many candidates
+
+    The candidates are searched a slice at a time with `step`, so a search
+    over hundreds of thousands of paths can be spread over several frames
+    while `results` gives the best matches found so far. A regex does the
+    cheap rejection of candidates that don't match, only the rest is scored.
+
+    A search for a query typed after this one (`refine`) only looks at the
+    candidates this one matched and the ones it did not get to yet.
+
+    Args:
+        query (str): The query, smart case like in `fuzzy_score`
+        candidates (Sequence[str]): Texts to search, better ones first since
+            they are searched in order
+        limit (int, optional): Number of best matches kept"""
+
+    def __init__(self, query: str, candidates: Sequence[str], limit: int = LIMIT) -> None:
+        self.query = query
+        self.candidates = candidates
+        self.limit = limit
+        self.case_sensitive = query != query.lower()
+        # every candidate that matched, in order
+        self.matched: List[str] = []
+        self._best: list[tuple[int, int, str]] = []
+        # what is left to search, as (candidates, position) pairs
+        self._pending: list[tuple[Sequence[str], int]] = [(candidates, 0)]
+
+        self._regex = re.compile(
+            "".join(
+                f"[^{re.escape(c)}]*{re.escape(c)}" if i else re.escape(c)
+                for i, c in enumerate(query)
+            ),
+            0 if self.case_sensitive else re.IGNORECASE,
+        )
+
+        if not query:
+            self.matched = list(candidates[:limit])
+            self._pending = []
+
+    @property
+    def done(self) -> bool:
+        return not self._pending
+
+    def step(self, budget: float) -> bool:
+        """Search the candidates for up to `budget` seconds, True when done"""
+
+        deadline = time.perf_counter() + budget
+        search = self._regex.search
+        query, case_sensitive = self.query, self.case_sensitive
+        matched, best, limit = self.matched, self._best, self.limit
+        # no match scores more, once the kept ones all do only shorter
+        # texts can replace them and the others need not be scored
+        perfect = len(query) * (SCORE_MATCH + BONUS_SEPARATOR) + BONUS_SEPARATOR
+
+        while self._pending:
+            candidates, position = self._pending[0]
+            chunk = candidates[position : position + CHUNK_SIZE]
+            position += len(chunk)
+            if position < len(candidates):
+                self._pending[0] = (candidates, position)
+            else:
+                self._pending.pop(0)
+
+            for text in filter(search, chunk):
+                if len(best) == limit and (perfect, -len(text)) <= best[0][:2]:
+                    matched.append(text)
+                    continue
+                score = fuzzy_score(query, text, case_sensitive)
+                if score is None:
+                    continue
+                matched.append(text)
+                entry = (score, -len(text), text)
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                elif entry > best[0]:
+                    heapq.heapreplace(best, entry)
+            if time.perf_counter() > deadline:
+                break
+        return self.done
+
+    def results(self) -> List[str]:
+        """Best matches found so far, best first"""
+
+        if not self.query:
+            return self.matched
+        best = sorted(self._best, key=lambda entry: (-entry[0], -entry[1], entry[2]))
+        return [text for *_, text in best]
+
+    def refine(self, query: str) -> FuzzySearch:
+        """Search for a query among the same candidates, narrowed down with
+        this search if the query extends this one. This search is not to be
+        stepped anymore."""
+
+        search = FuzzySearch(query, self.candidates, self.limit)
+        if query and self.query and query.startswith(self.query):
+            search._pending = [(self.matched, 0), *self._pending]
+        return search
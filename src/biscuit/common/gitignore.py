@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import os
+import re
+import typing
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable, Iterator
+
+
+def _translate(pattern: str) -> str:
+    """Regex for a gitignore glob, matched against a path relative to the
+    directory of the .gitignore it is from"""
+
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i : i + 2] == "**":
+                if pattern[i + 2 : i + 3] == "/":
+                    # `**/` matches zero or more directories
+                    out.append("(?:.*/)?")
+                    i += 3
+                    continue
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern[i + 1 : i + 2] in "!^" else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body[:1] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRule:
+    """One line of a .gitignore"""
+
+    __slots__ = ("negate", "dir_only", "regex")
+
+    def __init__(self, line: str) -> None:
+        self.negate = line.startswith("!")
+        if self.negate:
+            line = line[1:]
+        self.dir_only = line.endswith("/")
+        line = line.rstrip("/")
+
+        # patterns with a slash are relative to the .gitignore, others match
+        # the name at any depth
+        if "/" in line:
+            self.regex = re.compile(_translate(line.lstrip("/")), re.DOTALL)
+        else:
+            self.regex = re.compile("(?:.*/)?" + _translate(line), re.DOTALL)
+
+    def match(self, relpath: str, is_dir: bool) -> bool:
+        return (is_dir or not self.dir_only) and bool(self.regex.fullmatch(relpath))
+
+
+def parse_rules(lines: Iterable[str]) -> list[IgnoreRule]:
+    """Rules of the lines of a .gitignore, blank lines and comments skipped"""
+
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        if not line.strip() or line.startswith("#"):
+            continue
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        rules.append(IgnoreRule(line))
+    return rules
+
+
+class IgnoreMatcher:
+    """Matches paths against the .gitignore files of a directory tree
+
+    The .gitignore of every directory is read once, the first time a path in
+    it is checked, and applies to everything below it. Rules of deeper files
+    come later, the last rule matching a path decides like in git.
+
+    Names in `always` (eg. `.git`) are ignored wherever they are."""
+
+    def __init__(self, root: str, always: Iterable[str] = (".git",)) -> None:
+        self.root = os.path.abspath(root)
+        self.always = set(always)
+        self._rules: dict[str, list[IgnoreRule]] = {}
+
+    def rules(self, directory: str) -> list[IgnoreRule]:
+        """Rules of the .gitignore in a directory, relative to the root"""
+
+        if directory not in self._rules:
+            try:
+                with open(
+                    os.path.join(self.root, directory, ".gitignore"),
+                    encoding="utf-8",
+                    errors="replace",
+                ) as f:
+                    self._rules[directory] = parse_rules(f)
+            except OSError:
+                self._rules[directory] = []
+        return self._rules[directory]
+
+    def invalidate(self, directory: str | None = None) -> None:
+        """Forget the rules read for a directory, for all if None"""
+
+        if directory is None:
+            self._rules.clear()
+        else:
+            self._rules.pop(self.relpath(directory), None)
+
+    def relpath(self, path: str) -> str:
+        relpath = os.path.relpath(os.path.abspath(path), self.root)
+        return "" if relpath == "." else relpath.replace(os.sep, "/")
+
+    def ignored(self, path: str, is_dir: bool = False) -> bool:
+        """Check if a path is ignored, its parent directories are assumed not
+        to be, as when walking down the tree"""
+
+        relpath = self.relpath(path)
+        if not relpath or relpath.startswith("../"):
+            return False
+        return self.match(relpath, is_dir)
+
+    def excluded(self, path: str, is_dir: bool = False) -> bool:
+        """Check if a path or one of its parent directories is ignored, paths
+        outside the root are excluded"""
+
+        relpath = self.relpath(path)
+        if not relpath or relpath == ".." or relpath.startswith("../"):
+            return True
+
+        parts = relpath.split("/")
+        for depth in range(1, len(parts) + 1):
+            if self.match("/".join(parts[:depth]), is_dir or depth < len(parts)):
+                return True
+        return False
+
+    def match(self, relpath: str, is_dir: bool) -> bool:
+        """`ignored` for a path relative to the root, with / separators"""
+
+        parts = relpath.split("/")
+        if parts[-1] in self.always:
+            return True
+
+        ignored = False
+        for depth in range(len(parts)):
+            rules = self.rules("/".join(parts[:depth]))
+            if not rules:
+                continue
+            rest = "/".join(parts[depth:])
+            for rule in rules:
+                if rule.negate == ignored and rule.match(rest, is_dir):
+                    ignored = not rule.negate
+        return ignored
+
+
+def walk_files(
+    root: str,
+    matcher: IgnoreMatcher | None = None,
+    cancelled: typing.Callable[[], bool] = lambda: False,
+) -> Iterator[str]:
+    """Paths of the files below root that are not ignored, top-down.
+    Symlinked directories are not followed."""
+
+    matcher = matcher or IgnoreMatcher(root)
+    stack = [(root, "")]
+    while stack and not cancelled():
+        directory, reldir = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            relpath = f"{reldir}/{entry.name}" if reldir else entry.name
+            if matcher.match(relpath, is_dir):
+                continue
+            if is_dir:
+                subdirs.append((entry.path, relpath))
+            else:
+                yield entry.path
+        stack.extend(reversed(subdirs))
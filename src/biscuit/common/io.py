@@ -6,28 +6,103 @@ import typing
 from threading import Thread
 
 if typing.TYPE_CHECKING:
+    from typing import Callable
+
     from biscuit import App
 
+# bytes requested per read from the process output
+READ_SIZE = 64 * 1024
 
-class IO:
-    """Handling input/output of a process in a separate thread"""
 
-    def __init__(self, master, cmd: str, cwd: str) -> None:
+class FrameParser:
+    """Splits a byte stream into `Content-Length` framed messages
+
+    Data is appended as it arrives and every complete message (headers and
+    body) is returned as one bytes object. Header blocks without a
+    Content-Length, eg. a server logging to stdout, are dropped."""
+
+    def __init__(self) -> None:
+        self.buffer = bytearray()
+        # length of the body expected after the current headers, and where it starts
+        self._length: int | None = None
+        self._body = 0
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Add received data, returns the messages it completed"""
+
+        self.buffer += data
+        messages = []
+        start = 0
+        while True:
+            if self._length is None:
+                end = self.buffer.find(b"\r\n\r\n", start)
+                if end == -1:
+                    break
+                self._length = self._content_length(self.buffer[start:end])
+                self._body = end + 4
+                if self._length is None:
+                    start = self._body
+                    continue
+
+            end = self._body + self._length
+            if len(self.buffer) < end:
+                break
+            with memoryview(self.buffer) as view:
+                messages.append(bytes(view[start:end]))
+            start = end
+            self._length = None
+
+        if start:
+            del self.buffer[:start]
+            self._body -= start
+        return messages
+
+    @staticmethod
+    def _content_length(headers: bytes) -> int | None:
+        for line in headers.split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+        return None
+
+
+class IO:
+    """Handling input/output of a process in a separate thread
+
+    The output is read in large chunks and split into `Content-Length` framed
+    messages on the reader thread, so the Tk thread only picks up complete
+    messages. They are queued for `read_messages`, or handed to `on_message`
+    on the reader thread as soon as they are complete."""
+
+    def __init__(
+        self,
+        master,
+        cmd: str,
+        cwd: str,
+        on_message: Callable[[bytes], None] | None = None,
+    ) -> None:
         """Initialize the IO class
 
         Args:
             master: The parent object
             cmd (str): The command to run
-            cwd (str): The working directory"""
+            cwd (str): The working directory
+            on_message (Callable): Called with every complete message on the
+                reader thread, instead of queueing it"""
 
         self.master = master
         self.base: App = master.base
         self.alive = True
         self.cmd = cmd
         self.cwd = cwd
+        self.on_message = on_message
+        self.p: subprocess.Popen | None = None
 
         self.in_queue = queue.Queue()  # input data
-        self.out_queue = queue.Queue()  # output results
+        self.out_queue = queue.Queue()  # output messages
 
     def write(self, buf) -> None:
         """Write data to the process
@@ -36,19 +111,27 @@ class IO:
             buf: The data to write to the process
         """
 
-        self.in_queue.put(buf)
+        if buf:
+            self.in_queue.put(buf)
+
+    def read_messages(self) -> list[bytes]:
+        """Complete messages received since the last call"""
 
-    def read(self) -> None:
-        buf = bytearray()
+        messages = []
         while True:
             try:
-                buf += self.out_queue.get(block=False)
+                messages.append(self.out_queue.get(block=False))
             except queue.Empty:
                 break
+        return messages
+
+    def read(self) -> bytes | None:
+        """All output received since the last call, None if there is none yet"""
 
+        buf = b"".join(self.read_messages())
         if self.t_out.is_alive() and not buf:
             return None
-        return bytes(buf)
+        return buf
 
     def start(self, *_) -> None:
         """Start the process and the input/output threads"""
@@ -94,23 +177,27 @@ class IO:
                 pass
 
     def _process_out(self) -> None:
+        parser = FrameParser()
+        deliver = self.on_message or self.out_queue.put
         while self.alive:
             try:
-                data = self.p.stdout.read(1)
-            except AttributeError:
+                # returns as soon as some output is available
+                data = self.p.stdout.read1(READ_SIZE)
+            except (AttributeError, OSError, ValueError):
                 break
             if not data:
                 break
             if isinstance(data, bytes):
-                self.out_queue.put(data)
+                for message in parser.feed(data):
+                    deliver(message)
             else:
                 break
 
     def _process_err(self) -> None:
         while self.alive:
             try:
-                data = self.p.stderr.read(1)
-            except AttributeError:
+                data = self.p.stderr.read1(READ_SIZE)
+            except (AttributeError, OSError, ValueError):
                 break
             if not data:
                 break
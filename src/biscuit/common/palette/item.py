@@ -15,6 +15,8 @@ class PaletteItem(Text):
     Palette Item is a text widget that represents an action that can be performed by the user.
     It is displayed in the palette and can be selected by the user using the mouse or keyboard.
     Text widget is used to highlight the search term in the item text.
+
+    The palette keeps a fixed number of items and reuses them for the shown actions with `set_data`.
     """
 
     def __init__(
@@ -31,9 +33,6 @@ class PaletteItem(Text):
 
         super().__init__(master, *args, **kwargs)
         self.palette = palette
-        self.text = text
-        self.description = description
-        self.command = command
 
         self.theme = self.base.theme
         self.bg, self.fg, self.hbg, self.hfg = self.theme.palette.item.values()
@@ -56,10 +55,7 @@ class PaletteItem(Text):
         self.tag_config("term", foreground=self.theme.biscuit, font=self.base.settings.uifont_bold)
         self.tag_config("description", foreground=self.theme.secondary_foreground, font=self.base.settings.font)
 
-        self.insert(tk.END, text)
-        if description:
-            self.insert(tk.END, f"   {description}", "description")
-        self.config(state=tk.DISABLED)
+        self.set_data(text, command, description)
 
         self.bind("<Button-1>", self.on_click)
         self.bind("<Enter>", self.on_hover)
@@ -68,6 +64,25 @@ class PaletteItem(Text):
         self.selected = False
         self.hovered = False
 
+    def set_data(self, text: str, command, description="") -> None:
+        """Shows another action in the item
+
+        Args:
+            text (str): The text to display in the item
+            command (str): The command to execute when the item is selected
+            description (str, optional): The description of the item. Defaults to"""
+
+        self.text = text
+        self.description = description
+        self.command = command
+
+        self.config(state=tk.NORMAL)
+        self.delete(1.0, tk.END)
+        self.insert(tk.END, text)
+        if description:
+            self.insert(tk.END, f"   {description}", "description")
+        self.config(state=tk.DISABLED)
+
     def on_click(self, *args) -> None:
         """Executes the command when the item is clicked"""
  
@@ -90,6 +105,8 @@ class PaletteItem(Text):
         start_pos = self.text.lower().find(term.lower())
         end_pos = start_pos + len(term)
         self.tag_remove("term", 1.0, tk.END)
+        if start_pos < 0:
+            return
         self.tag_add("term", f"1.{start_pos}", f"1.{end_pos}")
 
     def on_hover(self, *args) -> None:
@@ -1,18 +1,49 @@
 from __future__ import annotations
 
 import platform
+import threading
 import tkinter as tk
 import typing
 
 from ..actionset import ActionSet
 from ..ui import Frame, Toplevel, Scrollbar
-from ..ui.native import Canvas
 from .item import PaletteItem
 from .searchbar import SearchBar
 
 if typing.TYPE_CHECKING:
+    from typing import Callable
+
     from biscuit import App
 
+# rows of actions shown at once, the same row widgets show every action
+VISIBLE_ROWS = 9
+# larger action sets are ranked on a worker, this many actions at a time
+RANK_CHUNK = 500
+
+
+def rank_actions(
+    actions: list, term: str, cancelled: Callable[[], bool] = lambda: False
+) -> list | None:
+    """Actions matching the search term: exact matches first, then the ones
+    starting with it and the ones including it. None if cancelled."""
+
+    exact, starts, includes = [], [], []
+    temp = term.lower()
+    for n, i in enumerate(actions):
+        if not n % RANK_CHUNK and cancelled():
+            return None
+        if not i or not i[0]:
+            continue
+
+        item = i[0].lower()
+        if item == temp:
+            exact.append(i)
+        elif item.startswith(temp):
+            starts.append(i)
+        elif temp in item:
+            includes.append(i)
+    return exact + starts + includes
+
 
 # TODO: enlarge current item, add shortcuts, secondary text
 class Palette(Toplevel):
@@ -28,6 +59,10 @@ class Palette(Toplevel):
     When no prefix is detected, palette turns file search mode on.
     Help is displayed when the user types '?' in the search bar.
 
+    Only a window of the matching actions is shown, in a fixed set of rows that are
+    reused as the search term changes or the list is scrolled. Large action sets are
+    ranked on a worker thread, rankings for an outdated search term are dropped.
+
     Palette can also be used to take input from the user, e.g: GitHub clone URL, go-to line number.
     """
 
@@ -79,11 +114,14 @@ class Palette(Toplevel):
 
         self.row = 1
         self.selected = 0
+        # index of the action shown in the first row
+        self.offset = 0
 
-        self.shown_items = []
         self.actionsets = []
         self.active_set = None
-        self.active_items = None
+        self.active_items = []
+        # bumped for every search term, older rankings are dropped
+        self._generation = 0
 
         self.searchbar = SearchBar(self)
         self.searchbar.grid(row=0, sticky=tk.EW, padx=5, pady=(5, 2))
@@ -92,20 +130,16 @@ class Palette(Toplevel):
         self.items_container = Frame(self, **theme.palette)
         self.items_container.grid(row=1, sticky=tk.NSEW, padx=2, pady=2)
         self.items_container.grid_columnconfigure(0, weight=1)
-        self.items_container.grid_rowconfigure(0, weight=1)
-
-        self.canvas = Canvas(self.items_container, **theme.palette, highlightthickness=0)
-        self.canvas.grid(row=0, column=0, sticky=tk.NSEW)
-
-        self.scrollbar = Scrollbar(self.items_container, orient=tk.VERTICAL, command=self.canvas.yview, style="EditorScrollbar")
-        self.scrollbar.grid(row=0, column=1, sticky=tk.NS)
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
 
-        self.items_frame = Frame(self.canvas, **theme.palette)
-        self.items_window = self.canvas.create_window((0, 0), window=self.items_frame, anchor=tk.NW)
+        self.scrollbar = Scrollbar(self.items_container, orient=tk.VERTICAL, command=self.yview, style="EditorScrollbar")
+        self.scrollbar.grid(row=0, column=1, rowspan=VISIBLE_ROWS, sticky=tk.NS)
 
-        self.items_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.bind("<Configure>", lambda e: self.canvas.itemconfig(self.items_window, width=e.width))
+        self.rows: list[PaletteItem] = []
+        for row in range(VISIBLE_ROWS):
+            item = PaletteItem(self.items_container, self, "", lambda _: ...)
+            item.grid(row=row, column=0, sticky=tk.EW)
+            item.grid_remove()
+            self.rows.append(item)
 
         self.configure_bindings()
 
@@ -140,13 +174,6 @@ class Palette(Toplevel):
         # print([i() for i in self.actionsets])
         self.register_actionset(lambda: self.help_actionset)
 
-    def add_item(self, text: str, command, *args, **kwargs) -> PaletteItem:
-        """Adds an item to the palette"""
-        new_item = PaletteItem(self.items_frame, self, text, command, *args, **kwargs)
-        new_item.pack(fill=tk.X)
-        self.shown_items.append(new_item)
-        return new_item
-
     def configure_bindings(self) -> None:
         self.bind("<FocusOut>", self.hide)
         self.bind("<Escape>", self.hide)
@@ -157,10 +184,49 @@ class Palette(Toplevel):
     def on_mousewheel(self, event) -> str:
         if not self.active_items:
             return "break"
-        
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+
+        self.scroll_to(self.offset - int(event.delta / 120))
         return "break"
 
+    def yview(self, *args) -> None:
+        """Scrolls the shown actions, command of the scrollbar"""
+
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * len(self.active_items)))
+        elif args[0] == "scroll":
+            amount = int(args[1]) * (VISIBLE_ROWS if args[2] == "pages" else 1)
+            self.scroll_to(self.offset + amount)
+
+    def scroll_to(self, offset: int) -> None:
+        """Shows the actions from the given index in the rows"""
+
+        self.offset = max(0, min(offset, len(self.active_items) - VISIBLE_ROWS))
+        self.render()
+
+    def render(self) -> None:
+        """Shows the actions of the scroll window in the rows"""
+
+        term = self.searchbar.term
+        for n, row in enumerate(self.rows):
+            index = self.offset + n
+            if index >= len(self.active_items):
+                row.grid_remove()
+                continue
+
+            row.set_data(*self.active_items[index])
+            row.mark_term(term)
+            if index == self.selected:
+                row.select()
+            else:
+                row.deselect()
+            row.grid()
+
+        total = len(self.active_items)
+        if total > VISIBLE_ROWS:
+            self.scrollbar.set(self.offset / total, (self.offset + VISIBLE_ROWS) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
     def pick_actionset(self, actionset: ActionSet) -> None:
         """Picks an actionset to display in the palette
 
@@ -183,8 +249,8 @@ class Palette(Toplevel):
         If an item is selected, the command is executed with the search term as an argument.
         """
 
-        if item := self.shown_items[self.selected]:
-            picked_command = item.command
+        if self.selected < len(self.active_items):
+            picked_command = self.active_items[self.selected][1]
             term = self.searchbar.term
 
             self.hide()
@@ -203,10 +269,10 @@ class Palette(Toplevel):
 
     def hide_all_items(self) -> None:
         """Hides all items in the palette"""
-        for i in self.shown_items:
-            i.destroy()
-        self.shown_items = []
-        self.canvas.yview_moveto(0)
+
+        self.active_items = []
+        self.offset = 0
+        self.render()
 
     def reset_selection(self) -> None:
         """Resets the selected item to the first item in the palette"""
@@ -215,46 +281,16 @@ class Palette(Toplevel):
         self.refresh_selected()
 
     def refresh_selected(self) -> None:
-        """Refreshes the selected item"""
+        """Refreshes the selected item, scrolling to it if it's not shown"""
 
-        if not self.shown_items:
-            return
- 
-        for i in self.shown_items:
-            i.deselect()
- 
-        try:
-            item = self.shown_items[self.selected]
-            item.select()
-            
-            # Ensure visible
-            self.after(10, self.ensure_visible, item)
-        except IndexError as e:
-            self.base.logger.error(f"Item '{self.selected}' doesnt exist: {e}")
-            
-    def ensure_visible(self, item):
-        """Scroll canvas to ensure item is visible."""
-        if not item.winfo_exists():
+        if not self.active_items:
             return
 
-        try:
-            self.update_idletasks()
-            item_y = item.winfo_y()
-            item_h = item.winfo_height()
-            
-            cw_h = self.canvas.winfo_height()
-            cv_y = self.canvas.yview()[0] * self.items_frame.winfo_height()
-            
-            total_h = self.items_frame.winfo_reqheight()
-            if total_h == 0:
-                return
-
-            if item_y < cv_y:
-                self.canvas.yview_moveto(item_y / total_h)
-            elif item_y + item_h > cv_y + cw_h:
-                self.canvas.yview_moveto((item_y + item_h - cw_h) / total_h)
-        except tk.TclError:
-            pass
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + VISIBLE_ROWS:
+            self.offset = self.selected - VISIBLE_ROWS + 1
+        self.render()
 
     def reset(self) -> None:
         """Resets the palette
@@ -273,29 +309,62 @@ class Palette(Toplevel):
     def show_no_results(self) -> None:
         """Shows a 'No results found' message in the palette"""
 
-        self.hide_all_items()
         self.reset_selection()
-        self.add_item("No results found", lambda _: ...)
+        self.show_items([("No results found", lambda _: ...)])
 
     def select(self, delta: int) -> None:
         """Selects an item in the palette"""
-        if not self.shown_items:
+        if not self.active_items:
             return "break"
-        
+
         self.selected += delta
-        self.selected = min(max(0, self.selected), len(self.shown_items) - 1)
+        self.selected = min(max(0, self.selected), len(self.active_items) - 1)
         self.refresh_selected()
 
-    def show_items(self, items: list[PaletteItem]) -> None:
-        """Shows a list of items in the palette"""
-        self.hide_all_items()
+    def show_items(self, items: list) -> None:
+        """Shows a list of actions in the palette, from the top"""
+
         self.active_items = items
- 
-        for i in self.active_items:
-            item = self.add_item(*i)
-            item.mark_term(self.searchbar.term)
+        self.offset = 0
+        self.selected = min(self.selected, max(len(items) - 1, 0))
+        self.refresh_selected()
+
+    def update_results(self) -> None:
+        """Shows the actions of the active actionset matching the search term
+
+        Actions of ranked actionsets are shown as they are. Large actionsets are
+        ranked on a worker, a newer search term cancels the ranking."""
+
+        self._generation += 1
+        actionset = self.active_set
+        term = self.searchbar.term
+        pinned = actionset.get_pinned(term)
+        actions = list(actionset)
 
-        # self.reset_selection()
+        if actionset.ranked:
+            self.show_results(self._generation, pinned + actions)
+        elif len(actions) <= RANK_CHUNK:
+            self.show_results(self._generation, pinned + rank_actions(actions, term))
+        else:
+            threading.Thread(
+                target=self._rank,
+                args=(self._generation, actions, term, pinned),
+                daemon=True,
+            ).start()
+
+    def _rank(self, generation: int, actions: list, term: str, pinned: list) -> None:
+        ranked = rank_actions(actions, term, lambda: generation != self._generation)
+        if ranked is not None:
+            self.base.after(0, self.show_results, generation, pinned + ranked)
+
+    def show_results(self, generation: int, items: list) -> None:
+        if generation != self._generation:
+            return
+
+        if any(items):
+            self.show_items(items)
+        else:
+            self.show_no_results()
 
     def show(self, prefix: str = None, default: str = None) -> None:
         """Shows the palette
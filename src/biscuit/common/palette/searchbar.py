@@ -2,7 +2,6 @@ from __future__ import annotations
 
 import tkinter as tk
 import typing
-from itertools import chain
 
 from ..ui import Frame
 
@@ -106,22 +105,4 @@ class SearchBar(Frame):
         if not prefix_found:
             self.master.pick_file_search(term)
 
-        exact, starts, includes = [], [], []
-        temp = term.lower()
-        for i in self.master.active_set:
-            if not i or not i[0]:
-                continue
-
-            item = i[0].lower()
-            if item == temp:
-                exact.append(i)
-            elif item.startswith(temp):
-                starts.append(i)
-            elif temp in item:
-                includes.append(i)
-
-        new = list(chain(actionset.get_pinned(term), exact, starts, includes))
-        if any(new):
-            self.master.show_items(new)
-        else:
-            self.master.show_no_results()
+        self.master.update_results()
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import threading
+import typing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .gitignore import IgnoreMatcher, IgnoreRule, walk_files
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable
+
+# a match: line number, text of the line, matched text
+Match = typing.Tuple[int, str, str]
+
+# files handed to a worker process at once
+CHUNK_SIZE = 64
+# chunks queued per worker, the walk waits for them beyond that
+CHUNKS_IN_FLIGHT = 2
+# bytes checked for a NUL byte to tell binary files apart
+BINARY_CHECK_SIZE = 8192
+# searched files waiting to be taken, the search pauses when this many are
+RESULTS_QUEUE_SIZE = 64
+
+
+class SearchQuery:
+    """What to search for, as typed in the search box"""
+
+    def __init__(
+        self,
+        pattern: str,
+        case_sensitive: bool = False,
+        whole_word: bool = False,
+        regex: bool = False,
+    ) -> None:
+        self.pattern = pattern
+        self.case_sensitive = case_sensitive
+        self.whole_word = whole_word
+        self.regex = regex
+
+    def compile(self) -> re.Pattern:
+        """Regex matching the query, raises re.error for an invalid pattern"""
+
+        pattern = self.pattern if self.regex else re.escape(self.pattern)
+        if self.whole_word:
+            pattern = rf"\b(?:{pattern})\b"
+        return re.compile(pattern, 0 if self.case_sensitive else re.IGNORECASE)
+
+    def rg_command(
+        self, paths: list[str], ignore: Iterable[str] = (), globs: Iterable[str] = ()
+    ) -> list[str]:
+        """Ripgrep command line searching the paths for the query"""
+
+        command = ["rg", "--json", "--line-number", "--hidden"]
+        command.append("-s" if self.case_sensitive else "-i")
+        if self.whole_word:
+            command.append("-w")
+        if not self.regex:
+            command.append("-F")
+        for name in (".git", *ignore):
+            command.extend(["-g", f"!{name}"])
+        for glob in globs:
+            command.extend(["-g", glob])
+        command.extend(["-e", self.pattern, *paths])
+        return command
+
+
+def search_file(path: str, regex: re.Pattern) -> list[Match]:
+    """Matching lines of a file, nothing for binary or unreadable files"""
+
+    try:
+        with open(path, "rb") as f:
+            data = f.read(BINARY_CHECK_SIZE)
+            if b"\0" in data:
+                return []
+            data += f.read()
+    except OSError:
+        return []
+
+    text = data.decode("utf-8", errors="replace")
+    matches = []
+    line_no, counted, last_line = 1, 0, -1
+    for m in regex.finditer(text):
+        start = m.start()
+        line_no += text.count("\n", counted, start)
+        counted = start
+        if line_no == last_line:
+            continue
+        last_line = line_no
+
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        line = text[line_start : None if line_end == -1 else line_end]
+        matches.append((line_no, line.strip(), m.group()))
+    return matches
+
+
+def search_files(paths: list[str], query: SearchQuery) -> list[tuple[str, list[Match]]]:
+    """Search a chunk of files, run in the worker processes"""
+
+    regex = query.compile()
+    results = []
+    for path in paths:
+        matches = search_file(path, regex)
+        if matches:
+            results.append((path, matches))
+    return results
+
+
+def parse_rg_message(line: str | bytes) -> tuple[str, Match] | None:
+    """Path and match of a `match` message of `rg --json`, None for others"""
+
+    # rg writes the type first, skip the other messages without decoding them
+    if isinstance(line, bytes):
+        if not line.startswith(b'{"type":"match"'):
+            return None
+    elif not line.startswith('{"type":"match"'):
+        return None
+
+    try:
+        message = json.loads(line)
+    except ValueError:
+        return None
+    if message.get("type") != "match":
+        return None
+
+    data = message["data"]
+    path = data["path"].get("text")
+    text = data["lines"].get("text")
+    if path is None or text is None:
+        # not valid utf-8, rg sends these base64 encoded
+        return None
+    submatches = data.get("submatches") or [{}]
+    matched = submatches[0].get("match", {}).get("text", "")
+    return path, (data["line_number"], text.strip(), matched)
+
+
+class SearchEngine:
+    """Searches the files of a folder on worker threads and processes
+
+    Uses ripgrep when it is installed, otherwise the files are walked here
+    (skipping .gitignore'd files and `ignore` names) and searched in chunks
+    by a process pool. The matches of every file are put on `results` as
+    `(path, matches)` as soon as the file was searched, `done` is set when
+    the search finished or was cancelled. The search pauses while
+    `RESULTS_QUEUE_SIZE` files are waiting to be taken.
+
+    Args:
+        root (str): The folder to search
+        query (SearchQuery): What to search for
+        ignore (Iterable[str]): File and folder names to skip anywhere
+        globs (Iterable[str]): Ripgrep globs, files must match one of them
+            if any are given, those starting with ! exclude what they match
+        paths (list[str]): Files to search instead of the files of root
+        backend (str): "ripgrep" or "python", ripgrep when it is installed
+            if not given"""
+
+    def __init__(
+        self,
+        root: str,
+        query: SearchQuery,
+        ignore: Iterable[str] = (),
+        globs: Iterable[str] = (),
+        paths: list[str] | None = None,
+        backend: str | None = None,
+    ) -> None:
+        self.root = os.path.abspath(root)
+        self.query = query
+        self.ignore = tuple(ignore)
+        self.ignore_set = set(self.ignore)
+        self.globs = tuple(globs)
+        self.paths = paths
+        self._includes = [IgnoreRule(g) for g in self.globs if not g.startswith("!")]
+        self._excludes = [IgnoreRule(g[1:]) for g in self.globs if g.startswith("!")]
+
+        self.results: queue.Queue[tuple[str, list[Match]]] = queue.Queue(
+            RESULTS_QUEUE_SIZE
+        )
+        self.done = threading.Event()
+        self.cancelled = False
+        self.error: str | None = None
+        self.backend = backend or ("ripgrep" if shutil.which("rg") else "python")
+
+        self._process: subprocess.Popen | None = None
+        self._pool: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        try:
+            # fail early on invalid patterns, in both backends
+            self.query.compile()
+        except re.error as e:
+            self.error = f"Invalid pattern: {e}"
+            self.done.set()
+            return
+
+        target = self._run_rg if self.backend == "ripgrep" else self._run_python
+        threading.Thread(target=self._run, args=(target,), daemon=True).start()
+
+    def cancel(self) -> None:
+        """Stop the search, results already queued are kept"""
+
+        self.cancelled = True
+        if self._process and self._process.poll() is None:
+            self._process.kill()
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _put(self, result: tuple[str, list[Match]]) -> None:
+        """Queue the matches of a file, waiting while the queue is full"""
+
+        while not self.cancelled:
+            try:
+                self.results.put(result, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def _included(self, relpath: str) -> bool:
+        """Check a file path relative to root against the globs"""
+
+        parts = relpath.split("/")
+        for depth in range(1, len(parts) + 1):
+            path = "/".join(parts[:depth])
+            if any(rule.match(path, depth < len(parts)) for rule in self._excludes):
+                return False
+        return not self._includes or any(
+            rule.match(relpath, False) for rule in self._includes
+        )
+
+    def _listed(self, path: str) -> bool:
+        """Check a given path against the ignored names and the globs"""
+
+        relpath = os.path.relpath(path, self.root).replace(os.sep, "/")
+        if self.ignore and not self.ignore_set.isdisjoint(relpath.split("/")):
+            return False
+        return not self.globs or self._included(relpath)
+
+    def files(self) -> Iterable[str]:
+        """Files searched by the python backend"""
+
+        if self.paths is not None:
+            return (path for path in self.paths if self._listed(path))
+
+        matcher = IgnoreMatcher(self.root, always=(".git", *self.ignore))
+        files = walk_files(self.root, matcher, lambda: self.cancelled)
+        if not self.globs:
+            return files
+        return (
+            path
+            for path in files
+            if self._included(os.path.relpath(path, self.root).replace(os.sep, "/"))
+        )
+
+    def _run(self, target: typing.Callable[[], None]) -> None:
+        try:
+            target()
+        except Exception as e:
+            if not self.cancelled:
+                self.error = str(e)
+        finally:
+            self.done.set()
+
+    def _run_rg(self) -> None:
+        self._process = subprocess.Popen(
+            self.query.rg_command(
+                self.paths if self.paths is not None else [self.root],
+                self.ignore,
+                self.globs,
+            ),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0,
+        )
+        if self.cancelled:
+            self._process.kill()
+
+        # rg prints the matches of a file together, hand them over per file
+        path, matches = None, []
+        for line in self._process.stdout:
+            parsed = parse_rg_message(line)
+            if not parsed:
+                continue
+            if parsed[0] != path:
+                if matches:
+                    self._put((path, matches))
+                path, matches = parsed[0], []
+            matches.append(parsed[1])
+        if matches:
+            self._put((path, matches))
+        self._process.wait()
+
+    def _run_python(self) -> None:
+        # a few files, as narrowed down by the search index, are quicker to
+        # search right here than to hand over to the pool
+        if self.paths is not None and len(self.paths) <= CHUNK_SIZE:
+            for result in search_files(list(self.files()), self.query):
+                self._put(result)
+            return
+
+        workers = max(1, min(4, (os.cpu_count() or 2) - 1))
+        self._pool = pool = ProcessPoolExecutor(max_workers=workers)
+
+        pending = set()
+        chunk = []
+
+        def collect(block: bool) -> None:
+            nonlocal pending
+            finished, pending = wait(
+                pending, timeout=None if block else 0, return_when=FIRST_COMPLETED
+            )
+            for future in finished:
+                if not future.cancelled():
+                    for result in future.result():
+                        self._put(result)
+
+        try:
+            for path in self.files():
+                if self.cancelled:
+                    break
+                chunk.append(path)
+                # first chunks small so the first results show up right away
+                if len(chunk) >= (CHUNK_SIZE if pending else CHUNK_SIZE // 8):
+                    pending.add(pool.submit(search_files, chunk, self.query))
+                    chunk = []
+                    collect(len(pending) >= workers * CHUNKS_IN_FLIGHT)
+            if chunk and not self.cancelled:
+                pending.add(pool.submit(search_files, chunk, self.query))
+            while pending and not self.cancelled:
+                collect(True)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import typing
+from array import array
+from bisect import bisect_left
+
+from .gitignore import IgnoreMatcher, walk_files
+from .search import BINARY_CHECK_SIZE
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_parse
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable
+
+    from biscuit import App
+
+    from .search import SearchQuery
+
+# index file, in the workspace's .biscuit directory
+INDEX_FILE = "search-index.bin"
+MAGIC = b"BSIX"
+VERSION = 1
+# magic, version, files, trigrams, postings
+HEADER = struct.Struct("<4sIIII")
+# mtime, size, offset and length of the path, flags
+FILE_ENTRY = struct.Struct("<dQIII")
+# trigram, offset and count of its postings
+TRIGRAM_ENTRY = struct.Struct("<3sxII")
+
+# file flag: content not indexed (too large), always a candidate
+UNINDEXED = 1
+# files larger than this (bytes) are not indexed but always searched
+MAX_INDEXED_SIZE = 8 * 1024 * 1024
+# changed files searched besides the index before it is rebuilt
+REBUILD_THRESHOLD = 1000
+# queries matching more files than this do not use the index
+CANDIDATE_LIMIT = 20000
+# names never indexed
+ALWAYS_IGNORED = (".git", ".biscuit")
+
+
+def trigrams(data: bytes) -> set[bytes]:
+    """Trigrams of some content, ascii letters lowercased"""
+
+    data = data.lower()
+    return {data[i : i + 3] for i in range(len(data) - 2)}
+
+
+def _literal_runs(pattern: str, flags: int) -> tuple[list[str], bool]:
+    """Strings every match of a regex contains, and whether it ignores case"""
+
+    parsed = sre_parse.parse(pattern, flags)
+    runs, run = [], []
+    for op, av in parsed:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        # anything else may match different text, the run ends here
+        if run:
+            runs.append("".join(run))
+            run = []
+    if run:
+        runs.append("".join(run))
+    return runs, bool(parsed.state.flags & sre_parse.SRE_FLAG_IGNORECASE)
+
+
+def query_trigrams(query: SearchQuery) -> set[bytes] | None:
+    """Trigrams every file matching the query contains, None if there are
+    none to narrow the search with"""
+
+    if query.regex:
+        try:
+            runs, ignore_case = _literal_runs(
+                query.pattern, 0 if query.case_sensitive else sre_parse.SRE_FLAG_IGNORECASE
+            )
+        except Exception:
+            return None
+    else:
+        runs, ignore_case = [query.pattern], not query.case_sensitive
+
+    result = set()
+    for run in runs:
+        for trigram in trigrams(run.encode("utf-8")):
+            # other cases of non-ascii letters are different bytes
+            if ignore_case and max(trigram) > 0x7F:
+                continue
+            result.add(trigram)
+    return result or None
+
+
+def build_index(root: str, path: str) -> None:
+    """Index the files of root to path, run in a background process"""
+
+    matcher = IgnoreMatcher(root, always=ALWAYS_IGNORED)
+    files = []
+    postings: dict[bytes, array] = {}
+    for file_id, file in enumerate(walk_files(root, matcher)):
+        try:
+            stat = os.stat(file)
+            flags = 0
+            with open(file, "rb") as f:
+                data = f.read(BINARY_CHECK_SIZE)
+                # binary files are not searched, nothing to index
+                if b"\0" in data:
+                    data = b""
+                elif stat.st_size > MAX_INDEXED_SIZE:
+                    flags, data = UNINDEXED, b""
+                else:
+                    data += f.read()
+            for trigram in trigrams(data):
+                if trigram not in postings:
+                    postings[trigram] = array("I")
+                postings[trigram].append(file_id)
+        except OSError:
+            stat, flags = None, UNINDEXED
+        files.append((file, stat.st_mtime if stat else 0, stat.st_size if stat else 0, flags))
+
+    write_index(path, files, postings)
+
+
+def write_index(
+    path: str, files: list[tuple[str, float, int, int]], postings: dict[bytes, array]
+) -> None:
+    paths = bytearray()
+    entries = bytearray()
+    for file, mtime, size, flags in files:
+        encoded = os.fsencode(file)
+        entries += FILE_ENTRY.pack(mtime, size, len(paths), len(encoded), flags)
+        paths += encoded
+
+    table = bytearray()
+    offset = 0
+    keys = sorted(postings)
+    for trigram in keys:
+        table += TRIGRAM_ENTRY.pack(trigram, offset, len(postings[trigram]))
+        offset += len(postings[trigram])
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(files), len(keys), offset))
+        f.write(entries)
+        f.write(table)
+        for trigram in keys:
+            if sys.byteorder == "big":
+                postings[trigram].byteswap()
+            postings[trigram].tofile(f)
+        f.write(paths)
+
+
+class IndexFile:
+    """Memory mapped trigram index
+
+    Layout: header, a fixed size entry per file and per trigram (sorted),
+    the postings (file numbers, little endian u32) of every trigram one
+    after the other, then the paths of the files."""
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.file_count, self.trigram_count, postings = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("Unsupported search index")
+
+        self._files = HEADER.size
+        self._trigrams = self._files + FILE_ENTRY.size * self.file_count
+        self._postings = self._trigrams + TRIGRAM_ENTRY.size * self.trigram_count
+        self._paths = self._postings + 4 * postings
+        self._keys = _Keys(self)
+        self._unindexed = [i for i in range(self.file_count) if self.file(i)[3] & UNINDEXED]
+
+    def close(self) -> None:
+        self.mm.close()
+
+    def file(self, file_id: int) -> tuple[str, float, int, int]:
+        """Path, mtime, size and flags of a file"""
+
+        mtime, size, offset, length, flags = FILE_ENTRY.unpack_from(
+            self.mm, self._files + FILE_ENTRY.size * file_id
+        )
+        start = self._paths + offset
+        return os.fsdecode(self.mm[start : start + length]), mtime, size, flags
+
+    def files(self) -> Iterable[tuple[str, float, int, int]]:
+        return (self.file(i) for i in range(self.file_count))
+
+    def postings(self, trigram: bytes) -> array:
+        """Numbers of the files containing a trigram"""
+
+        result = array("I")
+        i = bisect_left(self._keys, trigram)
+        if i == self.trigram_count or self._keys[i] != trigram:
+            return result
+
+        _, offset, count = TRIGRAM_ENTRY.unpack_from(
+            self.mm, self._trigrams + TRIGRAM_ENTRY.size * i
+        )
+        start = self._postings + 4 * offset
+        result.frombytes(self.mm[start : start + 4 * count])
+        if sys.byteorder == "big":
+            result.byteswap()
+        return result
+
+    def candidates(self, trigrams: Iterable[bytes]) -> set[int]:
+        """Numbers of the files containing every trigram, and of those that
+        were not indexed"""
+
+        postings = sorted((self.postings(t) for t in trigrams), key=len)
+        result = set(postings[0]) if postings else set(range(self.file_count))
+        for other in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(other)
+
+        result.update(self._unindexed)
+        return result
+
+
+class _Keys:
+    """The sorted trigrams of an index file, as a sequence for bisect"""
+
+    def __init__(self, index: IndexFile) -> None:
+        self.index = index
+
+    def __len__(self) -> int:
+        return self.index.trigram_count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = self.index._trigrams + TRIGRAM_ENTRY.size * i
+        return self.index.mm[start : start + 3]
+
+
+class SearchIndex:
+    """Trigram index of the active workspace, used to narrow down searches
+
+    Enabled with the `workspace_search_index` setting. The index is stored in
+    the workspace's .biscuit directory and built in a background process when
+    it is missing. When a folder is opened, the files that changed since the
+    index was built are found by comparing their mtime and size; these and
+    the files the explorer's watcher reports afterwards are searched on top
+    of the candidates from the index. Once there are too many, the index is
+    rebuilt in the background.
+
+    Searches only use the index after it was checked, before that (and for
+    queries without three literal characters) they scan the whole folder."""
+
+    def __init__(self, base: App) -> None:
+        self.base = base
+
+        self.root: str | None = None
+        self.index: IndexFile | None = None
+        self.matcher: IgnoreMatcher | None = None
+        # files changed since the index was built
+        self.dirty: set[str] = set()
+        self.ready = False
+        self.building = False
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._builder: multiprocessing.Process | None = None
+
+        self.base.bind("<<DirectoryChanged>>", self.open, add=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base.config.workspace_search_index)
+
+    def index_path(self, root: str) -> str:
+        return os.path.join(root, ".biscuit", INDEX_FILE)
+
+    def open(self, *_) -> None:
+        """Use the index of the active directory, building it if needed"""
+
+        self.close()
+        if not (self.enabled and self.base.active_directory):
+            return
+
+        self.root = os.path.abspath(self.base.active_directory)
+        self.matcher = IgnoreMatcher(self.root, always=ALWAYS_IGNORED)
+        threading.Thread(
+            target=self._prepare, args=(self.root, self._generation), daemon=True
+        ).start()
+
+    def close(self) -> None:
+        self._generation += 1
+        self.ready = self.building = False
+        self.root = self.matcher = None
+        with self._lock:
+            self.dirty.clear()
+        if self._builder and self._builder.is_alive():
+            self._builder.terminate()
+        self._builder = None
+        if self.index:
+            self.index.close()
+            self.index = None
+
+    def changed(self, path: str, is_dir: bool = False) -> None:
+        """Record a created, modified or deleted path, called from the watcher"""
+
+        matcher = self.matcher
+        if not matcher or matcher.excluded(path, is_dir):
+            return
+
+        with self._lock:
+            if is_dir and os.path.isdir(path):
+                for directory, _, files in os.walk(path):
+                    self.dirty.update(os.path.join(directory, f) for f in files)
+                    if len(self.dirty) > REBUILD_THRESHOLD:
+                        break
+            elif not is_dir:
+                self.dirty.add(os.path.abspath(path))
+            rebuild = self.ready and len(self.dirty) > REBUILD_THRESHOLD
+
+        if rebuild:
+            self.base.after(0, self.rebuild)
+
+    def candidates(self, query: SearchQuery) -> list[str] | None:
+        """Files that can contain matches of the query, None when the index
+        cannot narrow the search down"""
+
+        if not (self.ready and self.index):
+            return None
+        trigrams = query_trigrams(query)
+        if not trigrams:
+            return None
+
+        ids = self.index.candidates(trigrams)
+        with self._lock:
+            dirty = set(self.dirty)
+        if len(ids) + len(dirty) > CANDIDATE_LIMIT:
+            return None
+
+        paths = {self.index.file(i)[0] for i in ids}
+        paths = (paths - dirty) | {p for p in dirty if not self.matcher.excluded(p)}
+        return sorted(p for p in paths if os.path.isfile(p))
+
+    def rebuild(self) -> None:
+        """Build the index again in the background, the current one stays in
+        use until the new one is ready"""
+
+        if not self.root or self.building:
+            return
+        self.building = True
+        threading.Thread(
+            target=self._build, args=(self.root, self._generation), daemon=True
+        ).start()
+
+    def _prepare(self, root: str, generation: int) -> None:
+        """Open the index and find what changed since it was built, or build it"""
+
+        try:
+            index = IndexFile(self.index_path(root))
+        except (OSError, ValueError):
+            self.base.after(0, self.rebuild)
+            return
+
+        dirty = set()
+        indexed = set()
+        for file, mtime, size, _ in index.files():
+            indexed.add(file)
+            try:
+                stat = os.stat(file)
+            except OSError:
+                continue
+            if stat.st_mtime != mtime or stat.st_size != size:
+                dirty.add(file)
+        matcher = IgnoreMatcher(root, always=ALWAYS_IGNORED)
+        dirty.update(f for f in walk_files(root, matcher) if f not in indexed)
+
+        self.base.after(0, self._opened, generation, index, dirty)
+        if len(dirty) > REBUILD_THRESHOLD:
+            self.base.after(0, self.rebuild)
+
+    def _build(self, root: str, generation: int) -> None:
+        path = self.index_path(root)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        except OSError as e:
+            self.base.logger.error(f"Search index: {e}")
+            self.base.after(0, self._build_failed, generation)
+            return
+
+        # changes from now on may not be in the new index
+        with self._lock:
+            before = set(self.dirty)
+
+        builder = multiprocessing.Process(
+            target=build_index, args=(root, path + ".tmp"), daemon=True
+        )
+        self._builder = builder
+        builder.start()
+        builder.join()
+        if builder.exitcode != 0:
+            self.base.after(0, self._build_failed, generation)
+            return
+        self.base.after(0, self._built, generation, path, before)
+
+    def _build_failed(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._builder = None
+        self.building = False
+        self.base.logger.error("Search index: building the index failed")
+
+    def _opened(self, generation: int, index: IndexFile, dirty: set[str]) -> None:
+        if generation != self._generation:
+            return index.close()
+
+        self.index = index
+        with self._lock:
+            self.dirty |= dirty
+        self.ready = True
+
+    def _built(self, generation: int, path: str, before: set[str]) -> None:
+        if generation != self._generation:
+            return
+
+        self._builder = None
+        self.building = False
+        # the old index has to be closed before it can be replaced on windows
+        if self.index:
+            self.index.close()
+            self.index = None
+        try:
+            os.replace(path + ".tmp", path)
+            index = IndexFile(path)
+        except (OSError, ValueError) as e:
+            self.ready = False
+            self.base.logger.error(f"Search index: {e}")
+            return
+
+        with self._lock:
+            self.dirty -= before
+        self._opened(generation, index, set())
+        self.base.logger.info(f"Search index: indexed {index.file_count} files")
@@ -111,6 +111,9 @@ class Tree(Frame):
     def delete(self, *a, **kw) -> None:
         self.tree.delete(*a, *kw)
 
+    def exists(self, node) -> bool:
+        return self.tree.exists(node)
+
     def focus(self, *args) -> str:
         return self.tree.focus(*args) or ""
 
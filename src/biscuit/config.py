@@ -11,7 +11,7 @@ from biscuit.layout.statusbar.statusbar import Statusbar
 from .api import ExtensionsAPI
 from .binder import Binder
 from .commands import Commands
-from .common import GameManager, SysInfo
+from .common import GameManager, SearchIndex, SysInfo
 from .debugger import DebuggerManager
 from .execution import ExecutionManager
 from .extensions import ExtensionManager
@@ -98,6 +98,7 @@ class ConfigManager:
         self.git = Git(self)
         self.game_manager = GameManager(self)
         self.language_server_manager = LanguageServerManager(self)
+        self.search_index = SearchIndex(self)
         self.execution_manager = ExecutionManager(self)
         self.debugger_manager = DebuggerManager(self)
 
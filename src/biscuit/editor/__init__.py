@@ -9,6 +9,7 @@ from .findreplace import FindReplace
 from .hover import Hover
 from .html import HTMLEditor
 from .image import ImageViewer
+from .largefile import LargeFileViewer
 from .markdown import MDEditor
 from .misc import Welcome
 from .search import SearchEditor
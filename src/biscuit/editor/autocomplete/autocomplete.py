@@ -1,9 +1,7 @@
 from __future__ import annotations
 
-import re
 import tkinter as tk
 import typing
-from itertools import chain
 
 if typing.TYPE_CHECKING:
     from biscuit.editor.text import Text
@@ -12,13 +10,16 @@ if typing.TYPE_CHECKING:
 from biscuit.common.ui import Toplevel
 
 from .item import CompletionItem
+from .words import WordIndex
 
 
 class AutoComplete(Toplevel):
     """Floating window for autocomplete suggestions.
 
     In lsp mode, it receives completions from the language server.
-    In regular mode, it generates completions from the current tab's words.
+    In regular mode, it generates completions from the words of the open tabs of
+    the current tab's language, ranked by how often they appear and how close
+    they are to the cursor.
 
     NOTE: As of now, the window is limited to 10 items, not scrollable."""
 
@@ -42,6 +43,9 @@ class AutoComplete(Toplevel):
         ]
         self.active_items: list[CompletionItem] = []
 
+        # words of the open tabs, shared by the tabs of a language
+        self.word_index = WordIndex()
+
         self.row = 1
 
     def refresh_geometry(self, tab: Text) -> None:
@@ -178,8 +182,8 @@ class AutoComplete(Toplevel):
             self.hide()
 
     def update_completions(self, tab: Text):
-        """Update the completions with words generated from the current tab.
-        The words are filtered and prioritized based on exact match, starts with, and includes.
+        """Update the completions with the words of the tabs of the current tab's language.
+        Words starting with the current word are ranked by frequency and proximity to the cursor.
 
         Args:
             tab (Text): The current tab."""
@@ -193,15 +197,11 @@ class AutoComplete(Toplevel):
             self.hide()
             return
 
-        exact, starts, includes = [], [], []
-        for word in tab.words:
-            if word == term:
-                exact.append(word)
-            elif word.startswith(term):
-                starts.append(word)
-            elif term in word:
-                includes.append(word)
-        new = list(chain(exact, starts, includes))
+        new = []
+        tab.update_words_list()
+        if tab.words:
+            row = int(tab.index(tk.INSERT).split(".")[0]) - 1
+            new = tab.words.completions(term, row)
 
         if new:
             self.lsp_mode = False
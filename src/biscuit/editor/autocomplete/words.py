@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import heapq
+import re
+import typing
+from itertools import chain
+
+from sortedcontainers import SortedList
+
+if typing.TYPE_CHECKING:
+    from typing import Iterable, List
+
+    from biscuit.editor.text.document import Document
+
+WORD = re.compile(r"\w+")
+# shorter words are not worth completing
+MIN_WORD_LENGTH = 2
+# lines above and below the cursor whose words rank higher
+PROXIMITY_LINES = 100
+# bonus of a word on the cursor line, fading out to 0 at PROXIMITY_LINES away
+PROXIMITY_BONUS = 10
+
+
+def line_words(line: str) -> List[str]:
+    return [word for word in WORD.findall(line) if len(word) >= MIN_WORD_LENGTH]
+
+
+class LanguageWords:
+    """How often each word appears in the open documents of a language, with
+    the words sorted for prefix lookups"""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {}
+        self.sorted = SortedList()
+        self.documents = 0
+
+    def add(self, words: Iterable[str]) -> None:
+        counts = self.counts
+        for word in words:
+            count = counts.get(word, 0)
+            if not count:
+                self.sorted.add(word)
+            counts[word] = count + 1
+
+    def remove(self, words: Iterable[str]) -> None:
+        counts = self.counts
+        for word in words:
+            count = counts.get(word, 0)
+            if count > 1:
+                counts[word] = count - 1
+            elif count:
+                del counts[word]
+                self.sorted.remove(word)
+
+    def prefixed(self, prefix: str) -> Iterable[str]:
+        """Words starting with the prefix"""
+
+        return self.sorted.irange(prefix, prefix + chr(0x10FFFF))
+
+
+class DocumentWords:
+    """Words of each line of a document, kept in sync with its edits
+
+    The words are counted in the `LanguageWords` shared by the open documents
+    of the same language. Edits only rescan the lines they touched, untracked
+    edits mark the words stale and the document is rescanned when completions
+    are asked for.
+
+    Args:
+        index (WordIndex): The index the words are registered in
+        language (str): Language of the document
+        document (Document): The document"""
+
+    def __init__(self, index: WordIndex, language: str, document: Document) -> None:
+        self.index = index
+        self.language = language
+        self.document = document
+        self.shared = index.languages[language]
+        self.lines: List[List[str]] = []
+        self.stale = True
+
+    def rescan(self) -> None:
+        lines = [line_words(line) for line in self.document.lines()]
+        self.shared.remove(chain.from_iterable(self.lines))
+        self.shared.add(chain.from_iterable(lines))
+        self.lines = lines
+        self.stale = False
+
+    def update(self, edit: dict | None) -> None:
+        """Rescan the lines of an edit record, None for an untracked edit"""
+
+        if self.stale:
+            return
+        if edit is None:
+            self.stale = True
+            return
+
+        start = edit["start_point"][0]
+        old_end = edit["old_end_point"][0] + 1
+        new_end = edit["new_end_point"][0] + 1
+        new = [line_words(line) for line in self.document.lines(start, new_end)]
+        self.shared.remove(chain.from_iterable(self.lines[start:old_end]))
+        self.shared.add(chain.from_iterable(new))
+        self.lines[start:old_end] = new
+
+    def nearby(self, prefix: str, row: int) -> dict[str, int]:
+        """Distance in lines to the closest occurrence of the words starting
+        with the prefix around the row"""
+
+        distances = {}
+        for r in range(max(row - PROXIMITY_LINES, 0), min(row + PROXIMITY_LINES + 1, len(self.lines))):
+            distance = abs(r - row)
+            for word in self.lines[r]:
+                if word.startswith(prefix) and distance < distances.get(word, PROXIMITY_LINES + 1):
+                    distances[word] = distance
+        return distances
+
+    def completions(self, term: str, row: int, limit: int = 10) -> List[str]:
+        """Words starting with the term, ranked by how often they appear in the
+        documents of the language and how close they are to the row
+
+        Args:
+            term (str): The word being typed, at the row
+            row (int): Row of the cursor
+            limit (int, optional): Number of words returned"""
+
+        if self.stale:
+            self.rescan()
+
+        counts = self.shared.counts
+        nearby = self.nearby(term, row)
+
+        def rank(word: str) -> tuple[bool, float]:
+            score = counts[word]
+            if word in nearby:
+                score += PROXIMITY_BONUS * (1 - nearby[word] / (PROXIMITY_LINES + 1))
+            return word == term, score
+
+        # the term itself is only a completion if it's typed elsewhere too
+        words = (w for w in self.shared.prefixed(term) if w != term or counts[w] > 1)
+        return heapq.nlargest(limit, words, key=rank)
+
+    def close(self) -> None:
+        self.index.close(self)
+
+
+class WordIndex:
+    """Words of the open documents for completions without a language server,
+    counted together for the documents of each language"""
+
+    def __init__(self) -> None:
+        self.languages: dict[str, LanguageWords] = {}
+
+    def open(self, language: str, document: Document) -> DocumentWords:
+        """Start tracking the words of a document"""
+
+        if language not in self.languages:
+            self.languages[language] = LanguageWords()
+        self.languages[language].documents += 1
+        return DocumentWords(self, language, document)
+
+    def close(self, words: DocumentWords) -> None:
+        """Stop tracking the words of a document"""
+
+        shared = words.shared
+        shared.remove(chain.from_iterable(words.lines))
+        words.lines = []
+        words.stale = True
+        shared.documents -= 1
+        if not shared.documents and self.languages.get(words.language) is shared:
+            del self.languages[words.language]
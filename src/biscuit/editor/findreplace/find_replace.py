@@ -3,18 +3,120 @@ from __future__ import annotations
 import re
 import tkinter as tk
 import typing
+from bisect import bisect_left, bisect_right
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    # python < 3.11
+    import sre_parse
 
 from biscuit.common.icons import Icons
 from biscuit.common.ui import ButtonsEntry, Frame, IconButton, Toplevel
 
 if typing.TYPE_CHECKING:
-    from biscuit.common.ui import Text
+    from biscuit.editor.text import Text
 
 from .results import FindResults
 
+# lines above and below the visible ones that get their matches highlighted
+VIEW_MARGIN = 50
+# delay before finding again after an edit the matches can't follow (ms)
+RESCAN_DELAY = 100
+NEWLINE = ord("\n")
+# repeats and groups added in python 3.11
+POSSESSIVE_REPEAT = getattr(sre_parse, "POSSESSIVE_REPEAT", None)
+ATOMIC_GROUP = getattr(sre_parse, "ATOMIC_GROUP", None)
+# character classes that can match a newline
+NEWLINE_CATEGORIES = {
+    sre_parse.CATEGORY_SPACE,
+    sre_parse.CATEGORY_NOT_DIGIT,
+    sre_parse.CATEGORY_NOT_WORD,
+    sre_parse.CATEGORY_LINEBREAK,
+}
+# anchors that mean the same at the ends of a line as at the ends of the text,
+# ^ and $ too in multiline mode
+LINE_ANCHORS = {
+    sre_parse.AT_BEGINNING_LINE,
+    sre_parse.AT_END_LINE,
+    sre_parse.AT_BOUNDARY,
+    sre_parse.AT_NON_BOUNDARY,
+}
+
+
+def line_local(pattern: str) -> bool:
+    """Check that a pattern can't match across lines nor depends on the text
+    around the line, so the matches of a line can be found in the line alone.
+    Parts that are not known to be line local count as not."""
+
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return False
+
+    def local(items, flags: int) -> bool:
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                if av == NEWLINE:
+                    return False
+            elif op is sre_parse.NOT_LITERAL:
+                if av != NEWLINE:
+                    return False
+            elif op is sre_parse.IN:
+                for set_op, set_av in av:
+                    if set_op is sre_parse.LITERAL:
+                        if set_av == NEWLINE:
+                            return False
+                    elif set_op is sre_parse.RANGE:
+                        if set_av[0] <= NEWLINE <= set_av[1]:
+                            return False
+                    elif set_op is sre_parse.CATEGORY:
+                        if set_av in NEWLINE_CATEGORIES:
+                            return False
+                    else:
+                        # negated sets
+                        return False
+            elif op is sre_parse.ANY:
+                if flags & re.DOTALL:
+                    return False
+            elif op is sre_parse.AT:
+                if av not in LINE_ANCHORS and not (
+                    flags & re.MULTILINE and av in (sre_parse.AT_BEGINNING, sre_parse.AT_END)
+                ):
+                    return False
+            elif op is sre_parse.SUBPATTERN:
+                if not local(av[3], (flags | av[1]) & ~av[2]):
+                    return False
+            elif op is sre_parse.BRANCH:
+                if not all(local(branch, flags) for branch in av[1]):
+                    return False
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, POSSESSIVE_REPEAT):
+                if not local(av[2], flags):
+                    return False
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                if not local(av[1], flags):
+                    return False
+            elif op is ATOMIC_GROUP:
+                if not local(av, flags):
+                    return False
+            elif op is sre_parse.GROUPREF_EXISTS:
+                if not local(av[1], flags) or (av[2] is not None and not local(av[2], flags)):
+                    return False
+            elif op is not sre_parse.GROUPREF:
+                return False
+        return True
+
+    return local(parsed, parsed.state.flags)
+
 
 class FindReplace(Toplevel):
-    """Floating find and replace window"""
+    """Floating find and replace window
+
+    Matches are kept as sorted lists of their start and end (row, col)
+    points, so moving between them is a bisect and Tk gets plain `line.col`
+    indices. Only the matches around the visible lines are highlighted, more
+    are as the editor scrolls. Edits only find the matches of the lines they
+    touched again, unless the pattern can span lines."""
 
     def __init__(self, base, *args, **kwargs) -> None:
         super().__init__(base, *args, **kwargs)
@@ -27,7 +129,19 @@ class FindReplace(Toplevel):
         self.text = None
         self.matchstring = None
         self.replacestring = None
-        self.matches = None
+        self.re_ = None
+        # whether edits can find the matches of the lines they touched alone
+        self._line_local = False
+        # start and end points of the matches, sorted
+        self.starts: list[tuple[int, int]] = []
+        self.ends: list[tuple[int, int]] = []
+        # rows whose matches are highlighted
+        self._shown: tuple[int, int] | None = None
+        self._stale = False
+        self._replacing = False
+        self._rescan_job = None
+        self._view_job = None
+        self._bound: set[Text] = set()
         self.term = tk.StringVar()
 
         self.container = Frame(self, padx=5, pady=5, **self.base.theme.findreplace)
@@ -91,7 +205,7 @@ class FindReplace(Toplevel):
             pass
 
     def show(self, text: Text):
-        self.text = text
+        self.set_text(text)
         self.active = True
         self.update_idletasks()
 
@@ -109,130 +223,312 @@ class FindReplace(Toplevel):
 
     def hide(self, *_):
         self.active = False
-        self.text.tag_remove("found", "1.0", "end")
-        self.text.tag_remove("foundcurrent", "1.0", "end")
+        self.clear_highlights()
         self.withdraw()
 
+    def set_text(self, text: Text) -> None:
+        if text is not self.text:
+            self.matchstring = None
+        self.text = text
+        if text not in self._bound:
+            self._bound.add(text)
+            text.bind("<<Scroll>>", self._on_view, add=True)
+            text.bind("<Configure>", self._on_view, add=True)
+
     @property
-    def current(self):
-        if not self.text.count("1.0", self.text.index(tk.INSERT), "chars"):
-            return 0
-        return self.text.count("1.0", self.text.index(tk.INSERT), "chars")[0]
+    def current(self) -> tuple[int, int]:
+        """Point of the insert cursor"""
+        row, col = self.text.index(tk.INSERT).split(".")
+        return int(row) - 1, int(col)
 
-    def highlight_matches(self):
+    @staticmethod
+    def index(point: tuple[int, int]) -> str:
+        return f"{point[0] + 1}.{point[1]}"
+
+    def clear_highlights(self) -> None:
         self.text.tag_remove("found", "1.0", "end")
         self.text.tag_remove("foundcurrent", "1.0", "end")
+        self._shown = None
 
-        for pos, match in self.matches.items():
-            start = match.start()
-            end = match.end()
-            self.text.tag_add("found", f"1.0+{start}c", f"1.0+{end}c")
-
+    def highlight_matches(self):
+        """Highlight the matches around the visible lines, from scratch"""
+        self.clear_highlights()
+        self.extend_highlights()
         if self.is_on_match():
             self.highlight_current()
 
+    def visible_rows(self) -> tuple[int, int]:
+        """Rows around the visible lines"""
+        first = int(self.text.index("@0,0").split(".")[0]) - 1
+        last = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0]) - 1
+        return max(first - VIEW_MARGIN, 0), last + VIEW_MARGIN
+
+    def extend_highlights(self) -> None:
+        """Highlight the matches of the rows that came into view"""
+        first, last = self.visible_rows()
+        if self._shown is None or first > self._shown[1] or last < self._shown[0]:
+            self._highlight_rows(first, last)
+            self._shown = (first, last)
+            return
+
+        shown_first, shown_last = self._shown
+        if first < shown_first:
+            self._highlight_rows(first, shown_first - 1)
+        if last > shown_last:
+            self._highlight_rows(shown_last + 1, last)
+        self._shown = (min(first, shown_first), max(last, shown_last))
+
+    def _highlight_rows(self, first: int, last: int) -> None:
+        lo = bisect_left(self.starts, (first, 0))
+        hi = bisect_left(self.starts, (last + 1, 0))
+        if lo == hi:
+            return
+
+        ranges = []
+        for start, end in zip(self.starts[lo:hi], self.ends[lo:hi]):
+            ranges.append(self.index(start))
+            ranges.append(self.index(end))
+        self.text.tag_add("found", *ranges)
+
+    def _on_view(self, event) -> None:
+        if not (self.active and event.widget is self.text and self.starts):
+            return
+        if not self._view_job:
+            self._view_job = self.after_idle(self._update_view)
+
+    def _update_view(self) -> None:
+        self._view_job = None
+        try:
+            self.extend_highlights()
+        except tk.TclError:
+            # editor was closed
+            pass
+
     def highlight_current(self):
         self.text.tag_remove("foundcurrent", "1.0", "end")
 
-        current = self.current
-        match = self.matches[current]
+        i = bisect_left(self.starts, self.current)
+        if i < len(self.starts):
+            self.text.tag_add("foundcurrent", self.index(self.starts[i]), self.index(self.ends[i]))
+
+    def compile(self) -> re.Pattern | None:
+        """The pattern typed in the find box, compiled once per pattern"""
+        pattern = self.findbox.get()
+        if pattern != self.matchstring:
+            self.matchstring = pattern
+            try:
+                self.re_ = re.compile(pattern)
+            except re.error:
+                self.re_ = None
+            self._line_local = bool(self.re_) and line_local(pattern)
+        return self.re_
+
+    def scan(self, content: str) -> None:
+        """Find every match in the content"""
+        self.starts, self.ends = [], []
+        regex = self.compile()
+        if not regex:
+            return
 
-        start = match.start()
-        end = match.end()
-        self.text.tag_add("foundcurrent", f"1.0+{start}c", f"1.0+{end}c")
+        row = 0
+        line_start = 0
+        counted = 0
+        for match in regex.finditer(content):
+            start = match.start()
+            newlines = content.count("\n", counted, start)
+            if newlines:
+                row += newlines
+                line_start = content.rfind("\n", counted, start) + 1
+            counted = start
+            self.starts.append((row, start - line_start))
+
+            end = match.end()
+            newlines = content.count("\n", start, end)
+            if newlines:
+                self.ends.append((row + newlines, end - content.rfind("\n", start, end) - 1))
+            else:
+                self.ends.append((row, end - line_start))
 
     def get_find_input(self):
         if self.findbox.get() == "":
-            self.text.tag_remove("found", "1.0", "end")
-            self.text.tag_remove("foundcurrent", "1.0", "end")
+            self.matchstring = ""
+            self.starts, self.ends = [], []
+            self.clear_highlights()
+            self.results_count.show(0)
             return
 
-        current = self.current
-        self.matches = {}
-        self.matchstring = self.findbox.get()
-        self.re_ = re.compile(self.matchstring)
-
-        for match in self.re_.finditer(self.text.get_all_text()):
-            self.matches[match.start()] = match
-
+        self.refresh()
         self.highlight_matches()
-        self.text.mark_set("insert", f"1.0 + {current}c")
-        self.results_count.show(len(self.matches))
+        self.results_count.show(len(self.starts))
+
+    def refresh(self) -> None:
+        """Find the matches again if the content changed in a way they could
+        not follow"""
+        if self._rescan_job:
+            self.after_cancel(self._rescan_job)
+            self._rescan_job = None
+        self._stale = False
+        self.scan(self.text.document.text())
 
     def find(self, *_):
         """Find all matches and highlight them"""
         try:
-            self.text = self.base.editorsmanager.active_editor.content.text
+            self.set_text(self.base.editorsmanager.active_editor.content.text)
         except AttributeError:
             return
 
         self.get_find_input()
         self.lift()
 
-    def next_match(self, *_):
-        """Moves the editor focus to the next match"""
-        if self.findbox.get() != self.matchstring:
+    def _ensure_matches(self) -> None:
+        if self.findbox.get() != self.matchstring or self._stale:
             self.get_find_input()
 
-        matchpos = [i for i in sorted(self.matches.keys()) if i > self.current]
-
-        if len(matchpos) > 0:
-            next_index = f"1.0 + {matchpos[0]}c"
-            self.text.mark_set("insert", next_index)
-            self.text.see(next_index)
-            self.highlight_current()
-        elif len(self.matches) > 0:
-            self.text.mark_set("insert", "1.0")
+    def next_match(self, *_):
+        """Moves the editor focus to the next match"""
+        self._ensure_matches()
 
-            if self.is_on_match():
-                self.highlight_current()
-            else:
-                self.next_match()
+        if self.starts:
+            i = bisect_right(self.starts, self.current)
+            self.goto_match(i if i < len(self.starts) else 0)
 
         self.lift()
         self.text.focus()
 
     def prev_match(self, *_):
         """Moves the editor focus to the previous match"""
-        if self.findbox.get() != self.matchstring:
-            self.get_find_input()
-        matchpos = [i for i in sorted(self.matches.keys()) if i < self.current]
-        if len(matchpos) > 0:
-            next_index = f"1.0 + {matchpos[-1]}c"
-            self.text.mark_set("insert", next_index)
-            self.text.see(next_index)
-            self.highlight_current()
-        elif len(self.matches) > 0:
-            self.text.mark_set("insert", "end")
-            self.prev_match()
+        self._ensure_matches()
+
+        if self.starts:
+            i = bisect_left(self.starts, self.current)
+            self.goto_match(i - 1)
+
         self.lift()
         self.text.focus()
 
+    def goto_match(self, i: int) -> None:
+        index = self.index(self.starts[i])
+        self.text.mark_set("insert", index)
+        self.text.see(index)
+        self.extend_highlights()
+        self.highlight_current()
+
     def replace(self, *_):
         """replaces current (in focus) match, removing the match and writing the replace string"""
         self.replacestring = self.replacebox.get()
-        if self.findbox.get() != self.matchstring:
-            self.get_find_input()
+        self._ensure_matches()
+
         if self.is_on_match():
-            match = self.matches[self.current]
-            self.text.delete(f"1.0 + {match.start()}c", f"1.0 + {match.end()}c")
-            self.text.insert(f"1.0 + {self.current}c", self.replacestring)
-            self.get_find_input()
+            i = bisect_left(self.starts, self.current)
+            self.text.replace(self.index(self.starts[i]), self.index(self.ends[i]), self.replacestring)
+            self.results_count.show(len(self.starts))
         self.lift()
         self.text.focus()
 
     def is_on_match(self):
         """tells if the editor is currently pointing to a match"""
-        return self.current in self.matches
+        i = bisect_left(self.starts, self.current)
+        return i < len(self.starts) and self.starts[i] == self.current
 
     def replace_all(self, *_):
-        """replaces all occurences of the string for the replace string, it will even replace partial words."""
-        self.get_find_input()
-        nmatches = len(self.matches)
+        """replaces all occurences of the string for the replace string, it will even replace partial words.
+
+        The text from the first to the last match is rebuilt in one pass and
+        replaced as a single edit."""
+        self.replacestring = self.replacebox.get()
+        regex = self.compile()
+        if not regex:
+            return
+
+        content = self.text.document.text()
+        parts = []
+        first = last = None
+        for match in regex.finditer(content):
+            if first is None:
+                first = last = match.start()
+            parts.append(content[last : match.start()])
+            parts.append(self.replacestring)
+            last = match.end()
+        if first is None:
+            return
+
         current = self.current
-        self.text.mark_set("insert", "1.0")
-        self.replace()
-        for i in range(nmatches):
-            self.next_match()
-            self.replace()
-        self.text.mark_set("insert", f"1.0 + {current}c")
+        start = self.index(self._offset_point(content, first))
+        end = self.index(self._offset_point(content, last))
+        # the matches are found again once, instead of for the edited lines
+        self._replacing = True
+        try:
+            self.text.replace(start, end, "".join(parts))
+        finally:
+            self._replacing = False
+        self.text.mark_set("insert", self.index(current))
+        self.get_find_input()
+
+    @staticmethod
+    def _offset_point(content: str, offset: int) -> tuple[int, int]:
+        row = content.count("\n", 0, offset)
+        return row, offset - content.rfind("\n", 0, offset) - 1
+
+    def content_changed(self, text: Text, edit: dict | None) -> None:
+        """Keep the matches in sync with an edit made to a text
+
+        Args:
+            text (Text): The edited text
+            edit (dict): The edit record of the change, None if untracked"""
+
+        if not (self.active and text is self.text and self.matchstring) or self._replacing:
+            return
+        if edit is None or not self.re_ or not self._line_local:
+            self._schedule_rescan()
+            return
+
+        first, old_last = edit["start_point"][0], edit["old_end_point"][0]
+        new_last = edit["new_end_point"][0]
+        delta = new_last - old_last
+
+        # matches of the edited lines are found again, later ones move along
+        starts, ends = [], []
+        for row, line in enumerate(text.document.lines(first, new_last + 1), first):
+            for match in self.re_.finditer(line):
+                starts.append((row, match.start()))
+                ends.append((row, match.end()))
+
+        lo = bisect_left(self.starts, (first, 0))
+        hi = bisect_left(self.starts, (old_last + 1, 0))
+        tail_starts, tail_ends = self.starts[hi:], self.ends[hi:]
+        if delta:
+            tail_starts = [(row + delta, col) for row, col in tail_starts]
+            tail_ends = [(row + delta, col) for row, col in tail_ends]
+        self.starts[lo:] = starts + tail_starts
+        self.ends[lo:] = ends + tail_ends
+
+        if self._shown:
+            shown_first, shown_last = self._shown
+            if shown_first > old_last:
+                shown_first += delta
+            if shown_last > old_last:
+                shown_last += delta
+            self._shown = (shown_first, shown_last)
+            if first <= shown_last and new_last >= shown_first:
+                self.text.tag_remove("found", f"{first + 1}.0", f"{new_last + 1}.end")
+                self._highlight_rows(max(first, shown_first), min(new_last, shown_last))
+        self.text.tag_remove("foundcurrent", "1.0", "end")
+        if self.is_on_match():
+            self.highlight_current()
+        self.results_count.show(len(self.starts))
+
+    def _schedule_rescan(self) -> None:
+        self._stale = True
+        if self._rescan_job:
+            self.after_cancel(self._rescan_job)
+        self._rescan_job = self.after(RESCAN_DELAY, self._rescan)
+
+    def _rescan(self) -> None:
+        self._rescan_job = None
+        if not self.active:
+            return
+        try:
+            self.get_find_input()
+        except tk.TclError:
+            # editor was closed
+            pass
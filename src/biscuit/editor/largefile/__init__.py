@@ -0,0 +1,2 @@
+from .mapped import MappedFile
+from .viewer import LargeFileViewer
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+
+# bytes per block of the line index, the index stores one newline count per
+# block so a 2 GB file needs 8192 entries
+BLOCK_SIZE = 256 * 1024
+# longest line (in bytes) rendered, the rest of the line is cut off
+MAX_LINE_BYTES = 16 * 1024
+
+
+class MappedFile:
+    """Read-only view of a file through a memory map
+
+    Nothing is read into memory up front: the OS pages in only the parts of the
+    file that are looked at. Line offsets are found through a sparse index
+    holding the number of newlines before each `BLOCK_SIZE` block, built by a
+    background thread (`start_indexing`) with plain reads into a reused buffer
+    so the whole file never becomes resident. Lookups past the indexed part
+    extend the index on demand, so they work while indexing is still running.
+
+    Offsets are in bytes and lines are 0-based. Lines are split on b"\\n", so
+    the encoding must be ASCII compatible (utf-8, latin-1, ...)."""
+
+    def __init__(self, path: str, encoding: str = "utf-8") -> None:
+        self.path = path
+        self.encoding = encoding
+
+        self._file = open(path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.mm: mmap.mmap | bytes = (
+            mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self.size
+            else b""
+        )
+
+        # newlines before the start of each indexed block, the last entry is
+        # the number of newlines before the first block not indexed yet
+        self._blocks = array("Q", [0])
+        self._buffer = bytearray(BLOCK_SIZE)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.closed = False
+
+    @property
+    def indexed(self) -> int:
+        """Bytes covered by the line index"""
+        return min((len(self._blocks) - 1) * BLOCK_SIZE, self.size)
+
+    @property
+    def indexed_lines(self) -> int:
+        """Lines whose start offset is known without extending the index"""
+        return self._blocks[-1] + 1
+
+    @property
+    def complete(self) -> bool:
+        return self.indexed >= self.size
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, estimated from the indexed part until it is complete"""
+
+        newlines = self._blocks[-1]
+        if not self.complete:
+            newlines = newlines * self.size // max(self.indexed, 1)
+        return newlines + 1
+
+    def start_indexing(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self._index, daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _index(self) -> None:
+        while not self.closed and not self.complete:
+            self._extend(self.indexed + BLOCK_SIZE)
+
+    def _extend(self, offset: int) -> None:
+        """Index blocks until the one containing offset is covered"""
+
+        with self._lock:
+            while not self.closed and self.indexed <= min(offset, self.size - 1):
+                self._file.seek(self.indexed)
+                read = self._file.readinto(self._buffer)
+                count = self._buffer.count(b"\n", 0, read)
+                self._blocks.append(self._blocks[-1] + count)
+
+    def _extend_to_line(self, line: int) -> None:
+        """Index blocks until the line's start is covered"""
+
+        while not self.closed and not self.complete and self._blocks[-1] < line:
+            self._extend(self.indexed)
+
+    def line_offset(self, line: int) -> int | None:
+        """Offset where the line starts, None if the file has fewer lines"""
+
+        if line <= 0:
+            return 0
+
+        self._extend_to_line(line)
+        # block holding the line-th newline
+        block = bisect_left(self._blocks, line) - 1
+        if block >= len(self._blocks) - 1:
+            return None
+
+        offset = block * BLOCK_SIZE
+        for _ in range(line - self._blocks[block]):
+            offset = self.mm.find(b"\n", offset) + 1
+        return offset
+
+    def line_at(self, offset: int) -> int:
+        """Line containing the offset"""
+
+        offset = max(0, min(offset, self.size))
+        self._extend(offset)
+        block = offset // BLOCK_SIZE
+        return self._blocks[block] + self.mm[block * BLOCK_SIZE : offset].count(b"\n")
+
+    def line_end(self, offset: int) -> int:
+        """Offset of the newline ending the line that starts at offset"""
+
+        end = self.mm.find(b"\n", offset)
+        return self.size if end == -1 else end
+
+    def decode(self, data: bytes) -> str:
+        return data.decode(self.encoding, errors="replace").rstrip("\r")
+
+    def lines(self, start: int, count: int) -> list[str]:
+        """Decoded lines from start, at most count of them"""
+
+        offset = self.line_offset(start)
+        if offset is None:
+            return []
+
+        lines = []
+        while len(lines) < count and offset <= self.size:
+            end = self.line_end(offset)
+            lines.append(self.decode(self.mm[offset : min(end, offset + MAX_LINE_BYTES)]))
+            offset = end + 1
+        return lines
+
+    def column(self, offset: int) -> tuple[int, int]:
+        """Line and column (in characters) of the offset"""
+
+        line = self.line_at(offset)
+        start = self.line_offset(line)
+        return line, len(self.mm[start:offset].decode(self.encoding, errors="replace"))
+
+    def search(
+        self,
+        pattern: str,
+        start: int = 0,
+        regex: bool = False,
+        case: bool = True,
+        wrap: bool = True,
+    ) -> tuple[int, int] | None:
+        """Find the next match of pattern from offset start, searching the
+        mapped file directly without reading it into memory
+
+        Returns:
+            tuple[int, int] | None: start and end offsets of the match"""
+
+        if not pattern:
+            return None
+
+        needle = pattern.encode(self.encoding)
+        compiled = None
+        if regex or not case:
+            flags = re.MULTILINE if case else re.MULTILINE | re.IGNORECASE
+            compiled = re.compile(needle if regex else re.escape(needle), flags)
+
+        def find(pos: int) -> tuple[int, int] | None:
+            if compiled:
+                match = compiled.search(self.mm, pos)
+                return match.span() if match else None
+            index = self.mm.find(needle, pos)
+            return (index, index + len(needle)) if index != -1 else None
+
+        match = find(start)
+        if not match and wrap and start:
+            match = find(0)
+        self._release()
+        return match
+
+    def _release(self) -> None:
+        """Drop the pages a scan brought into memory, they stay in the OS file
+        cache but are no longer counted against the process"""
+
+        if isinstance(self.mm, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+            try:
+                self.mm.madvise(mmap.MADV_DONTNEED)
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        self.closed = True
+        with self._lock:
+            if isinstance(self.mm, mmap.mmap):
+                try:
+                    self.mm.close()
+                except BufferError:
+                    # a search still holds the buffer, unmapped once it's done
+                    pass
+            self._file.close()
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import re
+import threading
+import tkinter as tk
+import typing
+
+from biscuit.common.icons import Icons
+from biscuit.common.ui import ButtonsEntry, Scrollbar
+
+from ..editorbase import BaseEditor
+from .mapped import MappedFile
+
+if typing.TYPE_CHECKING:
+    from biscuit.editor.editor import Editor
+
+# delay between line index progress updates (ms)
+INDEX_POLL_INTERVAL = 200
+# delay between checks for the result of a running search (ms)
+SEARCH_POLL_INTERVAL = 50
+
+
+class LargeFileViewer(BaseEditor):
+    """Read-only viewer for files too large for the text editor
+
+    The file is memory-mapped (see `MappedFile`) and only the lines visible in
+    the window are decoded and put in the text widget, so opening a file costs
+    the same whatever its size. Scrolling, goto line and search work against
+    the mapped file while its line index is being built in the background;
+    positions past the indexed part are revealed once indexing gets there
+    rather than counting lines on the Tk thread. Searches run on a worker
+    thread."""
+
+    def __init__(self, master: Editor, path: str, *args, **kwargs) -> None:
+        super().__init__(master, path, editable=False, *args, **kwargs)
+        self.exists = True
+        self.font = self.base.settings.font
+        self.file = MappedFile(path)
+
+        # first line in the window (0-based)
+        self.top = 0
+        self.match: tuple[int, int] | None = None
+        # (covered, action): action waiting for the line index to cover a position
+        self.pending: tuple[typing.Callable[[], bool], typing.Callable[[], None]] | None = None
+        self.searching = False
+        self.case_sensitive = True
+        self.regex = False
+
+        self.rowconfigure(1, weight=1)
+        self.columnconfigure(1, weight=1)
+
+        self.searchbox = ButtonsEntry(
+            self,
+            hint="Find in file (Enter: next match)",
+            buttons=(
+                (Icons.CASE_SENSITIVE, self.toggle_case),
+                (Icons.REGEX, self.toggle_regex),
+            ),
+        )
+        self.searchbox.entry.bind("<Return>", lambda _: self.search_next())
+        self.searchbox.grid(row=0, column=0, columnspan=3, sticky=tk.EW, padx=5, pady=5)
+
+        bg, fg, _, hfg = self.base.theme.editors.linenumbers.number.values()
+        self.linenumbers = tk.Text(
+            self,
+            width=6,
+            font=self.font,
+            bg=bg,
+            fg=fg,
+            wrap=tk.NONE,
+            relief=tk.FLAT,
+            highlightthickness=0,
+            bd=0,
+            padx=5,
+            cursor="",
+        )
+        self.linenumbers.tag_config("right", justify=tk.RIGHT)
+        self.linenumbers.tag_config("current", foreground=hfg)
+
+        self.text = tk.Text(
+            self,
+            font=self.font,
+            wrap=tk.NONE,
+            relief=tk.FLAT,
+            highlightthickness=0,
+            bd=0,
+            **self.base.theme.editors.text,
+        )
+        self.text.tag_config(tk.SEL, background=self.base.theme.editors.selection)
+        self.text.tag_config("current", background=self.base.theme.editors.currentline)
+        self.text.tag_config("found", background=self.base.theme.editors.foundcurrent)
+        self.text.tag_raise(tk.SEL)
+
+        self.scrollbar = Scrollbar(
+            self, orient=tk.VERTICAL, style="EditorScrollbar", command=self.on_scrollbar
+        )
+
+        self.linenumbers.grid(row=1, column=0, sticky=tk.NS)
+        self.text.grid(row=1, column=1, sticky=tk.NSEW)
+        self.scrollbar.grid(row=1, column=2, sticky=tk.NS)
+
+        for widget in (self.text, self.linenumbers):
+            widget.config(state=tk.DISABLED)
+            widget.bind("<MouseWheel>", self.on_mousewheel)
+            widget.bind("<Button-4>", lambda _: self.scroll(-3))
+            widget.bind("<Button-5>", lambda _: self.scroll(3))
+        self.text.bind("<Configure>", lambda _: self.render())
+        self.text.bind("<Up>", lambda _: self.scroll(-1))
+        self.text.bind("<Down>", lambda _: self.scroll(1))
+        self.text.bind("<Prior>", lambda _: self.scroll(-self.visible_lines))
+        self.text.bind("<Next>", lambda _: self.scroll(self.visible_lines))
+        self.text.bind("<Control-Home>", lambda _: self.scroll_to(0))
+        self.text.bind("<Control-End>", lambda _: self.scroll_to(self.file.line_count))
+        self.text.bind("<Control-f>", self.focus_search)
+        # disabled text widgets don't take focus on click
+        self.text.bind("<Button-1>", lambda _: self.text.focus_set(), add=True)
+
+        self.file.start_indexing()
+        self.after(INDEX_POLL_INTERVAL, self.poll_index)
+
+    @property
+    def visible_lines(self) -> int:
+        return max(self.text.winfo_height() // self.font.metrics("linespace"), 1)
+
+    def poll_index(self) -> None:
+        """Update the scrollbar as the line count grows and run the action
+        waiting for the index, the window is clamped again once the estimated
+        line count gets exact"""
+
+        if self.file.closed:
+            return
+
+        if self.pending:
+            self.when_indexed(*self.pending)
+        else:
+            self.scroll_to(self.top)
+        if not self.file.complete:
+            self.after(INDEX_POLL_INTERVAL, self.poll_index)
+
+    def when_indexed(
+        self, covered: typing.Callable[[], bool], action: typing.Callable[[], None]
+    ) -> bool:
+        """Run action now if the line index covers what it needs, otherwise
+        once indexing gets there. Returns whether it ran now."""
+
+        if self.file.complete or covered():
+            self.pending = None
+            action()
+            return True
+
+        self.pending = (covered, action)
+        return False
+
+    def render(self) -> None:
+        """Decode the lines in the window and show them"""
+
+        if self.file.closed:
+            return
+
+        count = self.visible_lines + 1
+        lines = self.file.lines(self.top, count)
+        current = self.file.line_at(self.match[0]) - self.top if self.match else -1
+
+        self.text.config(state=tk.NORMAL)
+        self.linenumbers.config(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.linenumbers.delete("1.0", tk.END)
+        self.text.insert("1.0", "\n".join(lines))
+        self.linenumbers.insert(
+            "1.0",
+            "\n".join(str(self.top + i + 1) for i in range(len(lines))),
+            "right",
+        )
+
+        if 0 <= current < len(lines):
+            row = current + 1
+            self.text.tag_add("current", f"{row}.0", f"{row + 1}.0")
+            self.linenumbers.tag_add("current", f"{row}.0", f"{row}.end")
+            _, start = self.file.column(self.match[0])
+            _, end = self.file.column(self.match[1])
+            if self.file.line_at(self.match[1]) == self.top + current:
+                self.text.tag_add("found", f"{row}.{start}", f"{row}.{end}")
+
+        self.text.config(state=tk.DISABLED)
+        self.linenumbers.config(state=tk.DISABLED)
+        self.linenumbers.config(width=max(len(str(self.top + count)), 4))
+
+        total = self.file.line_count
+        self.scrollbar.set(self.top / total, min((self.top + count - 1) / total, 1.0))
+
+    def scroll_to(self, line: int) -> str:
+        def scroll(line=line) -> None:
+            last = max(self.file.line_count - self.visible_lines, 0)
+            self.top = max(0, min(line, last))
+            self.render()
+
+        visible = self.visible_lines
+        if not self.when_indexed(
+            lambda: line + visible < self.file.indexed_lines, scroll
+        ):
+            # show as far as is indexed meanwhile
+            scroll(min(line, self.file.indexed_lines - visible))
+        return "break"
+
+    def scroll(self, lines: int) -> str:
+        return self.scroll_to(self.top + lines)
+
+    def on_mousewheel(self, event: tk.Event) -> str:
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_scrollbar(self, action: str, value: str, unit: str = None) -> None:
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * self.file.line_count))
+        elif unit == tk.PAGES:
+            self.scroll(int(value) * self.visible_lines)
+        else:
+            self.scroll(int(value))
+
+    def goto_line(self, line: int) -> None:
+        """Scroll to the line (1-based), placing it in the middle of the window"""
+
+        def goto() -> None:
+            offset = self.file.line_offset(max(line - 1, 0))
+            if offset is not None:
+                self.reveal((offset, offset))
+
+        if not self.when_indexed(lambda: line <= self.file.indexed_lines, goto):
+            self.base.notifications.info(
+                f"Line {line} will be shown once the file is indexed up to it"
+            )
+        self.text.focus_set()
+
+    def goto(self, position: str) -> None:
+        """Scroll to a "line.col" position, the way `Text.goto` is called"""
+
+        self.goto_line(int(str(position).split(".")[0]))
+
+    def load_file(self) -> None:
+        """The file is mapped when the viewer is created, this only tells the
+        ones waiting for the text editor to load it"""
+
+        self.event_generate("<<FileLoaded>>", when="tail")
+
+    def reveal(self, match: tuple[int, int]) -> None:
+        """Highlight the match and scroll to it if it is not in the window"""
+
+        self.match = match
+        line = self.file.line_at(match[0])
+        if not self.top <= line < self.top + self.visible_lines:
+            self.scroll_to(line - self.visible_lines // 2)
+        else:
+            self.render()
+
+    def focus_search(self, *_) -> str:
+        self.searchbox.entry.focus_set()
+        self.searchbox.entry.select_range(0, tk.END)
+        return "break"
+
+    def toggle_case(self, *_) -> None:
+        self.case_sensitive = not self.case_sensitive
+
+    def toggle_regex(self, *_) -> None:
+        self.regex = not self.regex
+
+    def search_next(self) -> str:
+        """Find the next match after the current one or the top of the window"""
+
+        if self.searching:
+            return "break"
+
+        if self.match and self.match[1] > self.match[0]:
+            start = self.match[1]
+        else:
+            start = self.file.line_offset(self.top) or 0
+
+        term = self.searchbox.get()
+        result = []
+
+        def search() -> None:
+            try:
+                result.append(
+                    self.file.search(
+                        term, start, regex=self.regex, case=self.case_sensitive
+                    )
+                )
+            except Exception as e:
+                result.append(e)
+
+        self.searching = True
+        threading.Thread(target=search, daemon=True).start()
+        self.after(SEARCH_POLL_INTERVAL, self.search_done, result)
+        return "break"
+
+    def search_done(self, result: list) -> None:
+        if self.file.closed:
+            return
+        if not result:
+            self.after(SEARCH_POLL_INTERVAL, self.search_done, result)
+            return
+
+        self.searching = False
+        match = result[0]
+        if isinstance(match, (re.error, UnicodeEncodeError)):
+            self.base.notifications.error(f"Invalid search: {match}")
+        elif isinstance(match, Exception) or not match:
+            self.base.notifications.info("No matches found")
+        elif not self.when_indexed(
+            lambda: match[0] < self.file.indexed, lambda: self.reveal(match)
+        ):
+            self.base.notifications.info(
+                "Match will be shown once the file is indexed up to it"
+            )
+
+    def focus(self) -> None:
+        self.text.focus_set()
+
+    def destroy(self) -> None:
+        self.file.close()
+        super().destroy()
@@ -1,19 +1,28 @@
-import json
 import os
+import queue
 import re
-import subprocess
-import threading
+import time
 import tkinter as tk
 from tkinter.messagebox import askyesno
 
+from biscuit.common.frames import FRAME_BUDGET, FRAME_INTERVAL
+from biscuit.common.search import SearchEngine, SearchQuery
 from biscuit.common.ui import Frame, Label, Tree
 
+# matches listed before the search pauses for "show more"
+RESULT_LIMIT = 2000
+# matches added as rows right away, files after that are added collapsed and
+# get their rows when they are opened
+EXPANDED_LIMIT = 300
+
 
 class SearchResults(Frame):
     """The Search Results view for SearchEditor.
     
     Displays search results in a tree and provides search/replace logic.
-    Uses ripgrep for fast searching.
+    Uses ripgrep for fast searching. Results are added while the search runs,
+    up to `RESULT_LIMIT` matches at a time, and the rows of a file are only
+    created once it is opened.
     """
 
     def __init__(self, master, editor, *args, **kwargs) -> None:
@@ -23,8 +32,19 @@ class SearchResults(Frame):
         self.treeview = Tree(self)
         self.treeview.pack(fill=tk.BOTH, expand=True)
         self.treeview.bind("<Double-1>", self.click)
+        self.treeview.bind("<<TreeviewOpen>>", self.on_open)
+
+        # matches of every listed file, by path
+        self.files: dict[str, list] = {}
+        # file nodes whose rows are not created yet
+        self.collapsed: dict[str, str] = {}
+        self.matches = 0
+        self.expanded = 0
+        self.limit = RESULT_LIMIT
+        self.more_node = None
+        self.engine: SearchEngine | None = None
+        self._job = None
 
-        self.results = []
         self.searching = False
         self.case_sensitive = False
         self.whole_word = False
@@ -35,11 +55,15 @@ class SearchResults(Frame):
 
     def clear_tree(self) -> None:
         self.treeview.delete(*self.treeview.get_children())
+        self.collapsed.clear()
+        self.more_node = None
 
     def click(self, _) -> None:
         item = self.treeview.focus()
         if not item:
             return
+        if item == self.more_node:
+            return self.show_more()
 
         tags = self.treeview.item(item)["tags"]
         if tags and len(tags) >= 2:
@@ -70,6 +94,8 @@ class SearchResults(Frame):
             
         open_state = not self.treeview.item(children[0], "open")
         for i in children:
+            if open_state:
+                self.add_rows(i)
             self.treeview.item(i, open=open_state)
 
     def toggle_open_editors_only(self, *_) -> None:
@@ -77,132 +103,157 @@ class SearchResults(Frame):
         self.search()
 
     def search(self, *_) -> None:
-        if self.searching:
-            return
-        
+        self.cancel()
+
         search_string = self.editor.searchbox.get()
         if not search_string or search_string == "Search all files...":
             self.editor.hide_results()
             self.clear_tree()
             return
 
-        self.searching = True
         self.editor.show_results()
         self.clear_tree()
-        self.results = []
+        self.files = {}
+        self.matches = self.expanded = 0
+        self.limit = RESULT_LIMIT
 
         if not self.base.active_directory and not self.open_editors_only:
             self.base.logger.warning("Search: No active directory and not searching open editors.")
-            self.searching = False
             self.editor.count_label.config(text="No folder open")
             return
 
-        # Prepare ripgrep command
-        command = ["rg", "--json", "--line-number", "--column"]
-        
-        if not self.case_sensitive:
-            command.append("-i")
-        
-        if self.whole_word:
-            command.append("-w")
-            
-        if not self.regex:
-            command.append("-F")
-
-        command.extend(["-e", search_string])
-
+        globs = []
         include_pattern = self.editor.includes.get()
         if include_pattern and not include_pattern.startswith("e.g. "):
-            for pattern in include_pattern.split(","):
-                if pattern.strip():
-                    command.extend(["-g", pattern.strip()])
-        
+            globs.extend(p.strip() for p in include_pattern.split(",") if p.strip())
+
         exclude_pattern = self.editor.excludes.get()
         if exclude_pattern and not exclude_pattern.startswith("e.g. "):
-            for pattern in exclude_pattern.split(","):
-                if pattern.strip():
-                    command.extend(["-g", f"!{pattern.strip()}"])
+            globs.extend(f"!{p.strip()}" for p in exclude_pattern.split(",") if p.strip())
 
+        paths = None
         if self.open_editors_only:
             paths = [e.path for e in self.base.editorsmanager.editors if e.path and os.path.isfile(e.path)]
             if not paths:
-                self.searching = False
                 self.editor.count_label.config(text="No open files")
                 return
-            command.extend(paths)
+
+        query = SearchQuery(
+            search_string,
+            case_sensitive=self.case_sensitive,
+            whole_word=self.whole_word,
+            regex=self.regex,
+        )
+        backend = None
+        if paths is None:
+            # files that can match, when the workspace index narrows them down
+            paths = self.base.search_index.candidates(query)
+            if paths is not None:
+                backend = "python"
+
+        self.searching = True
+        self.engine = SearchEngine(
+            self.base.active_directory or os.path.dirname(paths[0]),
+            query,
+            globs=globs,
+            paths=paths,
+            backend=backend,
+        )
+        self.base.logger.info(f"Search ({self.engine.backend}): {search_string}")
+        self.engine.start()
+        self._job = self.after(FRAME_INTERVAL, self._pump)
+
+    def cancel(self, *_) -> None:
+        """Stop the running search, results listed so far stay"""
+
+        if self._job:
+            self.after_cancel(self._job)
+            self._job = None
+        if self.engine:
+            self.engine.cancel()
+            self.engine = None
+        self.searching = False
+
+    def show_more(self, *_) -> None:
+        """List the next `RESULT_LIMIT` matches"""
+
+        if self.more_node:
+            self.treeview.delete(self.more_node)
+            self.more_node = None
+        self.limit = self.matches + RESULT_LIMIT
+        if self.engine and not self._job:
+            self._job = self.after(0, self._pump)
+
+    def _pump(self) -> None:
+        """Add the files searched so far to the tree, as many as fit in this
+        frame's time budget. Stops taking results at the limit, which pauses
+        the search until more are asked for."""
+
+        self._job = None
+        engine = self.engine
+
+        done = engine.done.is_set()
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while self.matches < self.limit:
+            if time.perf_counter() > deadline:
+                done = False
+                break
+            try:
+                file_path, matches = engine.results.get(block=False)
+            except queue.Empty:
+                break
+            self.add_file(file_path, matches)
         else:
-            command.append(os.path.abspath(self.base.active_directory))
+            if not (done and engine.results.empty()):
+                self.more_node = self.treeview.insert(
+                    "", tk.END, text=f"Show more results... ({self.matches} listed)"
+                )
+                self.editor.count_label.config(text=f"{self.matches}+")
+                return
 
-        # Run search in a separate thread to prevent freezing
-        threading.Thread(target=self._run_search, args=(command, search_string), daemon=True).start()
+        if not done:
+            self.editor.count_label.config(text=f"Searching... {self.matches}")
+            self._job = self.after(FRAME_INTERVAL, self._pump)
+            return
 
-    def _run_search(self, command, search_string):
-        file_results = {}
-        total_matches = 0
+        self.engine = None
+        self.searching = False
+        if engine.error:
+            self.base.logger.error(f"Search error: {engine.error}")
+            self.editor.count_label.config(text="Invalid pattern" if engine.error.startswith("Invalid") else "Search error")
+        else:
+            self.editor.count_label.config(text=f"{self.matches}/{self.matches}")
 
-        try:
-            self.base.logger.info(f"RG Command: {' '.join(command)}")
-            process = subprocess.Popen(
-                command, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True, 
-                encoding="utf-8",
-                creationflags=subprocess.CREATE_NO_WINDOW if os.name == "nt" else 0
-            )
-
-            for line in process.stdout:
-                try:
-                    data = json.loads(line)
-                    if data["type"] == "match":
-                        match_data = data["data"]
-                        file_path = match_data["path"]["text"]
-                        line_number = match_data["line_number"]
-                        line_text = match_data["lines"]["text"].strip()
-                        
-                        if file_path not in file_results:
-                            file_results[file_path] = []
-                        
-                        file_results[file_path].append((line_number, line_text))
-                        total_matches += 1
-                        
-                        if total_matches % 100 == 0:
-                            self.after(0, lambda m=total_matches: self.editor.count_label.config(text=f"Searching... {m}"))
-                            
-                except:
-                    continue
-
-            process.wait()
-            self.after(0, self._populate_tree, file_results, total_matches, search_string)
+    def add_file(self, file_path: str, matches: list) -> None:
+        """Add a file node, with its rows while few are shown"""
 
-        except Exception as e:
-            self.base.logger.error(f"Search error: {e}")
-            self.after(0, lambda: self.editor.count_label.config(text="rg error"))
-        finally:
-            self.searching = False
+        self.files[file_path] = matches
+        self.matches += len(matches)
 
-    def _populate_tree(self, file_results, total_matches, search_string):
-        self.clear_tree()
-        self.results = []
+        relpath = os.path.relpath(file_path, self.base.active_directory) if self.base.active_directory else file_path
+        expand = self.expanded < EXPANDED_LIMIT
+        parent = self.treeview.insert("", tk.END, text=f"{relpath} ({len(matches)})", open=expand)
+        self.collapsed[parent] = file_path
+        if expand:
+            self.add_rows(parent)
+        else:
+            # placeholder, so the node can be opened
+            self.treeview.insert(parent, tk.END, text="")
 
-        if not file_results:
-            self.editor.count_label.config(text="0/0")
+    def add_rows(self, node: str) -> None:
+        """Create the rows of a file node that has none yet"""
+
+        file_path = self.collapsed.pop(node, None)
+        if file_path is None:
             return
 
-        for file_path, matches in file_results.items():
-            relpath = os.path.relpath(file_path, self.base.active_directory) if self.base.active_directory else file_path
-            parent = self.treeview.insert("", tk.END, text=f"{relpath} ({len(matches)})", open=True)
-            for line_number, line_text in matches:
-                child = self.treeview.insert(parent, tk.END, text=f"  {line_number:4}: {line_text}")
-                self.treeview.item(child, tags=(file_path, line_number))
-                
-                self.results.append({
-                    "file_path": file_path,
-                    "line": line_number,
-                    "text": search_string 
-                })
-
-        self.editor.count_label.config(text=f"{total_matches}/{total_matches}")
+        self.treeview.delete(*self.treeview.get_children(node))
+        for line_number, line_text, _ in self.files[file_path]:
+            self.treeview.insert(node, tk.END, text=f"  {line_number:4}: {line_text}", tags=(file_path, line_number))
+        self.expanded += len(self.files[file_path])
+
+    def on_open(self, _) -> None:
+        self.add_rows(self.treeview.focus())
 
     def replace_single(self, *_) -> None:
         item = self.treeview.focus()
@@ -244,27 +295,53 @@ class SearchResults(Frame):
         except Exception as e:
             self.base.logger.error(f"Replace error: {e}")
 
+    def all_files(self) -> dict[str, list] | None:
+        """Matches of every file, not only the listed ones. Waits for the
+        rest of a search that is still running or paused at the limit, None
+        if it failed."""
+
+        files = dict(self.files)
+        engine = self.engine
+        if not engine:
+            return files
+
+        if self._job:
+            self.after_cancel(self._job)
+            self._job = None
+        while not (engine.done.is_set() and engine.results.empty()):
+            try:
+                file_path, matches = engine.results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            files[file_path] = matches
+
+        self.engine = None
+        self.searching = False
+        if engine.error:
+            self.base.logger.error(f"Search error: {engine.error}")
+            return None
+        return files
+
     def replace_all(self, *_) -> None:
         replace_string = self.editor.replacebox.get()
-        if not self.results:
+        if not self.files:
             return
 
-        if askyesno("Replace Confirmation", f"Replace all occurrences with '{replace_string}'?"):
+        # the listed matches stop at the limit, the rest are replaced too
+        files = self.all_files()
+        if not files:
+            return
+
+        if askyesno("Replace Confirmation", f"Replace all occurrences in {len(files)} files with '{replace_string}'?"):
             self.replacing = True
-            files = {}
-            for res in self.results:
-                if res['file_path'] not in files:
-                    files[res['file_path']] = []
-                files[res['file_path']].append(res)
-            
             search_string = self.editor.searchbox.get()
             for file_path, items in files.items():
                 try:
                     with open(file_path, "r", encoding="utf-8") as f:
                         lines = f.readlines()
                     
-                    for item in items:
-                        line_idx = item['line'] - 1
+                    for line_number, *_ in items:
+                        line_idx = line_number - 1
                         if self.regex:
                             flags = 0 if self.case_sensitive else re.IGNORECASE
                             lines[line_idx] = re.sub(search_string, replace_string, lines[line_idx], flags=flags)
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import typing
+from bisect import bisect_right
+from itertools import accumulate
+
+CHUNK_SIZE = 512
+# chunk encodings are cached in blocks of this many bytes, the most one
+# `read` returns. Smaller blocks copy less where tree-sitter starts reading
+# mid-block but take more calls.
+READ_SIZE = 256
+
+
+def _byte_len(line: str) -> int:
+    return len(line) if line.isascii() else len(line.encode("utf-8"))
+
+
+class Document:
+    """Python-side model of the text widget content
+
+    Lines are stored in chunks of at most `CHUNK_SIZE * 2` lines together with
+    their UTF-8 byte lengths, so that an edit only rewrites the chunks it
+    touches. Line and byte offsets are resolved through prefix sums over the
+    chunks, which are rebuilt lazily after edits.
+
+    Positions are tree-sitter style `(row, col)` points where row is 0-based and
+    col is the Tk character column. Like the Tk text widget, the document always
+    ends with an implicit newline which is included in `to_bytes()`.
+
+    The document mirrors edits made through the `Text` proxy. When an edit can't
+    be mirrored (eg. Tk undo), it is invalidated and re-read through `loader`
+    on the next access.
+    """
+
+    def __init__(self, loader: typing.Callable[[], str] = None) -> None:
+        """Document model
+
+        Args:
+            loader (Callable, optional): returns the full widget content (without
+                the trailing newline), used to resync the document."""
+
+        self.loader = loader
+        self.version = 0
+        self._dirty = loader is not None
+        self._set_lines([""])
+
+    def _set_lines(self, lines: list[str]) -> None:
+        self._chunks: list[list[str]] = [
+            lines[i : i + CHUNK_SIZE] for i in range(0, len(lines), CHUNK_SIZE)
+        ] or [[""]]
+        self._bytes: list[list[int]] = [
+            [_byte_len(line) + 1 for line in chunk] for chunk in self._chunks
+        ]
+        self._chunk_bytes: list[int] = [sum(i) for i in self._bytes]
+        self._encoded: list[dict[int, bytes] | None] = [None] * len(self._chunks)
+        self._reset_prefix()
+
+    def _reset_prefix(self) -> None:
+        self._line_prefix: list[int] | None = None
+        self._byte_prefix: list[int] | None = None
+
+    def _ensure(self) -> None:
+        if self._dirty:
+            self._dirty = False
+            self._set_lines(self.loader().split("\n"))
+
+    def _prefix(self) -> tuple[list[int], list[int]]:
+        if self._line_prefix is None:
+            self._line_prefix = list(accumulate((len(c) for c in self._chunks), initial=0))
+            self._byte_prefix = list(accumulate(self._chunk_bytes, initial=0))
+        return self._line_prefix, self._byte_prefix
+
+    def _locate(self, row: int) -> tuple[int, int]:
+        """Returns (chunk index, line index in chunk) for the row"""
+
+        line_prefix, _ = self._prefix()
+        ci = bisect_right(line_prefix, row) - 1
+        ci = min(max(ci, 0), len(self._chunks) - 1)
+        return ci, row - line_prefix[ci]
+
+    # -- queries ----------------------------------------------------------------
+
+    def set_text(self, text: str) -> None:
+        """Replace the entire document content"""
+
+        self._dirty = False
+        self._set_lines(text.split("\n"))
+        self.version += 1
+
+    def invalidate(self) -> None:
+        """Mark the document stale, content is re-read from `loader` on next access"""
+
+        if self.loader:
+            self._dirty = True
+            self.version += 1
+
+    @property
+    def line_count(self) -> int:
+        self._ensure()
+        return self._prefix()[0][-1]
+
+    @property
+    def byte_count(self) -> int:
+        """Total UTF-8 length including the trailing newline"""
+
+        self._ensure()
+        return self._prefix()[1][-1]
+
+    def clamp(self, point: tuple[int, int]) -> tuple[int, int]:
+        """Clamp a point to the document, the way Tk normalizes indices"""
+
+        self._ensure()
+        row, col = point
+        last = self.line_count - 1
+        if row > last:
+            return last, len(self.line(last))
+        row = max(row, 0)
+        return row, min(max(col, 0), len(self.line(row)))
+
+    def line(self, row: int) -> str:
+        """Text of the line at row (without newline)"""
+
+        self._ensure()
+        ci, li = self._locate(row)
+        return self._chunks[ci][li]
+
+    def lines(self, start: int = 0, end: int = None) -> typing.Iterator[str]:
+        """Iterate over lines in [start, end)"""
+
+        self._ensure()
+        end = self.line_count if end is None else min(end, self.line_count)
+        if start >= end:
+            return
+
+        ci, li = self._locate(start)
+        remaining = end - start
+        while remaining > 0 and ci < len(self._chunks):
+            part = self._chunks[ci][li : li + remaining]
+            yield from part
+            remaining -= len(part)
+            ci, li = ci + 1, 0
+
+    def point_to_byte(self, point: tuple[int, int]) -> int:
+        """UTF-8 byte offset of a (row, col) point"""
+
+        self._ensure()
+        row, col = self.clamp(point)
+        ci, li = self._locate(row)
+        _, byte_prefix = self._prefix()
+        line = self._chunks[ci][li]
+        return (
+            byte_prefix[ci]
+            + sum(self._bytes[ci][:li])
+            + (col if line.isascii() else _byte_len(line[:col]))
+        )
+
+    def get(self, start: tuple[int, int], end: tuple[int, int]) -> str:
+        """Text between two points"""
+
+        (srow, scol), (erow, ecol) = self.clamp(start), self.clamp(end)
+        if (erow, ecol) <= (srow, scol):
+            return ""
+        if srow == erow:
+            return self.line(srow)[scol:ecol]
+
+        lines = list(self.lines(srow, erow + 1))
+        lines[-1] = lines[-1][:ecol]
+        lines[0] = lines[0][scol:]
+        return "\n".join(lines)
+
+    def text(self) -> str:
+        """Full content without the trailing newline"""
+
+        return "\n".join(self.lines())
+
+    def to_bytes(self) -> bytes:
+        """Full content encoded as UTF-8, including the trailing newline"""
+
+        return (self.text() + "\n").encode("utf-8")
+
+    def read(self, byte_offset: int, _: tuple[int, int] = None) -> bytes:
+        """Read callback for `Parser.parse`.
+
+        Returns up to `READ_SIZE` bytes of the chunk that contains
+        byte_offset. The UTF-8 encoding of each chunk is cached in blocks of
+        `READ_SIZE` bytes until the chunk is edited, so a reparse after an edit
+        only encodes the touched chunks. A read starting inside a block gets
+        the rest of the block, which is cached too: tree-sitter resumes reading
+        after every subtree it reuses, mostly at the same offsets from one
+        reparse to the next.
+
+        NOTE: tree-sitter calls this again while evaluating query predicates,
+        which does not accept memoryviews. py-tree-sitter also never releases
+        the objects returned here, so they are reused rather than copied again
+        for every reparse."""
+
+        self._ensure()
+        _, byte_prefix = self._prefix()
+        if byte_offset >= byte_prefix[-1]:
+            return b""
+
+        ci = bisect_right(byte_prefix, byte_offset) - 1
+        pieces = self._encoded[ci]
+        if pieces is None:
+            encoded = ("\n".join(self._chunks[ci]) + "\n").encode("utf-8")
+            pieces = self._encoded[ci] = {
+                i: encoded[i : i + READ_SIZE] for i in range(0, len(encoded), READ_SIZE)
+            }
+        rel = byte_offset - byte_prefix[ci]
+        piece = pieces.get(rel)
+        if piece is None:
+            block, offset = divmod(rel, READ_SIZE)
+            piece = pieces[rel] = pieces[block * READ_SIZE][offset:]
+        return piece
+
+    # -- edits ------------------------------------------------------------------
+
+    def replace(self, start: tuple[int, int], end: tuple[int, int], text: str) -> str:
+        """Replace the text between two points and return the removed text.
+
+        An insert is a replace of an empty range, a delete is a replace with
+        empty text. Only the chunks touched by the edit are rebuilt."""
+
+        if self._dirty:
+            # will be re-read anyway
+            self.version += 1
+            return ""
+
+        start, end = self.clamp(start), self.clamp(end)
+        if end < start:
+            end = start
+        (srow, scol), (erow, ecol) = start, end
+
+        sci, sli = self._locate(srow)
+        eci, eli = self._locate(erow)
+
+        first = self._chunks[sci][sli]
+        last = self._chunks[eci][eli]
+        removed = self.get(start, end)
+        new_lines = (first[:scol] + text + last[ecol:]).split("\n")
+
+        if sci == eci:
+            chunk = self._chunks[sci]
+            chunk[sli : eli + 1] = new_lines
+            self._bytes[sci][sli : eli + 1] = [_byte_len(i) + 1 for i in new_lines]
+            self._rechunk(sci, sci + 1)
+        else:
+            lines = self._chunks[sci][:sli] + new_lines + self._chunks[eci][eli + 1 :]
+            self._chunks[sci : eci + 1] = [lines]
+            self._bytes[sci : eci + 1] = [[_byte_len(i) + 1 for i in lines]]
+            self._chunk_bytes[sci : eci + 1] = [0]
+            self._encoded[sci : eci + 1] = [None]
+            self._rechunk(sci, sci + 1)
+
+        self._reset_prefix()
+        self.version += 1
+        return removed
+
+    def insert(self, point: tuple[int, int], text: str) -> None:
+        self.replace(point, point, text)
+
+    def delete(self, start: tuple[int, int], end: tuple[int, int]) -> str:
+        return self.replace(start, end, "")
+
+    def _rechunk(self, start: int, end: int) -> None:
+        """Split oversized or drop empty chunks in [start, end)"""
+
+        chunks, sizes = [], []
+        for ci in range(start, end):
+            chunk, sizes_ = self._chunks[ci], self._bytes[ci]
+            if len(chunk) <= CHUNK_SIZE * 2:
+                chunks.append(chunk)
+                sizes.append(sizes_)
+                continue
+            for i in range(0, len(chunk), CHUNK_SIZE):
+                chunks.append(chunk[i : i + CHUNK_SIZE])
+                sizes.append(sizes_[i : i + CHUNK_SIZE])
+
+        pairs = [(c, s) for c, s in zip(chunks, sizes) if c]
+        if not pairs and len(self._chunks) == end - start:
+            pairs = [([""], [1])]
+
+        self._chunks[start:end] = [c for c, _ in pairs]
+        self._bytes[start:end] = [s for _, s in pairs]
+        self._chunk_bytes[start:end] = [sum(s) for _, s in pairs]
+        self._encoded[start:end] = [None] * len(pairs)
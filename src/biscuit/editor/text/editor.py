@@ -11,6 +11,7 @@ from ..editorbase import BaseEditor
 from .linenumbers import LineNumbers
 from .menu import RunMenu
 from .minimap import Minimap
+from .scheduler import RenderScheduler
 from .text import Text
 
 if typing.TYPE_CHECKING:
@@ -47,6 +48,17 @@ class TextEditor(BaseEditor):
         self.unsupported = False
         self.content_hash = ""
 
+        # redraws are batched per frame, cursor first and outline last
+        self.renderer = RenderScheduler(
+            self,
+            (
+                ("cursor", self.render_cursor),
+                ("highlight", self.render_highlight),
+                ("view", self.render_view),
+                ("outline", self.render_outline),
+            ),
+        )
+
         if not self.standalone:
             self.__buttons__ = [
                 (Icons.REFRESH, self.base.editorsmanager.reopen_active_editor),
@@ -231,24 +243,46 @@ class TextEditor(BaseEditor):
         self.run_file()
 
     def on_change(self, *_) -> None:
-        self.linenumbers.redraw()
+        # read by the key handlers that follow the change
+        self.text.update_current_word()
+        self.renderer.mark("cursor", "highlight", "view", "outline")
+
+    def on_scroll(self, *_) -> None:
+        self.renderer.mark("view")
+
+    def render_cursor(self) -> None:
         try:
             if not self.standalone:
                 self.base.update_statusbar()
         except ValueError:
             pass
-        self.text.refresh()
+        self.text.refresh_cursor()
+        self.linenumbers.redraw()
         if not self.minimalist:
             self.minimap.redraw_cursor()
+
+    def render_highlight(self) -> None:
+        self.text.refresh_highlights()
         self.event_generate("<<Change>>")
 
-    def on_scroll(self, *_) -> None:
+    def render_view(self) -> None:
+        self.text.highlighter.fill_viewport()
         self.linenumbers.redraw()
         if not self.minimalist:
             self.minimap.redraw()
         self.text.update_indent_guides()
         self.event_generate("<<Scroll>>")
 
+    def render_outline(self) -> None:
+        self.text.refresh_outline()
+
+    def log_render_timings(self) -> None:
+        """Write how often and how long the parts of the editor were redrawn
+        to the logs"""
+
+        for line in self.renderer.report():
+            self.base.logger.info(f"{self.filename or 'Untitled'} {line}")
+
     def unsupported_file(self) -> None:
         self.unsupported = True
         self.text.show_unsupported_dialog()
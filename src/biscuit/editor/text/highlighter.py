@@ -53,9 +53,13 @@ class Highlighter:
         """Full highlight (parse entire file)."""
         self.ts.highlight()
 
-    def incremental_highlight(self, edit_info: dict) -> None:
-        """Incremental highlight after an edit."""
-        self.ts.incremental_highlight(edit_info)
+    def incremental_highlight(self, edits: list[dict]) -> None:
+        """Incremental highlight after edits."""
+        self.ts.incremental_highlight(edits)
+
+    def fill_viewport(self) -> None:
+        """Highlight lines that scrolled into view but are not highlighted yet."""
+        self.ts.fill_viewport()
 
 
 # =============================================================================
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import typing
+from array import array
+
+if typing.TYPE_CHECKING:
+    from .document import Document
+
+# level of a line that has not been computed yet, and of a blank line
+UNKNOWN = -2
+BLANK = -1
+# how far to look for a non-blank line when placing guides on blank lines
+BLANK_LOOKAROUND = 50
+
+
+class IndentTable:
+    """Indent level of every line of the document
+
+    Levels are computed lazily from the document lines and kept in sync with
+    the edit records of the text widget: an edit only resets the rows it
+    touched. `version` changes whenever the guides could look different, i.e.
+    lines were added or removed or a computed level changed, so the view can
+    skip redrawing otherwise.
+
+    Rows are 0-based like the document."""
+
+    def __init__(self, document: Document, tab_spaces: int) -> None:
+        self.document = document
+        self.tab_spaces = tab_spaces
+        self.version = 0
+        self._levels: array | None = None
+
+    def reset(self) -> None:
+        self._levels = None
+        self.version += 1
+
+    def _ensure(self) -> array:
+        count = self.document.line_count
+        if self._levels is None or len(self._levels) != count:
+            if self._levels is not None:
+                # the document was reloaded without an edit record
+                self.version += 1
+            self._levels = array("h", [UNKNOWN]) * count
+        return self._levels
+
+    def apply(self, edits: list[dict | None]) -> None:
+        """Update the table for edits recorded by the text widget, None for an
+        edit that was not tracked"""
+
+        if self._levels is None:
+            return
+        if None in edits:
+            return self.reset()
+
+        changed = False
+        touched = []
+        for edit in edits:
+            start = edit["start_point"][0]
+            old_end = edit["old_end_point"][0]
+            new_end = edit["new_end_point"][0]
+
+            old = self._levels[start : old_end + 1]
+            self._levels[start : old_end + 1] = array("h", [UNKNOWN]) * (
+                new_end - start + 1
+            )
+            if new_end != old_end:
+                changed = True
+            touched.append((start, old))
+
+        if not changed:
+            # rows didn't move, only levels that were computed before matter
+            changed = any(
+                level != UNKNOWN and self.level(start + i) != level
+                for start, old in touched
+                for i, level in enumerate(old)
+            )
+        if changed:
+            self.version += 1
+
+    def level(self, row: int) -> int:
+        """Indent level of the line, BLANK for blank lines"""
+
+        levels = self._ensure()
+        if levels[row] == UNKNOWN:
+            line = self.document.line(row)
+            if line.strip():
+                expanded = line.expandtabs(self.tab_spaces)
+                indent = len(expanded) - len(expanded.lstrip())
+                levels[row] = min(indent // self.tab_spaces, 0x7FFF)
+            else:
+                levels[row] = BLANK
+        return levels[row]
+
+    def guide_level(self, row: int) -> int:
+        """Number of guides drawn on the line, blank lines continue the guides
+        of the surrounding block"""
+
+        level = self.level(row)
+        if level != BLANK:
+            return level
+
+        count = len(self._levels)
+        previous = next_ = 0
+        for i in range(row - 1, max(row - BLANK_LOOKAROUND, -1), -1):
+            if (previous := self.level(i)) != BLANK:
+                break
+        else:
+            previous = 0
+        for i in range(row + 1, min(row + BLANK_LOOKAROUND, count)):
+            if (next_ := self.level(i)) != BLANK:
+                break
+        else:
+            next_ = 0
+
+        return min(previous, next_) if next_ > 0 else previous
+
+    def segments(self, first: int, last: int) -> list[tuple[int, int, int]]:
+        """Vertical guide runs between rows first and last (inclusive)
+
+        Returns:
+            list[tuple[int, int, int]]: (level, start row, end row) of each run,
+                the guide at level n is drawn on lines with more than n guides"""
+
+        last = min(last, len(self._ensure()) - 1)
+        segments = []
+        # start row of the run open at each level
+        runs: list[int] = []
+        for row in range(first, last + 1):
+            level = self.guide_level(row)
+            while len(runs) > level:
+                segments.append((len(runs) - 1, runs.pop(), row - 1))
+            while len(runs) < level:
+                runs.append(row)
+
+        for level, start in enumerate(runs):
+            segments.append((level, start, last))
+        return segments
@@ -10,6 +10,20 @@ if typing.TYPE_CHECKING:
 from biscuit.common.ui import Canvas, Menubutton
 
 
+class Slot:
+    """Pooled canvas items for one line of the gutter, and what they show"""
+
+    def __init__(self, oval: int, number: int) -> None:
+        self.oval = oval
+        self.number = number
+        self.line: int | None = None
+        self.y = 0
+        self.text = None
+        self.fill = None
+        self.bp_fill = None
+        self.visible = True
+
+
 class LineNumbers(Canvas):
     """Line Numbers widget
 
@@ -39,7 +53,24 @@ class LineNumbers(Canvas):
         self.bp_hover_color, _, self.bp_enabled_color, _ = (
             self.base.theme.editors.linenumbers.breakpoint.values()
         )
-        self.breakpoints: set[int] = set()
+        self._breakpoints: set[int] = set()
+
+        # canvas items are created once and reused across redraws
+        self._slots: list[Slot] = []
+        self._free: list[Slot] = []
+        # visible line -> slot showing it
+        self._line_slots: dict[int, Slot] = {}
+        # what the last redraw was done for
+        self._state = None
+
+    @property
+    def breakpoints(self) -> set[int]:
+        return self._breakpoints
+
+    @breakpoints.setter
+    def breakpoints(self, breakpoints: set[int]) -> None:
+        self._breakpoints = breakpoints
+        self.invalidate()
 
     def attach(self, text):
         self.text = text
@@ -64,109 +95,139 @@ class LineNumbers(Canvas):
             relief=tk.FLAT,
             **self.base.theme.linenumbers,
         )
-        self.create_window(70, y - 2, anchor=tk.NE, window=btn)
+        self.create_window(70, y - 2, anchor=tk.NE, window=btn, tags="mark")
 
     def set_bar_width(self, width):
         self.configure(width=width)
+        self.invalidate()
 
     def toggle_breakpoint(self, line):
         if line in self.breakpoints:
             self.breakpoints.remove(line)
         else:
             self.breakpoints.add(line)
+        self.invalidate()
         self.redraw()
         self.master.update_breakpoints(self.breakpoints)
 
-    def redraw(self, *_):
-        self.delete(tk.ALL)
+    def invalidate(self) -> None:
+        """Force the next redraw to update the gutter"""
+
+        self._state = None
+
+    def redraw(self, *_) -> None:
+        """Update the gutter for the visible lines
+
+        Skipped when the first and last visible lines, their position, the line
+        count and the cursor line are the same as in the last redraw."""
 
         if not self.text:
             return
 
-        current_line = int(self.text.index(tk.INSERT).split('.')[0]) 
-
-        i = self.text.index("@0,0")
-        while True:
-            dline = self.text.dlineinfo(i)
-            if dline is None:
-                break
-
-            y = dline[1]
-            linenum = int(float(i))
-            curline = self.text.dlineinfo(tk.INSERT)
-            cur_y = curline[1] if curline else None
-
-            # TODO: optional: skipping comments
-            #             # check if line is commented
-            # if self.text.highlighter and any((tag[1].startswith("Token.Comment") for tag in self.text.dump(i, i + " lineend", tag=True))):
-            # if self.text.get(f"{i} linestart", f"{i} lineend").strip().startswith("#"):
-            #     self.create_text(40, y, anchor=tk.NE, text="|   ", tag=i, fill=self.base.theme.border)
-            #     i = self.text.index(f"{i}+1line")
-            #     continue
-
-            # Render breakpoint
-            has_breakpoint = linenum in self.breakpoints
-            breakpoint_id = self.create_oval(
-                5,
-                y + 3,
-                15,
-                y + 13,
-                outline="",
-                fill=self.bg if not has_breakpoint else self.bp_enabled_color,
-            )
-
-            # Bind hover and click events for breakpoint
-            self.tag_bind(
-                breakpoint_id,
-                "<Enter>",
-                lambda _, breakpoint_id=breakpoint_id, flag=has_breakpoint: self.on_breakpoint_enter(
-                    breakpoint_id, flag
-                ),
-            )
-            self.tag_bind(
-                breakpoint_id,
-                "<Leave>",
-                lambda _, breakpoint_id=breakpoint_id, flag=has_breakpoint: self.on_breakpoint_leave(
-                    breakpoint_id, flag
-                ),
-            )
-            self.tag_bind(
-                breakpoint_id,
-                "<Button-1>",
-                lambda _, linenum=linenum: self.toggle_breakpoint(linenum),
-            )
-
-            if self.text.relative_line_numbers:
-                if linenum != current_line:
-                    linenum = abs(linenum - current_line)
-
+        first = self.text.index("@0,0")
+        top = self.text.dlineinfo(first)
+        current_line = int(self.text.index(tk.INSERT).split(".")[0])
+        state = (
+            first,
+            top[1] if top else None,
+            self.text.index(f"@0,{self.text.winfo_height()}"),
+            self.text.index(tk.END),
+            current_line,
+            self.text.relative_line_numbers,
+        )
+        if state == self._state:
+            return
+        self._state = state
+
+        self.delete("mark")
+        self._draw(first, state[2], current_line)
+
+    def _draw(self, first: str, last: str, current_line: int) -> None:
+        """Move the pooled items to the visible lines, reconfiguring only the
+        items whose line or state changed"""
+
+        # y of each visible line, the first one may be a wrapped display line
+        positions = {}
+        for linenum in range(int(float(first)), int(float(last)) + 1):
+            dline = self.text.dlineinfo(first if not positions else f"{linenum}.0")
+            if dline is not None:
+                positions[linenum] = dline[1]
+
+        for linenum in [l for l in self._line_slots if l not in positions]:
+            self._free.append(self._line_slots.pop(linenum))
+
+        # scrolling shifts all the lines that stay visible by the same amount,
+        # so they are moved with a single call
+        shifts = {positions[l] - slot.y for l, slot in self._line_slots.items()}
+        if len(shifts) == 1 and (dy := shifts.pop()):
+            self.move("linenumber", 0, dy)
+            for slot in self._slots:
+                slot.y += dy
+
+        for linenum, y in positions.items():
+            slot = self._line_slots.get(linenum)
+            if slot is None:
+                slot = self._free.pop() if self._free else self._create_slot()
+                self._line_slots[linenum] = slot
+            self._update_slot(slot, linenum, y, current_line)
+
+        for slot in self._free:
+            if slot.visible:
+                slot.visible = False
+                slot.line = None
+                self.itemconfig(slot.oval, state=tk.HIDDEN)
+                self.itemconfig(slot.number, state=tk.HIDDEN)
+
+    def _create_slot(self) -> Slot:
+        """Create a pooled oval and number, bindings are attached once and look
+        up the line the slot currently shows"""
+
+        slot = Slot(
+            self.create_oval(5, 3, 15, 13, outline="", fill=self.bg, tags="linenumber"),
             self.create_text(
-                40,
-                y,
-                anchor=tk.NE,
-                text=linenum,
-                font=self.font,
-                tag=i,
-                fill=self.hfg if y == cur_y else self.fg,
-            )
-
-            self.tag_bind(
-                i,
-                "<Enter>",
-                lambda _, breakpoint_id=breakpoint_id, flag=has_breakpoint: self.on_breakpoint_enter(
-                    breakpoint_id, flag
-                ),
-            )
-
-            self.tag_bind(
-                i,
-                "<Leave>",
-                lambda _, breakpoint_id=breakpoint_id, flag=has_breakpoint: self.on_breakpoint_leave(
-                    breakpoint_id, flag
-                ),
-            )
-
-            i = self.text.index(f"{i}+1line")
+                40, 0, anchor=tk.NE, font=self.font, fill=self.fg, tags="linenumber"
+            ),
+        )
+        self._slots.append(slot)
+
+        enter = lambda _: self.on_breakpoint_enter(
+            slot.oval, slot.line in self.breakpoints
+        )
+        leave = lambda _: self.on_breakpoint_leave(
+            slot.oval, slot.line in self.breakpoints
+        )
+        for item in (slot.oval, slot.number):
+            self.tag_bind(item, "<Enter>", enter)
+            self.tag_bind(item, "<Leave>", leave)
+        self.tag_bind(
+            slot.oval,
+            "<Button-1>",
+            lambda _: slot.line is not None and self.toggle_breakpoint(slot.line),
+        )
+        return slot
+
+    def _update_slot(self, slot: Slot, linenum: int, y: int, current_line: int) -> None:
+        number = linenum
+        if self.text.relative_line_numbers and linenum != current_line:
+            number = abs(linenum - current_line)
+        fill = self.hfg if linenum == current_line else self.fg
+        bp_fill = self.bp_enabled_color if linenum in self.breakpoints else self.bg
+
+        slot.line = linenum
+        if slot.y != y:
+            slot.y = y
+            self.coords(slot.oval, 5, y + 3, 15, y + 13)
+            self.coords(slot.number, 40, y)
+        if (slot.text, slot.fill) != (number, fill):
+            slot.text, slot.fill = number, fill
+            self.itemconfig(slot.number, text=number, fill=fill)
+        if slot.bp_fill != bp_fill:
+            slot.bp_fill = bp_fill
+            self.itemconfig(slot.oval, fill=bp_fill)
+        if not slot.visible:
+            slot.visible = True
+            self.itemconfig(slot.oval, state=tk.NORMAL)
+            self.itemconfig(slot.number, state=tk.NORMAL)
 
     def on_breakpoint_enter(self, id, flag):
         self.itemconfig(id, fill=self.bp_enabled_color if flag else self.bp_hover_color)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import codecs
+import io
+import os
+import queue
+import threading
+import time
+import typing
+
+# bytes read and decoded at once by the worker thread
+READ_SIZE = 1024 * 1024
+# time spent writing to the widget per frame (seconds), the rest of the frame
+# is left to the event loop so the UI stays responsive while loading
+FRAME_BUDGET = 0.012
+# delay between frames (ms)
+FRAME_INTERVAL = 4
+
+
+class FileLoader:
+    """Streams a file into a widget without blocking the event loop
+
+    A worker thread reads the file in binary and decodes it with an
+    incremental decoder, translating newlines like text mode would. The
+    decoded chunks are written from the Tk thread, as many as fit in
+    `FRAME_BUDGET` per frame, without re-entering the event loop.
+
+    Callbacks (all called from the Tk thread):
+        write(text): append decoded text to the widget
+        on_progress(fraction): loading progress, only reported for loads that
+            take more than one frame
+        on_done(): the whole file was written
+        on_error(exception): reading or decoding failed
+    """
+
+    def __init__(
+        self,
+        widget,
+        path: str,
+        encoding: str,
+        write: typing.Callable[[str], None],
+        on_done: typing.Callable[[], None] = None,
+        on_progress: typing.Callable[[float], None] = None,
+        on_error: typing.Callable[[Exception], None] = None,
+    ) -> None:
+        self.widget = widget
+        self.path = path
+        self.encoding = encoding
+        self.write = write
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+
+        self.size = 0
+        self.bytes_read = 0
+        self.cancelled = False
+        self.finished = False
+
+        self._queue: queue.Queue[str | Exception | None] = queue.Queue()
+        self._job = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def progress(self) -> float:
+        return min(self.bytes_read / self.size, 1.0) if self.size else 1.0
+
+    def start(self) -> None:
+        try:
+            self.size = os.path.getsize(self.path)
+        except OSError:
+            self.size = 0
+
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+        self._job = self.widget.after(FRAME_INTERVAL, self._pump)
+
+    def cancel(self) -> None:
+        """Stop reading and writing, content written so far stays"""
+        self.cancelled = True
+        if self._job:
+            try:
+                self.widget.after_cancel(self._job)
+            except Exception:
+                pass
+            self._job = None
+
+    def _read(self) -> None:
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(self.encoding)(), translate=True
+        )
+        try:
+            with open(self.path, "rb") as file:
+                while not self.cancelled:
+                    data = file.read(READ_SIZE)
+                    chunk = decoder.decode(data, final=not data)
+                    self.bytes_read += len(data)
+                    if chunk:
+                        self._queue.put(chunk)
+                    if not data:
+                        break
+        except Exception as e:
+            self._queue.put(e)
+            return
+        self._queue.put(None)
+
+    def _pump(self) -> None:
+        """Write the decoded chunks that fit in this frame's time budget"""
+        self._job = None
+        if self.cancelled:
+            return
+
+        deadline = time.perf_counter() + FRAME_BUDGET
+        done = error = None
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                done = True
+                break
+            if isinstance(chunk, Exception):
+                error = chunk
+                break
+
+            try:
+                self.write(chunk)
+            except Exception:
+                # widget was destroyed while loading
+                self.cancel()
+                return
+            if time.perf_counter() >= deadline:
+                break
+
+        if error:
+            self.cancel()
+            if self.on_error:
+                self.on_error(error)
+            return
+
+        if done:
+            self.finished = True
+            if self.on_done:
+                self.on_done()
+            return
+
+        if self.on_progress:
+            self.on_progress(self.progress)
+        self._job = self.widget.after(FRAME_INTERVAL, self._pump)
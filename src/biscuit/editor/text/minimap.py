@@ -6,23 +6,95 @@ import typing
 from biscuit.common.ui import Frame
 
 if typing.TYPE_CHECKING:
+    from typing import List, Sequence
+
     from . import TextEditor
     from .text import Text
 
+# width of the minimap, one pixel per column of text
+WIDTH = 100
+# height of a line of text in the minimap, in pixels
+LINE_HEIGHT = 2
+# lines rendered together into one cached image
+TILE_LINES = 64
+# tiles kept cached above and below the ones in view
+TILE_MARGIN = 2
+
+
+def line_colors(
+    line: str,
+    spans: Sequence[tuple[int, int | None, str]],
+    default: str,
+    tab_size: int = 4,
+    width: int = WIDTH,
+) -> List[str | None]:
+    """Color of each pixel column of a line, None for whitespace
+
+    Args:
+        line (str): Text of the line
+        spans (Sequence[tuple]): (start, end, color) of the highlighted parts
+            of the line, later ones drawn over earlier ones. An end of None
+            runs to the end of the line.
+        default (str): Color of the text that is not highlighted
+        tab_size (int, optional): Columns of a tab
+        width (int, optional): Columns shown, the rest of the line is cut"""
+
+    colors = [default] * len(line)
+    for start, end, color in spans:
+        end = len(line) if end is None else min(end, len(line))
+        colors[start:end] = [color] * (end - start)
+
+    if "\t" not in line:
+        return [c if not ch.isspace() else None for ch, c in zip(line[:width], colors)]
+
+    pixels = []
+    for ch, c in zip(line, colors):
+        if ch == "\t":
+            pixels += [None] * (tab_size - len(pixels) % tab_size)
+        else:
+            pixels.append(c if not ch.isspace() else None)
+        if len(pixels) >= width:
+            break
+    return pixels[:width]
+
+
+def minimap_top(first: float, last: float, lines: int, shown: int) -> int:
+    """First line shown in the minimap, moving through the file in proportion
+    to the scroll position of the editor
+
+    Args:
+        first (float): Top of the editor view, as a fraction of the file
+        last (float): Bottom of the editor view, as a fraction of the file
+        lines (int): Lines in the file
+        shown (int): Lines the minimap can show"""
+
+    if lines <= shown or last - first >= 1:
+        return 0
+    return min(round(first / (1 - (last - first)) * (lines - shown)), lines - shown)
+
 
-# TODO update minimap when scrollbar is used
-# TODO rewrite the handling with proper yview (percentage change)
 class Minimap(Frame):
+    """Minimap of the text editor
+
+    Lines are drawn as bars colored like their syntax highlighting, a pixel
+    per character. They are rendered in tiles of `TILE_LINES` lines into
+    cached images, and only the tiles of the part of the file the minimap can
+    show are rendered and kept. Edits and syntax tree changes mark the tiles
+    of their lines for rendering again, scrolling only moves the tiles.
+
+    The slider over the minimap marks the lines in view in the editor and can
+    be dragged to scroll."""
+
     def __init__(self, master: TextEditor, text: Text = None, *args, **kwargs) -> None:
         super().__init__(master, *args, **kwargs)
         self.tw = text
-        self.font = ("Arial", 1, "bold")
         self.config(highlightthickness=0, bg=self.base.theme.border)
 
         self.cw = tk.Canvas(
-            self, width=100, highlightthickness=0, **self.base.theme.editors.minimap
+            self, width=WIDTH, highlightthickness=0, **self.base.theme.editors.minimap
         )
         self.cw.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(1, 0))
+        self.bg = self.cw.cget("background")
 
         self.slider_image = tk.PhotoImage(
             data="""iVBORw0KGgoAAAANSUhEUgAAAG4AAABFCAYAAACrMNMO
@@ -32,71 +104,188 @@ class Minimap(Frame):
         KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIu6gNeAwIJ
         26ERewAAAABJRU5ErkJggg=="""
         )
-
         self.cw.create_image(0, 0, image=self.slider_image, anchor=tk.NW, tag="slider")
 
-        self.y_top_lim = 0
-        self._drag_data = {"y": 0, "item": None}
-        self.yvalue = 0
+        # tile -> (image, canvas item)
+        self.tiles: dict[int, tuple[tk.PhotoImage, int]] = {}
+        # tiles whose lines changed since they were rendered
+        self.dirty: set[int] = set()
+        # highlight tag -> color
+        self.colors: dict[str, str] = {}
+        self.top = 0
+        self._redraw_job = None
+        self._drag_data = {"y": 0, "first": 0.0, "scale": 0.0}
 
         self.cw.tag_bind("slider", "<ButtonPress-1>", self.drag_start)
         self.cw.tag_bind("slider", "<ButtonRelease-1>", self.drag_stop)
         self.cw.tag_bind("slider", "<B1-Motion>", self.drag)
 
-    def attach(self, textw):
+    def attach(self, textw: Text) -> None:
         self.tw = textw
+        self.tw.highlighter.ts.listeners.append(self.tree_changed)
+        self.clear()
 
-    def redraw(self):
-        self.cw.delete("redrawn")
+    def clear(self) -> None:
+        """Drop all the rendered tiles"""
 
-        if not self.tw:
+        for _, item in self.tiles.values():
+            self.cw.delete(item)
+        self.tiles.clear()
+        self.dirty.clear()
+        self.colors.clear()
+
+    def invalidate(self, start: int, end: int | None) -> None:
+        """Render the rows [start, end) again, up to the end of the file if
+        `end` is None"""
+
+        first = start // TILE_LINES
+        if end is None:
+            self.dirty.update(t for t in self.tiles if t >= first)
+        else:
+            self.dirty.update(range(first, (max(end, start + 1) - 1) // TILE_LINES + 1))
+
+    def content_changed(self, edit: dict | None) -> None:
+        """Mark the lines of an edit record for rendering, None for an
+        untracked edit. Edits adding or removing lines move the lines below."""
+
+        if edit is None:
+            self.invalidate(0, None)
             return
 
-        self.text = self.tw.get("1.0", tk.END)
-        self.cw.create_text(
-            5,
-            0,
-            text=self.text,
-            anchor=tk.NW,
-            font=self.font,
-            fill="grey",
-            tag="redrawn",
-        )
+        start = edit["start_point"][0]
+        old_end, new_end = edit["old_end_point"][0], edit["new_end_point"][0]
+        self.invalidate(start, None if old_end != new_end else new_end + 1)
 
-        self.y_bottom_lim = int(self.tw.index(tk.END).split(".")[0]) * 2 + 10
-        # self.y_bottom_lim = self.tw.yview()[1] * self.cw.winfo_height()
+    def tree_changed(self, start: int, end: int | None) -> None:
+        if end is None:
+            self.colors.clear()
+        self.invalidate(start, end)
+        self.schedule_redraw()
 
-    def redraw_cursor(self):
-        self.cw.delete("cursor")
+    def schedule_redraw(self) -> None:
+        if not self._redraw_job:
+            self._redraw_job = self.after_idle(self._idle_redraw)
+
+    def _idle_redraw(self) -> None:
+        try:
+            self.redraw()
+        except tk.TclError:
+            # editor was closed
+            self._redraw_job = None
 
+    def redraw(self) -> None:
+        """Render the tiles in view that are not rendered or changed, and move
+        the tiles, slider and cursor to the scroll position of the editor"""
+
+        self._redraw_job = None
         if not self.tw:
             return
 
-        y = int(self.tw.index(tk.INSERT).split(".")[0]) * 2
-        self.cw.create_line(0, y, 100, y, fill="#dc8c34", width=2, tag="cursor")
+        lines = self.tw.document.line_count
+        shown = self.cw.winfo_height() // LINE_HEIGHT + 1
+        first, last = self.tw.yview()
+        self.top = minimap_top(first, last, lines, shown)
 
-    def drag_start(self, event: tk.Event):
-        self._drag_data["item"] = self.cw.find_closest(event.x, event.y)[0]
-        self._drag_data["y"] = event.y
+        tiles = range(self.top // TILE_LINES, (self.top + shown) // TILE_LINES + 1)
+        last_tile = (lines - 1) // TILE_LINES
+        for tile in [
+            t
+            for t in self.tiles
+            if not tiles.start - TILE_MARGIN <= t < tiles.stop + TILE_MARGIN
+            or t > last_tile
+        ]:
+            self.cw.delete(self.tiles.pop(tile)[1])
+            self.dirty.discard(tile)
+
+        for tile in tiles:
+            if tile > last_tile:
+                break
+            if tile not in self.tiles or tile in self.dirty:
+                self.render(tile)
+            self.cw.coords(
+                self.tiles[tile][1], 0, (tile * TILE_LINES - self.top) * LINE_HEIGHT
+            )
+
+        self.cw.coords("slider", 0, (first * lines - self.top) * LINE_HEIGHT)
+        self.cw.tag_raise("slider")
+        self.redraw_cursor()
+
+    def render(self, tile: int) -> None:
+        """Render the lines of a tile into its image"""
+
+        start = tile * TILE_LINES
+        rows = list(self.tw.document.lines(start, start + TILE_LINES))
+        tags = self.tw.highlighter.ts.row_tags(start, start + len(rows))
+        default = self.tw.cget("foreground")
+
+        pixels = [
+            line_colors(
+                line,
+                [(s, e, self.color(tag)) for s, e, tag in spans],
+                default,
+                self.tw.tab_spaces,
+            )
+            for line, spans in zip(rows, tags)
+        ]
+
+        image = tk.PhotoImage(master=self.cw, width=WIDTH, height=TILE_LINES)
+        width = max(map(len, pixels), default=0)
+        if width:
+            bg = self.bg
+            image.put(
+                " ".join(
+                    "{" + " ".join([c or bg for c in row] + [bg] * (width - len(row))) + "}"
+                    for row in pixels
+                ),
+                to=(0, 0),
+            )
+        image = image.zoom(1, LINE_HEIGHT)
 
-    def drag_stop(self, event: tk.Event):
-        self._drag_data["item"] = None
-        self._drag_data["y"] = 0
+        if tile in self.tiles:
+            item = self.tiles[tile][1]
+            self.cw.itemconfigure(item, image=image)
+        else:
+            item = self.cw.create_image(0, 0, image=image, anchor=tk.NW, tag="tile")
+        self.tiles[tile] = (image, item)
+        self.dirty.discard(tile)
 
-    def drag(self, event: tk.Event):
-        item = self._drag_data["item"]
-        if item != 1:
+    def color(self, tag: str) -> str:
+        if tag not in self.colors:
+            self.colors[tag] = self.tw.tag_cget(tag, "foreground") or self.tw.cget(
+                "foreground"
+            )
+        return self.colors[tag]
+
+    def redraw_cursor(self) -> None:
+        self.cw.delete("cursor")
+
+        if not self.tw:
             return
 
-        delta_y = event.y - self._drag_data["y"]
-        self.cw.move(item, 0, delta_y)
+        y = (int(self.tw.index(tk.INSERT).split(".")[0]) - 1 - self.top) * LINE_HEIGHT
+        self.cw.create_line(0, y, WIDTH, y, fill="#dc8c34", width=2, tag="cursor")
+
+    def drag_start(self, event: tk.Event) -> None:
+        """Start dragging the slider, scrolling the editor by as much of the
+        file as the slider moves over the minimap"""
+
+        lines = self.tw.document.line_count
+        first, last = self.tw.yview()
+        visible = (last - first) * lines
+        track = min(self.cw.winfo_height(), lines * LINE_HEIGHT) - visible * LINE_HEIGHT
+
         self._drag_data["y"] = event.y
+        self._drag_data["first"] = first
+        self._drag_data["scale"] = (
+            (lines - visible) / track / lines if track > 0 and lines else 0.0
+        )
 
-        self.yvalue = y = self.cw.coords(item)[1]
-        if y <= self.y_top_lim:
-            self.cw.move("slider", 0, -(y - self.y_top_lim))
-        elif y >= self.y_bottom_lim:
-            self.cw.move("slider", 0, -(y - self.y_bottom_lim))
+    def drag_stop(self, _: tk.Event) -> None:
+        self._drag_data["scale"] = 0.0
+
+    def drag(self, event: tk.Event) -> None:
+        if not self._drag_data["scale"]:
+            return
 
-        self.tw.yview(int(y / self.cw.winfo_height() * 350))
-        self.tw.master.on_scroll()
+        delta = (event.y - self._drag_data["y"]) * self._drag_data["scale"]
+        self.tw.yview_moveto(max(0.0, self._drag_data["first"] + delta))
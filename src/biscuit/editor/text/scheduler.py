@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import time
+import typing
+
+from biscuit.common.frames import FRAME_BUDGET, FRAME_INTERVAL
+
+if typing.TYPE_CHECKING:
+    import tkinter as tk
+    from typing import Callable, Iterable, List
+
+
+class RenderTiming:
+    """How often a part of the editor was asked to redraw, how often it
+    actually did and how long that took"""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.runs = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.runs += 1
+        self.total += seconds
+        self.worst = max(self.worst, seconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.runs if self.runs else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.runs} runs, "
+            f"{self.mean * 1000:.2f} ms mean, {self.worst * 1000:.2f} ms worst, "
+            f"{self.total * 1000:.1f} ms total"
+        )
+
+
+class RenderScheduler:
+    """Redraws the parts of an editor at most once per frame
+
+    Events only mark the parts they affect as dirty, the dirty parts are
+    redrawn together once Tk is idle. A burst of events, eg. an arrow key
+    held down, is redrawn once instead of once per event. Parts are redrawn
+    in the order they are given in, the ones left when a flush runs over
+    `FRAME_BUDGET` wait for the next frame.
+
+    Args:
+        widget (tk.Misc): Widget the flushes are scheduled on
+        tasks (Iterable[tuple[str, Callable]]): Name and redraw function of
+            each part, most urgent first"""
+
+    def __init__(self, widget: tk.Misc, tasks: Iterable[tuple[str, Callable[[], None]]]) -> None:
+        self.widget = widget
+        self.tasks = dict(tasks)
+        self.dirty: set[str] = set()
+        self.timings = {name: RenderTiming() for name in self.tasks}
+        self._job = None
+
+    def mark(self, *names: str) -> None:
+        """Redraw the named parts in the next flush"""
+
+        for name in names:
+            self.timings[name].requests += 1
+        self.dirty.update(names)
+        if not self._job:
+            self._job = self.widget.after_idle(self.flush)
+
+    def flush(self) -> None:
+        """Redraw the dirty parts, most urgent first, within the frame budget"""
+
+        self._job = None
+        deadline = time.perf_counter() + FRAME_BUDGET
+        for name, task in self.tasks.items():
+            if name not in self.dirty:
+                continue
+            if time.perf_counter() > deadline:
+                if not self._job:
+                    self._job = self.widget.after(FRAME_INTERVAL, self.flush)
+                return
+
+            self.dirty.discard(name)
+            start = time.perf_counter()
+            try:
+                task()
+            finally:
+                self.timings[name].add(time.perf_counter() - start)
+
+    def cancel(self) -> None:
+        if self._job:
+            self.widget.after_cancel(self._job)
+            self._job = None
+        self.dirty.clear()
+
+    def report(self) -> List[str]:
+        """A line of timings for each part"""
+
+        return [f"{name}: {timing}" for name, timing in self.timings.items()]
+
+    def reset(self) -> None:
+        self.timings = {name: RenderTiming() for name in self.tasks}
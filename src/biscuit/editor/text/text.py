@@ -1,11 +1,9 @@
 from __future__ import annotations
 
 import os
-import queue
 import re
 import threading
 import tkinter as tk
-import tkinter.font as tkfont
 import typing
 from collections import deque
 from tkinter.messagebox import askokcancel
@@ -28,13 +26,19 @@ if typing.TYPE_CHECKING:
         WorkspaceEdits,
     )
 
+    from biscuit.editor.autocomplete.words import DocumentWords
+
     from . import TextEditor
 
 from biscuit.common import textutils
 from biscuit.common.ui import Text as BaseText
 
 from ..comment_prefix import get_comment_prefix
+from .document import Document
 from .highlighter import Highlighter
+from .indentguides import IndentTable
+from .loader import FileLoader
+from .undo import UndoStack
 from .vim import VimMode
 
 BRACKET_MAP = {"(": ")", "{": "}", "[": "]"}
@@ -75,12 +79,14 @@ class Text(BaseText):
         self.buffer_size = 4096
         self.bom = True
         self.current_word = None
-        self.words: list[str] = []
+        self.words: DocumentWords | None = None
         self.lsp: bool = False
         self.current_indent_level = 0
         self.insert_final_newline = False
+        # one frame per vertical run of guides, reused across redraws
         self.indent_guides: list[tk.Frame] = []
         self.indent_guide_pool: list[tk.Frame] = []
+        self._indent_guides_state = None
         self.active_indent_level = -1
         self.active_start_line = -1
         self.active_end_line = -1
@@ -102,7 +108,11 @@ class Text(BaseText):
             self.editorconfig = {}
 
         # self.last_change = Change(None, None, None, None, None)
-        self._pending_edit_info = None
+        # edits not yet seen by the highlighter, None for untracked edits
+        self._pending_edits: list[dict | None] = []
+        self._readonly = False
+        self.document = Document(self._read_document_text)
+        self.indent_table = IndentTable(self.document, self.tab_spaces)
         self.highlighter = Highlighter(self, language)
         if not self.standalone and not self.minimalist:
             self.base.statusbar.on_open_file(self)
@@ -131,9 +141,13 @@ class Text(BaseText):
 
         # modified event
         self.clear_modified_flag()
-        self._user_edit = True
-        self._edit_stack = []
-        self._edit_stack_index = -1
+
+        # undo-redo history of the edits (memory limit configured in MB)
+        self.undo_stack = UndoStack(self.base.config.undo_memory_limit * 1024 * 1024)
+        self._undo_separator = None
+        self._applying_undo = False
+
+        self.file_loader: FileLoader | None = None
 
         # Vim mode instance (None when disabled)
         self.vim: VimMode | None = None
@@ -211,6 +225,9 @@ class Text(BaseText):
 
         # undo-redo
         self.bind_all("<<Modified>>", self._been_modified)
+        # tk's class bindings would run its own (disabled) undo
+        self.bind("<<Undo>>", self.event_undo)
+        self.bind("<<Redo>>", self.event_redo)
 
         # pair completion
         self.bind("<parenleft>", self.open_bracket)
@@ -265,8 +282,6 @@ class Text(BaseText):
         self.tag_bind("hint", "<Leave>", self.base.diagnostic.hide)
 
     def key_release_events(self, event: tk.Event):
-        self._user_edit = True
-
         match event.keysym.lower():
             case (
                 "button-2"
@@ -317,71 +332,128 @@ class Text(BaseText):
             self.base.diagnostic.show(self, start, message, severity)
 
     def update_indent_guides(self) -> None:
+        """Draw the indent guides of the visible lines
+
+        Levels come from `indent_table`, guides are drawn as one frame per
+        vertical run. Skipped when neither the view, the indentation nor the
+        active block changed since the last draw."""
+
         if self.minimalist or not self.base.config.render_indent_guides:
-            for guide in self.indent_guides:
-                guide.place_forget()
-            self.indent_guide_pool.extend(self.indent_guides)
-            self.indent_guides = []
+            self._indent_guides_state = None
+            self._place_indent_guides([])
             return
 
         try:
             first_line = int(self.index("@0,0").split(".")[0])
             last_line = int(self.index(f"@0,{self.winfo_height()}").split(".")[0])
+            x_base, y_base, *_ = self.dlineinfo("@0,0") or (0, 0)
+            char_width = int(self.tk.call("font", "measure", self["font"], " "))
         except Exception:
             return
-        
-        # Buffer for smooth scrolling
-        first_line = max(1, first_line - 5)
-        last_line = min(int(self.index(tk.END).split(".")[0]), last_line + 5)
-
-        # Clear existing guides
-        for guide in self.indent_guides:
-            guide.place_forget()
-        self.indent_guide_pool.extend(self.indent_guides)
-        self.indent_guides = []
 
         self.get_active_block_info()
+        state = (
+            first_line,
+            last_line,
+            x_base,
+            y_base,
+            char_width,
+            self.indent_table.version,
+            self.active_indent_level,
+            self.active_start_line,
+            self.active_end_line,
+        )
+        if state == self._indent_guides_state:
+            return
+        self._indent_guides_state = state
+        self.char_width = char_width
+
+        lines: dict[int, tuple | None] = {}
+
+        def line_info(line: int) -> tuple | None:
+            if line not in lines:
+                # the first line may start above the view when wrapped
+                index = "@0,0" if line == first_line else f"{line}.0"
+                lines[line] = self.dlineinfo(index)
+            return lines[line]
+
+        guides = []
+        for level, start, end in self.indent_table.segments(first_line - 1, last_line - 1):
+            for start, end, active in self._split_active_block(level, start + 1, end + 1):
+                top, bottom = line_info(start), line_info(end)
+                if not top or not bottom:
+                    continue
+                col = level * self.tab_spaces
+                guides.append(
+                    (
+                        x_base + col * char_width,
+                        top[1],
+                        bottom[1] + bottom[3] - top[1],
+                        col,
+                        active,
+                    )
+                )
+        self._place_indent_guides(guides)
+
+    def _split_active_block(self, level: int, start: int, end: int):
+        """Split the run of lines at the edges of the active block, yields
+        (start, end, active) parts"""
+
+        if level != self.active_indent_level:
+            yield start, end, False
+            return
+
+        active_start = max(start, self.active_start_line)
+        active_end = min(end, self.active_end_line)
+        if active_start > active_end:
+            yield start, end, False
+            return
+        if start < active_start:
+            yield start, active_start - 1, False
+        yield active_start, active_end, True
+        if active_end < end:
+            yield active_end + 1, end, False
+
+    def _place_indent_guides(self, guides: list[tuple]) -> None:
+        """Place pooled frames for (x, y, height, col, active) guides and hide
+        the rest"""
 
-        # Cache indentation levels to handle empty lines better
-        indents = {}
-        for line_number in range(first_line, last_line + 1):
-            line = self.get(f"{line_number}.0", f"{line_number}.end")
-            if line.strip():
-                indents[line_number] = self.calculate_indent_level(line)
+        while len(self.indent_guides) < len(guides):
+            if self.indent_guide_pool:
+                guide = self.indent_guide_pool.pop()
             else:
-                indents[line_number] = -1 # Mark as empty
-
-        self.char_width = tkfont.Font(font=self["font"]).measure(" ")
-        for line_number in range(first_line, last_line + 1):
-            indent_level = indents[line_number]
-            if indent_level == -1:
-                prev_indent = 0
-                for l in range(line_number - 1, max(1, line_number - 50), -1):
-                    if l in indents and indents[l] != -1:
-                        prev_indent = indents[l]
-                        break
-                
-                next_indent = 0
-                for l in range(line_number + 1, min(last_line + 60, line_number + 50)):
-                    # Check beyond last_line if needed
-                    cached = indents.get(l)
-                    if cached is not None and cached != -1:
-                        next_indent = cached
-                        break
-                    elif cached is None:
-                        # Fetch and cache
-                        line = self.get(f"{l}.0", f"{l}.end")
-                        if line.strip():
-                            next_indent = self.calculate_indent_level(line)
-                            indents[l] = next_indent
-                            break
-                        else:
-                            indents[l] = -1
-                
-                indent_level = min(prev_indent, next_indent) if next_indent > 0 else prev_indent
-
-            if indent_level > 0:
-                self.add_indent_guides_to_line(line_number, indent_level)
+                guide = tk.Frame(self, width=1, highlightthickness=0, bd=0)
+                guide.bind(
+                    "<Button-1>",
+                    lambda e, guide=guide: self._indent_guide_click(guide, e),
+                )
+                guide.col = guide.active = None
+            self.indent_guides.append(guide)
+
+        for guide in self.indent_guides[len(guides) :]:
+            guide.place_forget()
+        self.indent_guide_pool.extend(self.indent_guides[len(guides) :])
+        del self.indent_guides[len(guides) :]
+
+        for guide, (x, y, height, col, active) in zip(self.indent_guides, guides):
+            guide.col = col
+            if guide.active != active:
+                guide.active = active
+                guide.config(
+                    bg=(
+                        self.base.theme.editors.indent_guide_active
+                        if active
+                        else self.base.theme.editors.indent_guide
+                    )
+                )
+            guide.place(x=x, y=y, width=1, height=height)
+
+    def _indent_guide_click(self, guide: tk.Frame, event: tk.Event) -> None:
+        """Move the cursor to the guide's column on the clicked line"""
+
+        line = self.index(f"@0,{event.y_root - self.winfo_rooty()}").split(".")[0]
+        text = self.get(f"{line}.0", f"{line}.end")
+        self.goto(f"{line}.{self.get_char_index_at_col(text, guide.col)}")
 
     def calculate_indent_level(self, line: str) -> int:
         expanded = line.expandtabs(self.tab_spaces)
@@ -399,41 +471,6 @@ class Text(BaseText):
                 current_col += 1
         return len(line)
 
-    def add_indent_guides_to_line(self, line_number: int, indent_level: int) -> None:
-        dline = self.dlineinfo(f"{line_number}.0")
-        if not dline:
-            return
-        
-        x_base, y, _, h, _ = dline
-        for level in range(indent_level):
-            col = level * self.tab_spaces
-            x = x_base + (col * self.char_width)
-            
-            # Use a frame from the pool or create a new one
-            if self.indent_guide_pool:
-                guide = self.indent_guide_pool.pop()
-            else:
-                guide = tk.Frame(self, width=1, highlightthickness=0, bd=0)
-            
-            guide.config(
-                bg=(
-                    self.base.theme.editors.indent_guide_active
-                    if (
-                        level == self.active_indent_level
-                        and self.active_start_line <= line_number <= self.active_end_line
-                    )
-                    else self.base.theme.editors.indent_guide
-                )
-            )
-            # Find char index for click-to-goto
-            line = self.get(f"{line_number}.0", f"{line_number}.end")
-            char_idx = self.get_char_index_at_col(line, col)
-            idx = f"{line_number}.{char_idx}"
-
-            guide.bind("<Button-1>", lambda _, idx=idx: self.goto(idx))
-            guide.place(x=x, y=y, width=1, height=h)
-            self.indent_guides.append(guide)
-
     def get_active_block_info(self) -> None:
         self.active_indent_level = -1
         self.active_start_line = -1
@@ -602,18 +639,17 @@ class Text(BaseText):
         self.update_completions()
 
     def update_words_list(self, *_):
-        if self.minimalist or self.lsp:
+        """Track the words of the document for completions without a language
+        server, they are kept in sync with the edits afterwards"""
+
+        if self.minimalist or self.standalone or self.lsp:
             return
 
-        try:
-            content = (
-                self.get(1.0, "insert-1c wordstart-1c")
-                + " "
-                + self.get("insert+1c", tk.END)
-            )
-            self.words = list(set(re.findall(r"\w+", content)))
-        except:
-            pass
+        if self.words and self.words.language != self.language:
+            self.words.close()
+            self.words = None
+        if not self.words:
+            self.words = self.autocomplete.word_index.open(self.language, self.document)
 
     def update_completions(self):
         """Helper function for `AutoComplete` popup.
@@ -796,23 +832,45 @@ class Text(BaseText):
         return "break"
 
     def refresh(self):
-        if self._pending_edit_info and hasattr(
-            self.highlighter, "incremental_highlight"
-        ):
-            self.highlighter.incremental_highlight(self._pending_edit_info)
-            self._pending_edit_info = None
-        else:
+        self.refresh_highlights()
+
+        if self.minimalist or self.standalone:
+            return
+
+        self.update_current_word()
+        self.refresh_outline()
+        self.refresh_cursor()
+        self.update_indent_guides()
+
+    def refresh_highlights(self):
+        """Highlight the edits made since the last refresh"""
+        if self._pending_edits:
+            edits, self._pending_edits = self._pending_edits, []
+            self.indent_table.apply(edits)
+            self.highlighter.incremental_highlight(edits)
+        elif not self.highlighter.ts.tree:
             self.highlighter.highlight()
         self.highlight_current_word()
 
+    def refresh_cursor(self):
+        """Highlight the line and the brackets at the cursor"""
         if self.minimalist or self.standalone:
             return
 
-        self.current_word = self.get("insert-1c wordstart", "insert")
-        self.base.language_server_manager.request_outline(self)
         self.highlight_current_line()
         self.highlight_current_brackets()
-        self.update_indent_guides()
+
+    def refresh_outline(self):
+        if self.minimalist or self.standalone:
+            return
+
+        self.base.language_server_manager.request_outline(self)
+
+    def update_current_word(self):
+        if self.minimalist or self.standalone:
+            return
+
+        self.current_word = self.get("insert-1c wordstart", "insert")
 
         # TODO send only portions of text on change to the LSPServer
         # current solution is not scalable, and will cause lag on large files
@@ -1138,12 +1196,7 @@ class Text(BaseText):
         self.encoding = self.encoding or self.detect_encoding(self.path)
         if self.path and self.exists:
             self.clear()
-            file = open(
-                self.path, "r", encoding=self.encoding, buffering=self.buffer_size
-            )
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,)).start()
-            self.process_queue(eol=eol)
+            self.stream_file()
         else:
             self.load_text(text, eol=eol)
         self.eol = eol
@@ -1158,18 +1211,7 @@ class Text(BaseText):
         try:
             self.encoding = encoding or self.encoding
             self.eol = eol or self.eol
-
-            file = open(
-                self.path,
-                "r",
-                buffering=self.buffer_size,
-                encoding=self.encoding,
-                newline=self.eol,
-            )
-
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,)).start()
-            self.process_queue()
+            self.stream_file()
         except Exception as e:
             print(e)
             if self.exists:
@@ -1197,14 +1239,8 @@ class Text(BaseText):
         self.clear()
         try:
             self.encoding = self.detect_encoding(self.path)
-            file = open(
-                self.path, "r", encoding=self.encoding, buffering=self.buffer_size
-            )
             self.eol = textutils.get_default_newline()
-
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,), daemon=True).start()
-            self.process_queue()
+            self.stream_file()
         except Exception as e:
             print(e)
             if self.exists:
@@ -1237,6 +1273,7 @@ class Text(BaseText):
                 chunk = "".join(buffer)
                 self.write(chunk)
                 self.update()
+            self.undo_stack.reset()
             if eol:
                 self.eol = eol
 
@@ -1245,48 +1282,76 @@ class Text(BaseText):
 
         threading.Thread(target=write_with_buffer, daemon=True).start()
 
-    def read_file(self, file: typing.TextIO):
-        while True:
-            try:
-                chunk = file.read(self.buffer_size)
-            except UnicodeDecodeError as e:
-                print(e)
-                self.master.unsupported_file()
-                return
-            if not chunk:
-                file.close()
-                self.queue.put(None)  # Signal the end of reading
-                break
-            self.queue.put(chunk)
+    def stream_file(self) -> None:
+        """Load the file content in the background, see `FileLoader`.
+
+        Chunks are written straight to the widget, bypassing change tracking;
+        highlighting and change handlers run once the whole file is loaded."""
+
+        self._stop_loading()
+        self.file_loader = FileLoader(
+            self,
+            self.path,
+            self.encoding,
+            self._write_loaded,
+            on_done=self._finish_loading,
+            on_progress=self._loading_progress,
+            on_error=self._loading_failed,
+        )
+        self.file_loader.start()
+
+    def cancel_loading(self) -> None:
+        """Stop loading the file, the part loaded so far is kept read-only"""
 
-    def process_queue(self, eol: str = None):
+        if not self.file_loader:
+            return
+
+        self._stop_loading()
+        self._finish_loading()
+        # saving a partially loaded file would truncate it
+        self.master.unsupported = True
+        self.master.editable = False
+        self.configure(state=tk.DISABLED)
+        self.base.notifications.info(f"Stopped loading {self.filename}, opened read-only")
+
+    def _stop_loading(self) -> None:
+        if self.file_loader:
+            self.file_loader.cancel()
+            self.file_loader = None
+        if not self.standalone:
+            self.base.statusbar.set_loading_progress(self, None)
+
+    def _write_loaded(self, chunk: str) -> None:
+        self.tk.call(self._orig, "insert", tk.END, chunk)
+        self.document.invalidate()
+
+    def _loading_progress(self, progress: float) -> None:
+        if not self.standalone:
+            self.base.statusbar.set_loading_progress(self, progress)
+
+    def _loading_failed(self, error: Exception) -> None:
+        print(error)
+        self._stop_loading()
+        self.master.unsupported_file()
+
+    def _finish_loading(self) -> None:
+        """Highlight and notify once the file content is in place"""
+
+        self._stop_loading()
+        self._pending_edits = []
+        self.document.invalidate()
+        self.indent_table.reset()
+        self.undo_stack.reset()
+        self.highlighter.highlight()
+        self._notify_lsp_change()
         try:
-            while True:
-                chunk = self.queue.get_nowait()
-                if chunk is None:
-                    # Finished loading file -- reached EOF 🚧
-                    try:
-                        self.master.on_change()
-                        self.master.on_scroll()
-                        self.update_idletasks()
-                        self.master.file_loaded()
-                        self.focus_set()
-                    except Exception:
-                        pass
-                    break
-                if eol:
-                    chunk.replace(self.eol or textutils.get_default_newline(), eol)
-
-                try:
-                    self.write(chunk)
-                    self.update()
-                    self.master.on_scroll()
-                except Exception:
-                    # editor was closed during file load
-                    return
-        except queue.Empty:
-            # If the queue is empty, schedule the next check after a short delay
-            self.master.after(100, self.process_queue)
+            self.master.on_change()
+            self.master.on_scroll()
+            self.update_idletasks()
+            self.master.file_loaded()
+            self.focus_set()
+        except Exception:
+            pass
 
     def custom_get(self, start: str, end: str) -> str:
         """Ignore the text that is tagged with 'ignore_tag' and return the rest of the text."""
@@ -1348,6 +1413,11 @@ class Text(BaseText):
         except:
             # most likely because app was closed
             pass
+        # a pending redraw would run after the widgets are gone
+        self.master.renderer.cancel()
+        if self.words:
+            self.words.close()
+            self.words = None
         self.base.language_server_manager.request_removal(self)
 
     def event_unmapped(self, _):
@@ -1582,47 +1652,74 @@ class Text(BaseText):
 
             self.tag_add(tag, "matchStart", "matchEnd")
 
+    def edit_undo(self):
+        self.stack_undo()
+
+    def edit_redo(self):
+        self.stack_redo()
+
+    def event_undo(self, *_):
+        self.stack_undo()
+        return "break"
+
+    def event_redo(self, *_):
+        self.stack_redo()
+        return "break"
+
     def stack_undo(self):
-        if self._edit_stack_index > 0:
-            self._edit_stack_index = self._edit_stack_index - 1
-            self._user_edit = False
-            self.clear()
-            self.write(self._edit_stack[self._edit_stack_index][0][:-1])
-            self.mark_set("insert", self._edit_stack[self._edit_stack_index][1])
+        self._apply_changes(self.undo_stack.undo())
 
     def stack_redo(self):
-        if self._edit_stack_index + 1 < len(self._edit_stack):
-            self._edit_stack_index = self._edit_stack_index + 1
-            self._user_edit = False
-            self.clear()
-            self.write(self._edit_stack[self._edit_stack_index][0][:-1])
-            self.mark_set("insert", self._edit_stack[self._edit_stack_index][1])
+        self._apply_changes(self.undo_stack.redo())
 
-    def _been_modified(self, event=None):
+    def _apply_changes(self, changes: list) -> None:
+        """Apply undo/redo changes in place, only the changed text is touched
+        so the highlighter and the document update incrementally."""
+
+        if not changes:
+            return
+
+        self._applying_undo = True
         try:
-            if self._user_edit:
-                text = self.get_all_text()
-                if (not self._edit_stack) or (
-                    text != self._edit_stack[self._edit_stack_index][0]
-                ):
-                    # real modified
-                    cursor_index = self.index(tk.INSERT)
-                    if (self._edit_stack_index + 1) != len(self._edit_stack):
-                        self._edit_stack = self._edit_stack[
-                            : self._edit_stack_index + 1
-                        ]
-                    self._edit_stack.append([text, cursor_index])
-                    self._edit_stack_index = self._edit_stack_index + 1
-                    if self._edit_stack_index > 200:
-                        self._edit_stack = self._edit_stack[
-                            self._edit_stack_index - 50 : self._edit_stack_index + 1
-                        ]
-                        self._edit_stack_index = len(self._edit_stack) - 1
-            if self._resetting_modified_flag:
-                return
-            self.clear_modified_flag()
-        except:
-            self.base.notifications.error("Edit stack error: please restart biscuit")
+            for change in changes:
+                start = "{}.{}".format(change.start[0] + 1, change.start[1])
+                if change.old_text:
+                    end = "{}.{}".format(change.old_end[0] + 1, change.old_end[1])
+                    self.delete(start, end)
+                if change.new_text:
+                    self.insert(start, change.new_text)
+        finally:
+            self._applying_undo = False
+
+        row, col = changes[-1].new_end
+        self.mark_set(tk.INSERT, f"{row + 1}.{col}")
+        self.see(tk.INSERT)
+
+    def _record_undo(self, edit_info: dict | None) -> None:
+        """Record a tracked edit in the undo history, untracked edits make the
+        recorded positions unreliable so the history is dropped"""
+
+        if self._applying_undo:
+            return
+        if not edit_info:
+            self.undo_stack.reset()
+            return
+
+        self.undo_stack.record(
+            edit_info["start_point"], edit_info["old_text"], edit_info["new_text"]
+        )
+        # edits made while handling the same event are undone together
+        if not self._undo_separator:
+            self._undo_separator = self.after_idle(self._separate_undo)
+
+    def _separate_undo(self) -> None:
+        self._undo_separator = None
+        self.undo_stack.separate()
+
+    def _been_modified(self, event=None):
+        if self._resetting_modified_flag:
+            return
+        self.clear_modified_flag()
 
     def clear_modified_flag(self):
         self._resetting_modified_flag = True
@@ -1654,14 +1751,34 @@ class Text(BaseText):
             ("yview", "scroll"),
         )
 
-    def _notify_lsp_change(self):
-        """Notify LSP server of content change if active."""
+    def _notify_lsp_change(self, edit: dict | None = None):
+        """Notify LSP server of content change if active, with the edit record
+        of the change or None to send the whole text."""
         if self.lsp:
             try:
-                self.base.language_server_manager.content_changed(self)
+                self.base.language_server_manager.content_changed(self, edit)
             except Exception:
                 pass
 
+    def _notify_words_change(self, edit: dict | None = None):
+        """Rescan the words of the lines of an edit record for completions"""
+        if self.words:
+            self.words.update(edit)
+
+    def _notify_minimap_change(self, edit: dict | None = None):
+        """Mark the minimap lines of an edit record for rendering"""
+        if not self.minimalist:
+            self.master.minimap.content_changed(edit)
+
+    def _notify_find_change(self, edit: dict | None = None):
+        """Keep the matches of find/replace in sync with the edit record of a
+        change, None if it was not tracked."""
+        if self.base.findreplace.active:
+            self.base.findreplace.content_changed(self, edit)
+
+    def _read_document_text(self) -> str:
+        return str(self.tk.call(self._orig, "get", "1.0", "end-1c"))
+
     def _proxy(self, *args):
         if args[0] in ("get", "delete") and self._is_sel_op_without_sel(args):
             return
@@ -1676,14 +1793,39 @@ class Text(BaseText):
             return
 
         if is_edit:
-            if edit_info:
-                self._finalize_edit_info(edit_info, args)
+            if edit_info and not self._readonly:
+                edit_info = self._finalize_edit_info(edit_info, args)
+            else:
+                edit_info = None
+                self.document.invalidate()
+                self._pending_edits.append(None)
+                self._record_undo(None)
             self.event_generate("<<Change>>", when="tail")
-            self._notify_lsp_change()
+            self._notify_lsp_change(edit_info)
+            self._notify_words_change(edit_info)
+            self._notify_minimap_change(edit_info)
+            self._notify_find_change(edit_info)
         elif args[0:3] == ("mark", "set", "insert"):
             self.event_generate("<<Change>>", when="tail")
         elif self._is_scroll_op(args):
             self.event_generate("<<Scroll>>", when="tail")
+        elif (
+            args[0] == "edit"
+            and args[1:2] in (("undo",), ("redo",))
+            and self.tk.getboolean(self.tk.call(self._orig, "cget", "-undo"))
+        ):
+            # tk's own undo stack edits the content behind the proxy,
+            # while it is off (the default) nothing was edited
+            self.document.invalidate()
+            self._pending_edits.append(None)
+            self._record_undo(None)
+            self._notify_lsp_change()
+            self._notify_words_change()
+            self._notify_minimap_change()
+            self._notify_find_change()
+        elif args[0] == "configure" and "-state" in args[1:-1:2]:
+            self._readonly = str(args[args.index("-state") + 1]) == tk.DISABLED
+            self.document.invalidate()
 
         return result
 
@@ -1697,25 +1839,22 @@ class Text(BaseText):
             return (0, 0)
 
     def _point_to_byte(self, point: tuple[int, int]) -> int:
-        """Compute byte offset from a (row, col) point.
-
-        Gets all text from start to the position in a single Tk call,
-        then computes its UTF-8 byte length.
-        """
+        """Compute byte offset from a (row, col) point using the document model."""
         try:
-            row, col = point
-            tk_index = f"{row + 1}.{col}"
-            text_before = self.tk.call(self._orig, "get", "1.0", tk_index)
-            return len(str(text_before).encode("utf-8"))
+            return self.document.point_to_byte(point)
         except Exception:
             return 0
 
+    def _edit_point(self, index: str) -> tuple[int, int]:
+        """Tree-sitter point of a Tk index, clamped to the content like Tk does for `end`."""
+        return self.document.clamp(self._tk_index_to_point(index))
+
     def _capture_edit_info_before(self, args) -> dict | None:
         """Capture position info before an edit operation executes."""
         try:
             if args[0] == "insert":
                 # args: ("insert", index, text, ?tags, ?text, ?tags, ...)
-                start_point = self._tk_index_to_point(args[1])
+                start_point = self._edit_point(args[1])
                 start_byte = self._point_to_byte(start_point)
                 return {
                     "op": "insert",
@@ -1724,15 +1863,16 @@ class Text(BaseText):
                     "start_point": start_point,
                     "old_end_point": start_point,
                 }
-            elif args[0] == "delete":
+            elif args[0] == "delete" and len(args) <= 3:
                 # args: ("delete", start, ?end)
-                start_point = self._tk_index_to_point(args[1])
+                start_point = self._edit_point(args[1])
                 start_byte = self._point_to_byte(start_point)
                 if len(args) > 2:
-                    end_point = self._tk_index_to_point(args[2])
+                    end_point = self._edit_point(args[2])
                 else:
                     # Single char delete
-                    end_point = self._tk_index_to_point(f"{args[1]} +1c")
+                    end_point = self._edit_point(f"{args[1]} +1c")
+                end_point = max(start_point, end_point)
                 end_byte = self._point_to_byte(end_point)
                 return {
                     "op": "delete",
@@ -1743,9 +1883,9 @@ class Text(BaseText):
                 }
             elif args[0] == "replace":
                 # args: ("replace", start, end, text)
-                start_point = self._tk_index_to_point(args[1])
+                start_point = self._edit_point(args[1])
                 start_byte = self._point_to_byte(start_point)
-                end_point = self._tk_index_to_point(args[2])
+                end_point = max(start_point, self._edit_point(args[2]))
                 end_byte = self._point_to_byte(end_point)
                 return {
                     "op": "replace",
@@ -1758,59 +1898,40 @@ class Text(BaseText):
             pass
         return None
 
-    def _finalize_edit_info(self, edit_info: dict, args) -> None:
-        """Compute new_end after the edit and store as pending edit info."""
+    def _finalize_edit_info(self, edit_info: dict, args) -> dict | None:
+        """Compute new_end after the edit, mirror it into the document model
+        and queue it for the highlighter. Returns the completed edit info, None
+        if it couldn't be tracked."""
         try:
             if edit_info["op"] == "insert":
-                # Compute new end from inserted text
                 # Collect all text parts (args may have: index, text, tags, text, tags, ...)
-                texts = []
-                i = 2
-                while i < len(args):
-                    texts.append(str(args[i]))
-                    i += 2  # skip tags
-                inserted = "".join(texts)
-                inserted_bytes = len(inserted.encode("utf-8"))
-                new_end_byte = edit_info["start_byte"] + inserted_bytes
-                # Compute new end point
-                lines = inserted.split("\n")
-                if len(lines) == 1:
-                    new_end_point = (
-                        edit_info["start_point"][0],
-                        edit_info["start_point"][1] + len(lines[0]),
-                    )
-                else:
-                    new_end_point = (
-                        edit_info["start_point"][0] + len(lines) - 1,
-                        len(lines[-1]),
-                    )
-                edit_info["new_end_byte"] = new_end_byte
-                edit_info["new_end_point"] = new_end_point
-
-            elif edit_info["op"] == "delete":
+                new_text = "".join(str(args[i]) for i in range(2, len(args), 2))
+            elif edit_info["op"] == "replace":
+                new_text = str(args[3]) if len(args) > 3 else ""
+            else:
                 # After delete, new end = start (deleted region collapsed)
-                edit_info["new_end_byte"] = edit_info["start_byte"]
-                edit_info["new_end_point"] = edit_info["start_point"]
+                new_text = ""
 
-            elif edit_info["op"] == "replace":
-                # Compute new end from replacement text
-                replacement = str(args[3]) if len(args) > 3 else ""
-                replacement_bytes = len(replacement.encode("utf-8"))
-                new_end_byte = edit_info["start_byte"] + replacement_bytes
-                lines = replacement.split("\n")
-                if len(lines) == 1:
-                    new_end_point = (
-                        edit_info["start_point"][0],
-                        edit_info["start_point"][1] + len(lines[0]),
-                    )
-                else:
-                    new_end_point = (
-                        edit_info["start_point"][0] + len(lines) - 1,
-                        len(lines[-1]),
-                    )
-                edit_info["new_end_byte"] = new_end_byte
-                edit_info["new_end_point"] = new_end_point
+            start_row, start_col = edit_info["start_point"]
+            lines = new_text.split("\n")
+            if len(lines) == 1:
+                new_end_point = (start_row, start_col + len(lines[0]))
+            else:
+                new_end_point = (start_row + len(lines) - 1, len(lines[-1]))
+
+            edit_info["new_end_byte"] = edit_info["start_byte"] + len(
+                new_text.encode("utf-8")
+            )
+            edit_info["new_end_point"] = new_end_point
+            edit_info["new_text"] = new_text
+            edit_info["old_text"] = self.document.replace(
+                edit_info["start_point"], edit_info["old_end_point"], new_text
+            )
 
-            self._pending_edit_info = edit_info
+            self._pending_edits.append(edit_info)
+            self._record_undo(edit_info)
+            return edit_info
         except Exception:
-            self._pending_edit_info = None
+            self.document.invalidate()
+            self._pending_edits.append(None)
+            self._record_undo(None)
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import os
+import threading
 import tkinter as tk
 import typing
+from collections import defaultdict
+from contextlib import contextmanager
 from pathlib import Path
 
 if typing.TYPE_CHECKING:
@@ -11,8 +14,8 @@ if typing.TYPE_CHECKING:
     from .text import Text
 
 try:
-    from tree_sitter import Parser, Query, QueryCursor
-    from tree_sitter_language_pack import get_language, get_parser
+    from tree_sitter import Language, Parser, Query, QueryCursor
+    from tree_sitter_language_pack import get_language
 
     TREE_SITTER_AVAILABLE = True
 except ImportError:
@@ -220,6 +223,178 @@ LANGUAGE_DISPLAY_NAMES = {
 
 QUERIES_DIR = Path(__file__).parent / "queries"
 
+# Files with more lines than this are highlighted viewport first, the rest is
+# filled in the background during idle time
+LAZY_HIGHLIGHT_LINES = 2000
+# Lines around the viewport that are highlighted together with it
+VIEWPORT_MARGIN = 100
+# Lines highlighted per idle callback when filling in the background
+FILL_BATCH_LINES = 1000
+
+
+class LineRanges:
+    """Sorted set of disjoint [start, end) line ranges.
+
+    Used by the highlighter to track the lines that still need highlighting."""
+
+    def __init__(self) -> None:
+        self.ranges: list[tuple[int, int]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.ranges)
+
+    def __iter__(self):
+        return iter(list(self.ranges))
+
+    def clear(self) -> None:
+        self.ranges = []
+
+    def add(self, start: int, end: int) -> None:
+        if start >= end:
+            return
+
+        ranges = []
+        for s, e in self.ranges:
+            if e < start or s > end:
+                ranges.append((s, e))
+            else:
+                start, end = min(s, start), max(e, end)
+        ranges.append((start, end))
+        ranges.sort()
+        self.ranges = ranges
+
+    def discard(self, start: int, end: int) -> None:
+        ranges = []
+        for s, e in self.ranges:
+            if e <= start or s >= end:
+                ranges.append((s, e))
+                continue
+            if s < start:
+                ranges.append((s, start))
+            if e > end:
+                ranges.append((end, e))
+        self.ranges = ranges
+
+    def intersection(self, start: int, end: int) -> list[tuple[int, int]]:
+        return [
+            (max(s, start), min(e, end))
+            for s, e in self.ranges
+            if s < end and e > start
+        ]
+
+    def shift(self, start_row: int, old_end_row: int, new_end_row: int) -> None:
+        """Move the ranges after an edit that replaced the rows
+        start_row..old_end_row with start_row..new_end_row"""
+
+        delta = new_end_row - old_end_row
+        if not delta:
+            return
+
+        def move(row: int) -> int:
+            return row if row <= start_row else max(row + delta, start_row + 1)
+
+        ranges, self.ranges = self.ranges, []
+        for s, e in ranges:
+            self.add(move(s), move(e))
+
+    def next_batch(self, near: int, size: int) -> tuple[int, int] | None:
+        """Next range of at most size lines, preferring the lines after `near`"""
+
+        if not self.ranges:
+            return None
+
+        for s, e in self.ranges:
+            if e > near:
+                s = max(s, near)
+                return s, min(e, s + size)
+
+        s, e = self.ranges[-1]
+        return max(s, e - size), e
+
+
+class CachedLanguage:
+    """Tree-sitter objects for one language, shared by all editors
+
+    Holds the Language, the compiled highlight query and a pool of parsers.
+    Parsers are only borrowed for the duration of a parse, so any number of
+    editors can share a handful of them."""
+
+    def __init__(self, name: str, language: Language, query: Query | None) -> None:
+        self.name = name
+        self.language = language
+        self.query = query
+        self._parsers: list[Parser] = []
+
+    @contextmanager
+    def parser(self) -> typing.Iterator[Parser]:
+        """Borrow a parser from the pool, a new one is created if all are in use"""
+        try:
+            parser = self._parsers.pop()
+        except IndexError:
+            parser = Parser(self.language)
+
+        try:
+            yield parser
+        finally:
+            self._parsers.append(parser)
+
+
+class LanguageCache:
+    """Process-wide cache of `CachedLanguage` by language key
+
+    Languages are loaded lazily on first use, or ahead of time in a background
+    thread with `warm`. Languages that fail to load are remembered as well, so
+    unknown keys are only probed once."""
+
+    def __init__(self) -> None:
+        self._languages: dict[str, CachedLanguage | None] = {}
+        self._locks: dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedLanguage | None:
+        """Cached language for the key, None if it is not available"""
+        if key in self._languages:
+            return self._languages[key]
+
+        with self._lock:
+            lock = self._locks[key]
+        # per language, so loading one language doesn't block the others
+        with lock:
+            if key not in self._languages:
+                self._languages[key] = self._load(key)
+        return self._languages[key]
+
+    def _load(self, key: str) -> CachedLanguage | None:
+        if not TREE_SITTER_AVAILABLE:
+            return None
+
+        try:
+            language = get_language(key)
+        except Exception:
+            return None
+
+        query = None
+        query_path = QUERIES_DIR / key / "highlights.scm"
+        try:
+            if query_path.exists():
+                query = Query(language, query_path.read_text(encoding="utf-8"))
+        except Exception:
+            pass
+        return CachedLanguage(key, language, query)
+
+    def warm(self, keys: typing.Iterable[str]) -> threading.Thread:
+        """Load the languages in a background thread"""
+        thread = threading.Thread(target=self._warm, args=(list(keys),), daemon=True)
+        thread.start()
+        return thread
+
+    def _warm(self, keys: list[str]) -> None:
+        for key in keys:
+            self.get(LANGUAGE_ALIAS_MAP.get(key, key))
+
+
+language_cache = LanguageCache()
+
 
 class TreeSitterHighlighter:
     """Syntax highlighter using Tree-sitter for incremental parsing.
@@ -232,12 +407,21 @@ class TreeSitterHighlighter:
     def __init__(self, text: Text, language: str = None, *args, **kwargs) -> None:
         self.text: Text = text
         self.base: App = text.base
-        self.parser: Parser | None = None
+        self.language: CachedLanguage | None = None
         self.tree = None
         self.query: Query | None = None
         self.language_name: str | None = None
         self.tag_colors: dict = self.base.theme.treesitter_syntax
 
+        # lines that are not highlighted yet (only used for large files)
+        self.pending = LineRanges()
+        self._fill_job = None
+        # tags that may be present in the text, the only ones worth clearing
+        self._applied_tags: set[str] = set()
+        # called with the rows [start, end) whose syntax tree changed, with
+        # (0, None) when the whole text was parsed again
+        self.listeners: list[typing.Callable[[int, int | None], None]] = []
+
         if not TREE_SITTER_AVAILABLE:
             return
 
@@ -245,22 +429,15 @@ class TreeSitterHighlighter:
         self.setup_highlight_tags()
 
     def _setup_language(self, language: str = None) -> None:
-        """Initialize parser and highlight query for the given language."""
+        """Look up the shared parser pool and highlight query for the language."""
         lang_key = self._resolve_language(language)
         if not lang_key:
             return
 
-        try:
-            self.parser = get_parser(lang_key)
-            ts_language = get_language(lang_key)
-            query_text = self._load_highlight_query(lang_key)
-            if query_text:
-                self.query = Query(ts_language, query_text)
+        self.language = language_cache.get(lang_key)
+        if self.language:
+            self.query = self.language.query
             self.language_name = lang_key
-        except Exception:
-            self.parser = None
-            self.query = None
-            self.language_name = None
 
     def _resolve_language(self, language: str = None) -> str | None:
         """Map filename extension or language name to a language-pack key."""
@@ -289,18 +466,7 @@ class TreeSitterHighlighter:
 
     def _is_valid_language(self, key: str) -> bool:
         """Check if a language key is available in tree-sitter-language-pack."""
-        try:
-            get_language(key)
-            return True
-        except Exception:
-            return False
-
-    def _load_highlight_query(self, lang_key: str) -> str | None:
-        """Load highlights.scm from the bundled queries directory."""
-        query_path = QUERIES_DIR / lang_key / "highlights.scm"
-        if query_path.exists():
-            return query_path.read_text(encoding="utf-8")
-        return None
+        return language_cache.get(key) is not None
 
     def get_display_name(self) -> str:
         """Get human-readable language name for statusbar."""
@@ -333,93 +499,208 @@ class TreeSitterHighlighter:
 
     def clear(self) -> None:
         """Remove all Tree-sitter highlight tags."""
-        for capture_name in self.tag_colors:
-            self.text.tag_remove(f"ts.{capture_name}", "1.0", tk.END)
+        self._cancel_fill()
+        self.pending.clear()
+        self._clear_ranges(["1.0", tk.END])
+        self._applied_tags.clear()
+
+    def _clear_ranges(self, indices: list[str]) -> None:
+        """Remove the highlight tags from all the given index pairs at once.
+
+        Tk accepts any number of ranges for `tag remove`, so this is a single
+        Tcl call per tag in use instead of one per tag and range."""
+        for tag in self._applied_tags:
+            self.text.tk.call(self.text._w, "tag", "remove", tag, *indices)
+
+    @property
+    def lazy(self) -> bool:
+        """Whether the file is big enough to be highlighted viewport first"""
+        return self.text.document.line_count > LAZY_HIGHLIGHT_LINES
 
     def highlight(self) -> None:
-        """Full parse and highlight (used on file load / language change)."""
-        if not self.parser or not self.query:
+        """Full parse and highlight (used on file load / language change).
+
+        Large files only get the visible lines highlighted right away, the
+        rest of the file is queued up and filled in during idle time."""
+        if not self.language or not self.query:
             return
 
-        code = self.text.get_all_text()
-        code_bytes = code.encode("utf-8")
-        self.tree = self.parser.parse(code_bytes)
-        self._apply_highlights_full()
+        with self.language.parser() as parser:
+            self.tree = parser.parse(self.text.document.read)
+        self.clear()
+        self._notify(0, None)
+
+        self.pending.add(0, self.text.document.line_count)
+        self._highlight_pending()
 
-    def incremental_highlight(self, edit_info: dict) -> None:
-        """Incremental parse after an edit for fast updates.
+    def incremental_highlight(self, edits: list[dict]) -> None:
+        """Incremental parse after one or more edits for fast updates.
 
         Args:
-            edit_info: dict with keys: start_byte, old_end_byte, new_end_byte,
-                       start_point, old_end_point, new_end_point
+            edits: edit info dicts (in the order they were made) with keys:
+                start_byte, old_end_byte, new_end_byte, start_point,
+                old_end_point, new_end_point. `None` marks an edit that
+                couldn't be tracked, forcing a full highlight.
         """
-        if not self.tree or not self.parser or not self.query:
+        if not self.tree or not self.language or not self.query or None in edits:
             self.highlight()
             return
 
-        self.tree.edit(
-            start_byte=edit_info["start_byte"],
-            old_end_byte=edit_info["old_end_byte"],
-            new_end_byte=edit_info["new_end_byte"],
-            start_point=edit_info["start_point"],
-            old_end_point=edit_info["old_end_point"],
-            new_end_point=edit_info["new_end_point"],
-        )
+        # edited lines are always refreshed, tree-sitter only reports
+        # the ranges where the syntax tree structure changed
+        dirty = LineRanges()
+        for edit_info in edits:
+            self.tree.edit(
+                start_byte=edit_info["start_byte"],
+                old_end_byte=edit_info["old_end_byte"],
+                new_end_byte=edit_info["new_end_byte"],
+                start_point=edit_info["start_point"],
+                old_end_point=edit_info["old_end_point"],
+                new_end_point=edit_info["new_end_point"],
+            )
+            rows = (
+                edit_info["start_point"][0],
+                edit_info["old_end_point"][0],
+                edit_info["new_end_point"][0],
+            )
+            dirty.shift(*rows)
+            self.pending.shift(*rows)
+            dirty.add(rows[0], rows[2] + 1)
+
+        # parse through the read callback so the document isn't re-encoded as a whole
+        with self.language.parser() as parser:
+            new_tree = parser.parse(self.text.document.read, self.tree)
+        for r in self.tree.changed_ranges(new_tree):
+            dirty.add(r.start_point[0], r.end_point[0] + 1)
+        self.tree = new_tree
 
-        code_bytes = self.text.get_all_text().encode("utf-8")
-        new_tree = self.parser.parse(code_bytes, self.tree)
+        for start, end in dirty:
+            self.pending.add(start, end)
+            self._notify(start, end)
+        self._highlight_pending()
 
-        changed_ranges = self.tree.changed_ranges(new_tree)
-        self.tree = new_tree
+    def _notify(self, start: int, end: int | None) -> None:
+        for listener in self.listeners:
+            listener(start, end)
+
+    def row_tags(self, start: int, end: int) -> list[list[tuple[int, int | None, str]]]:
+        """Highlight tags of each row in [start, end), as (start column, end
+        column, tag) spans in capture order. The end column of a span running
+        on to the next row is None.
 
-        if changed_ranges:
-            self._apply_highlights_incremental(changed_ranges)
-        # If no changed ranges detected, skip (nothing visually changed)
+        Read from the syntax tree, so rows not highlighted yet are included."""
+        rows = [[] for _ in range(start, end)]
+        if not self.tree or not self.query or start >= end:
+            return rows
 
-    def _apply_highlights_full(self) -> None:
-        """Clear all tags and re-apply highlights from scratch."""
-        # Clear all existing tree-sitter tags
-        for capture_name in self.tag_colors:
-            self.text.tag_remove(f"ts.{capture_name}", "1.0", tk.END)
+        cursor = QueryCursor(self.query)
+        cursor.set_point_range((start, 0), (end, 0))
+        for capture_name, nodes in cursor.captures(self.tree.root_node).items():
+            tag = self._resolve_tag(capture_name)
+            if not tag:
+                continue
+            for node in nodes:
+                (srow, scol), (erow, ecol) = node.start_point, node.end_point
+                for row in range(max(srow, start), min(erow + 1, end)):
+                    rows[row - start].append(
+                        (
+                            scol if row == srow else 0,
+                            ecol if row == erow else None,
+                            tag,
+                        )
+                    )
+        return rows
+
+    def fill_viewport(self) -> None:
+        """Highlight pending lines that scrolled into view."""
+        if self.pending and self.tree:
+            self._highlight_pending()
+
+    def _visible_rows(self) -> tuple[int, int]:
+        """Rows in and around the viewport, all rows for small files"""
+        if not self.lazy:
+            return 0, self.text.document.line_count
 
+        try:
+            first = int(self.text.index("@0,0").split(".")[0]) - 1
+            last = int(
+                self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0]
+            )
+        except tk.TclError:
+            first = last = 0
+        return max(0, first - VIEWPORT_MARGIN), last + VIEWPORT_MARGIN
+
+    def _highlight_pending(self) -> None:
+        """Highlight the pending lines in view now and schedule the rest."""
+        ranges = self.pending.intersection(*self._visible_rows())
+        if ranges:
+            self._highlight_ranges(ranges)
+
+        self._schedule_fill()
+
+    def _schedule_fill(self) -> None:
+        self._cancel_fill()
+        if self.pending:
+            self._fill_job = self.text.after_idle(self._fill_step)
+
+    def _cancel_fill(self) -> None:
+        if self._fill_job:
+            try:
+                self.text.after_cancel(self._fill_job)
+            except tk.TclError:
+                pass
+            self._fill_job = None
+
+    def _fill_step(self) -> None:
+        """Highlight one batch of pending lines, continuing from the viewport."""
+        self._fill_job = None
         if not self.tree or not self.query:
             return
 
-        cursor = QueryCursor(self.query)
-        captures = cursor.captures(self.tree.root_node)
+        _, near = self._visible_rows()
+        batch = self.pending.next_batch(near, FILL_BATCH_LINES)
+        if not batch:
+            return
 
+        try:
+            self._highlight_ranges([batch])
+        except tk.TclError:
+            # editor was closed
+            return
+        self._schedule_fill()
+
+    def _highlight_ranges(self, ranges: list[tuple[int, int]]) -> None:
+        """Clear and re-apply highlights for the line ranges [start, end)."""
+        indices = []
+        for start_row, end_row in ranges:
+            self.pending.discard(start_row, end_row)
+            indices += (f"{start_row + 1}.0", f"{end_row + 1}.0")
+        self._clear_ranges(indices)
+
+        cursor = QueryCursor(self.query)
+        tag_indices = defaultdict(list)
+        for start_row, end_row in ranges:
+            cursor.set_point_range((start_row, 0), (end_row, 0))
+            self._collect_captures(cursor.captures(self.tree.root_node), tag_indices)
+        self._apply_tags(tag_indices)
+
+    def _collect_captures(self, captures: dict, tag_indices: dict) -> None:
+        """Group the captured node ranges by the tag they resolve to."""
         for capture_name, nodes in captures.items():
             tag = self._resolve_tag(capture_name)
             if not tag:
                 continue
+            indices = tag_indices[tag]
             for node in nodes:
-                start = f"{node.start_point[0] + 1}.{node.start_point[1]}"
-                end = f"{node.end_point[0] + 1}.{node.end_point[1]}"
-                self.text.tag_add(tag, start, end)
-
-    def _apply_highlights_incremental(self, changed_ranges) -> None:
-        """Re-highlight only the changed ranges for speed."""
-        # Clear tags in changed regions
-        for r in changed_ranges:
-            start = f"{r.start_point[0] + 1}.{r.start_point[1]}"
-            end = f"{r.end_point[0] + 1}.{r.end_point[1]}"
-            for capture_name in self.tag_colors:
-                self.text.tag_remove(f"ts.{capture_name}", start, end)
-
-        # Re-apply highlights in changed regions
-        for r in changed_ranges:
-            cursor = QueryCursor(self.query)
-            cursor.set_byte_range(r.start_byte, r.end_byte)
-            captures = cursor.captures(self.tree.root_node)
-
-            for capture_name, nodes in captures.items():
-                tag = self._resolve_tag(capture_name)
-                if not tag:
-                    continue
-                for node in nodes:
-                    start = f"{node.start_point[0] + 1}.{node.start_point[1]}"
-                    end = f"{node.end_point[0] + 1}.{node.end_point[1]}"
-                    self.text.tag_add(tag, start, end)
+                (srow, scol), (erow, ecol) = node.start_point, node.end_point
+                indices += (f"{srow + 1}.{scol}", f"{erow + 1}.{ecol}")
+
+    def _apply_tags(self, tag_indices: dict) -> None:
+        """Add each tag to all of its ranges with one multi-range `tag add`."""
+        for tag, indices in tag_indices.items():
+            if indices:
+                self.text.tag_add(tag, *indices)
+                self._applied_tags.add(tag)
 
     def _resolve_tag(self, capture_name: str) -> str | None:
         """Resolve a capture name to a Tkinter tag, with fallback to parent."""
@@ -439,7 +720,7 @@ class TreeSitterHighlighter:
         """Re-detect language from filename and refresh highlighting."""
         old_lang = self.language_name
         self.language_name = None
-        self.parser = None
+        self.language = None
         self.query = None
         self.tree = None
 
@@ -452,7 +733,7 @@ class TreeSitterHighlighter:
     def change_language(self, language: str) -> None:
         """Switch to a different language and re-highlight."""
         self.language_name = None
-        self.parser = None
+        self.language = None
         self.query = None
         self.tree = None
 
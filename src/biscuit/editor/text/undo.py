@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import time
+
+from .changes import Change
+
+# consecutive typing is merged into one undo step while the pause between
+# keystrokes stays below this many seconds
+COALESCE_TIMEOUT = 1.0
+# rough per-change bookkeeping cost counted against the memory limit
+CHANGE_OVERHEAD = 200
+
+
+def end_point(start: tuple[int, int], text: str) -> tuple[int, int]:
+    """Point where `text` ends when inserted at start"""
+
+    row, col = start
+    lines = text.split("\n")
+    if len(lines) == 1:
+        return row, col + len(text)
+    return row + len(lines) - 1, len(lines[-1])
+
+
+def make_change(start: tuple[int, int], old_text: str, new_text: str) -> Change:
+    return Change(
+        start=start,
+        old_end=end_point(start, old_text),
+        new_end=end_point(start, new_text),
+        old_text=old_text,
+        new_text=new_text,
+    )
+
+
+def inverse(change: Change) -> Change:
+    """Change that reverts the given change"""
+
+    return make_change(change.start, change.new_text, change.old_text)
+
+
+def change_size(change: Change) -> int:
+    return len(change.old_text) + len(change.new_text) + CHANGE_OVERHEAD
+
+
+class UndoStack:
+    """Operation log for undo/redo
+
+    Records the changes made to the text rather than snapshots of it, so memory
+    grows with the size of the edits and undo applies the inverse change in
+    place. Changes recorded until `separate` is called form one undo step, and
+    a run of typing or deleting characters is coalesced into a single change.
+
+    Oldest steps are dropped once the recorded text exceeds `memory_limit`
+    (in bytes, counting one byte per character)."""
+
+    def __init__(self, memory_limit: int) -> None:
+        self.memory_limit = memory_limit
+        self.undo_steps: list[list[Change]] = []
+        self.redo_steps: list[list[Change]] = []
+        self.size = 0
+
+        # whether the last step still accepts changes
+        self._open = False
+        self._last_time = 0.0
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_steps)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_steps)
+
+    def reset(self) -> None:
+        self.undo_steps.clear()
+        self.redo_steps.clear()
+        self.size = 0
+        self._open = False
+
+    def separate(self) -> None:
+        """Close the current undo step, later changes start a new one"""
+
+        self._open = False
+
+    def record(self, start: tuple[int, int], old_text: str, new_text: str) -> None:
+        """Record that the text between start and the end of old_text was
+        replaced by new_text"""
+
+        if not old_text and not new_text:
+            return
+
+        now = time.monotonic()
+        change = make_change(start, old_text, new_text)
+
+        for step in self.redo_steps:
+            self.size -= sum(map(change_size, step))
+        self.redo_steps.clear()
+
+        recent = self._open or now - self._last_time < COALESCE_TIMEOUT
+        if not (self.undo_steps and recent and self._coalesce(change)):
+            if self.undo_steps and self._open:
+                self.undo_steps[-1].append(change)
+            else:
+                self.undo_steps.append([change])
+            self.size += change_size(change)
+
+        self._open = True
+        self._last_time = now
+        self._enforce_limit()
+
+    def _coalesce(self, change: Change) -> bool:
+        """Merge a single line insert or delete into the previous change when it
+        continues it, returns whether it was merged"""
+
+        last = self.undo_steps[-1][-1]
+        if "\n" in change.old_text + change.new_text:
+            return False
+        if last.old_text and last.new_text or change.old_text and change.new_text:
+            return False
+
+        if change.new_text and last.new_text and change.start == last.new_end:
+            # typing, a new word starts a new step
+            if change.new_text[0].isspace() and not last.new_text[-1].isspace():
+                return False
+            merged = make_change(last.start, "", last.new_text + change.new_text)
+        elif change.old_text and last.old_text and change.old_end == last.start:
+            # backspace
+            merged = make_change(change.start, change.old_text + last.old_text, "")
+        elif change.old_text and last.old_text and change.start == last.start:
+            # forward delete
+            merged = make_change(last.start, last.old_text + change.old_text, "")
+        else:
+            return False
+
+        self.size += change_size(merged) - change_size(last)
+        self.undo_steps[-1][-1] = merged
+        return True
+
+    def _enforce_limit(self) -> None:
+        while self.size > self.memory_limit and len(self.undo_steps) > 1:
+            self.size -= sum(map(change_size, self.undo_steps.pop(0)))
+
+    def undo(self) -> list[Change]:
+        """Pop the last step, returns the changes to apply to revert it"""
+
+        if not self.undo_steps:
+            return []
+
+        self._open = False
+        self._last_time = 0.0
+        step = self.undo_steps.pop()
+        self.redo_steps.append(step)
+        return [inverse(change) for change in reversed(step)]
+
+    def redo(self) -> list[Change]:
+        """Pop the last undone step, returns the changes to apply again"""
+
+        if not self.redo_steps:
+            return []
+
+        self._open = False
+        self._last_time = 0.0
+        step = self.redo_steps.pop()
+        self.undo_steps.append(step)
+        return list(step)
@@ -8,6 +8,7 @@ from biscuit.common import is_image
 from ..git.diff import DiffEditor
 from .html import HTMLEditor
 from .image import ImageViewer
+from .largefile import LargeFileViewer
 from .markdown import MDEditor
 from .text import TextEditor
 
@@ -35,6 +36,15 @@ class EditorTypes:
     def get_default(self):
         return self.get("text")
 
+    def is_large_file(self, path: str) -> bool:
+        """Whether the file is above the size that the text editor can load"""
+
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        return size > self.base.config.large_file_threshold * 1024 * 1024
+
     def get_editor(
         self,
         master,
@@ -45,7 +55,7 @@ class EditorTypes:
         language="",
         load_file=True,
         standalone=False,
-    ) -> TextEditor | DiffEditor | MDEditor | ImageViewer:
+    ) -> TextEditor | DiffEditor | MDEditor | ImageViewer | LargeFileViewer:
         """Get the suitable editor based on the path, exists, diff values passed.
 
         Args:
@@ -57,7 +67,7 @@ class EditorTypes:
             language (str): The language of the file
 
         Returns:
-            TextEditor | DiffEditor | MDEditor | ImageViewer:
+            TextEditor | DiffEditor | MDEditor | ImageViewer | LargeFileViewer:
                 The suitable editor based on the path, exists, diff values passed"""
 
         if diff:
@@ -72,6 +82,8 @@ class EditorTypes:
                 return MDEditor(master, path, exists=exists)
             if path.endswith(".html") or path.endswith(".htm"):
                 return HTMLEditor(master, path, exists=exists)
+            if self.is_large_file(path):
+                return LargeFileViewer(master, path)
 
             return TextEditor(
                 master, path, exists, language=language, load_file=load_file
@@ -5,6 +5,7 @@ from tkinterDnD import Tk
 from .common import *
 from .config import ConfigManager
 from .editor import *
+from .editor.text.ts_highlighter import language_cache
 from .extensions import *
 from .layout import *
 
@@ -189,6 +190,7 @@ class GUIManager(Tk, ConfigManager):
         if self.testing:
             return
 
+        language_cache.warm(self.config.preload_languages)
         self.setup_extensions()
 
     def register_misc_palettes(self) -> None:
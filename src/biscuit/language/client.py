@@ -6,6 +6,9 @@ Porcupine's LSP plugin https://github.com/Akuli/porcupine/
 from __future__ import annotations
 
 import itertools
+import os
+import threading
+import time
 import typing
 from pathlib import Path
 
@@ -22,6 +25,14 @@ if typing.TYPE_CHECKING:
 
     from . import LanguageServerManager
 
+# milliseconds to gather edits before notifying the server about them
+CHANGE_DELAY = 100
+# seconds before an unanswered request is cancelled, and how often to check
+REQUEST_TIMEOUT = 10
+EXPIRE_INTERVAL = 1000
+# milliseconds without changes before the outline of a tab is requested again
+OUTLINE_DELAY = 300
+
 
 class LangServerClient:
     """Language Server Client
@@ -29,40 +40,30 @@ class LangServerClient:
     This class is used to manage the language server client. It is responsible for sending and receiving messages
     to and from the language server. It also manages the requests made by the user. It also manages the deletion of
     the language server client instance when all the tabs using the language server are closed.
-    """
 
-    completion_requests: dict[int, tuple[Text, CompletionRequest]] = {}
-    gotodef_requests: dict[int, tuple[Text, str]] = {}
-    hover_requests: dict[int, tuple[Text, str]] = {}
-    outline_requests: dict[int, Text] = {}
-    ref_requests: list[tuple[Text, str]] = []
-    rename_requests: dict[int, Text] = {}
+    Messages from the server arrive through the manager's `Dispatcher`, only when there are any. Requests that
+    are not answered within REQUEST_TIMEOUT seconds, or that a newer request of the same kind replaced, are
+    cancelled and their late responses dropped.
+    """
 
-    def __init__(self, master: LanguageServerManager, tab: Text, root_dir: str) -> None:
+    def __init__(
+        self, master: LanguageServerManager, language: str, command: str, root_dir: str
+    ) -> None:
         """Initialize the language server client
 
+        The server is started on a background thread. Requests made before it
+        finished initializing are sent once it did.
+
         Args:
             master (LanguageServerManager): The master language server manager
-            tab (Text): The tab using the language server
+            language (str): The language served
+            command (str): The command starting the language server
             root_dir (str): The root directory of the language server"""
 
         self.master = master
         self.base = master.base
-        self.tab = tab
-        self.language = tab.language_alias or tab.language
-        self.command = master.langservers.get(
-            self.language,
-            master.langservers.get(
-                self.language.lower(),
-                master.langservers.get(
-                    tab.language,
-                    master.langservers.get(
-                        tab.language.lower(),
-                        master.langservers.get(tab.language_alias, None),
-                    ),
-                ),
-            ),
-        )
+        self.language = language
+        self.command = command
 
         self.root_dir = root_dir
         self._counter = itertools.count()
@@ -73,42 +74,228 @@ class LangServerClient:
         self.tabs_opened: set[Text] = set()
         self._count = 0
 
+        self.sync_kind = lsp.TextDocumentSyncKind.FULL
+        # edits of each tab not sent yet, see `send_change_events`
+        self.pending_changes: dict[Text, list[dict | None]] = {}
+        self._changes_job = None
+
+        self.completion_requests: dict[int, tuple[Text, CompletionRequest]] = {}
+        self.gotodef_requests: dict[int, tuple[Text, str]] = {}
+        self.hover_requests: dict[int, tuple[Text, str]] = {}
+        self.outline_requests: dict[int, tuple[Text, int]] = {}
+        self.ref_requests: list[tuple[Text, str]] = []
+        self.rename_requests: dict[int, Text] = {}
+
+        # request id -> (requests it is kept in, deadline), and ids whose
+        # responses are no longer wanted
+        self.pending_requests: dict[int, tuple[dict, float]] = {}
+        self.cancelled_requests: set[int] = set()
+        self._expire_job = None
+
+        # last outline received for each tab, with the document version it is of
+        self.symbols: dict[Text, tuple[int, list[lsp.DocumentSymbol]]] = {}
+        self._outline_jobs: dict[Text, str] = {}
+
+        # latest request of each kind made while the server was starting
+        self.deferred_requests: dict[tuple[str, Text], tuple[typing.Callable, tuple]] = {}
+        # workspace folders served, the server is told about the ones added later
+        self.folders: list[str] = [root_dir]
+        self.supports_folders = False
+        self.failed = False
+        self.stopped = False
+
         self.root_uri = Path(self.root_dir).as_uri()
-        self.io = IO(self, self.command, self.root_dir)
-        self.io.start()
+        self.io = IO(
+            self,
+            self.command,
+            self.root_dir,
+            on_message=lambda message: master.dispatcher.post(self, message),
+        )
         self.client = lsp.Client(
-            process_id=self.io.p.pid,
+            process_id=os.getpid(),
             root_uri=self.root_uri,
             workspace_folders=[lsp.WorkspaceFolder(uri=self.root_uri, name="Root")],
             trace="verbose",
         )
         self.handler = EventHandler(self)
+        # the initialize request waits in the input queue until the server is up
+        self.write()
+        threading.Thread(target=self._start, daemon=True).start()
 
-    def run_loop(self) -> None:
-        """Run the language server client loop"""
+    def _start(self) -> None:
+        try:
+            self.io.start()
+        except Exception as e:
+            self.base.after(0, self._start_failed, e)
+            return
 
-        if self.run():
-            self.base.after(50, self.run_loop)
+        if self.stopped:
+            # killed while starting
+            self.io.stop()
 
-    def run(self):
-        """Run the language server client"""
+    def stop(self) -> None:
+        """Stop the server without shutting it down"""
 
-        self.io.write(self.client.send())
-        r = self.io.read()
+        self.stopped = True
+        if self.io.p:
+            self.io.stop()
 
-        if not r:
-            return True
-        elif r == b"":
+    def _start_failed(self, error: Exception) -> None:
+        self.failed = True
+        self.deferred_requests.clear()
+        self.base.statusbar.process_indicator.hide()
+        self.base.notifications.warning(
+            f"{self.language} language server failed, check logs."
+        )
+        self.base.logger.error(f"{self.language} language server failed: {error}")
+        self.master.kill(self)
+
+    def defer(self, request: typing.Callable, tab: Text, *args) -> bool:
+        """Check if a request has to wait for the server to initialize. It is
+        kept and made then, only the latest request of a kind per tab
+
+        Args:
+            request (Callable): The request method
+            tab (Text): The tab the request is about
+
+        Returns:
+            bool: True if the request can't be sent now"""
+
+        if self.client.state == lsp.ClientState.NORMAL:
             return False
+        if self.client.state == lsp.ClientState.WAITING_FOR_INITIALIZED and not self.failed:
+            self.deferred_requests[(request.__name__, tab)] = (request, (tab, *args))
+        return True
 
-        try:
-            for lsp_event in self.client.recv(r):
-                self.handler.process(lsp_event)
-        except Exception as e:
-            print(e)
+    def initialized(self, capabilities: dict) -> None:
+        """The server is ready, open the tabs and make the requests that waited
+
+        Args:
+            capabilities (dict): The server capabilities"""
+
+        self.set_capabilities(capabilities)
+        for tab in self.tabs_opened:
+            self.open_tab(tab)
 
+        if self.supports_folders:
+            self.change_folders(added=self.folders[1:])
+
+        deferred, self.deferred_requests = self.deferred_requests, {}
+        for request, args in deferred.values():
+            if args[0] in self.tabs_opened:
+                request(*args)
+
+    def add_folder(self, folder: str) -> bool:
+        """Serve one more workspace folder
+
+        Args:
+            folder (str): The folder to add
+
+        Returns:
+            bool: False if the server can't serve more than one folder"""
+
+        if folder in self.folders:
+            return True
+        if self.client.state == lsp.ClientState.NORMAL and not self.supports_folders:
+            return False
+
+        self.folders.append(folder)
+        if self.client.state == lsp.ClientState.NORMAL:
+            self.change_folders(added=[folder])
         return True
 
+    def change_folders(self, added: list[str] = (), removed: list[str] = ()) -> None:
+        """Send the workspace/didChangeWorkspaceFolders notification
+
+        Args:
+            added (list[str]): Folders added
+            removed (list[str]): Folders removed"""
+
+        if not (added or removed):
+            return
+
+        def folders(paths):
+            return [
+                lsp.WorkspaceFolder(uri=Path(path).as_uri(), name=os.path.basename(path))
+                for path in paths
+            ]
+
+        self.client.did_change_workspace_folders(
+            added=folders(added), removed=folders(removed)
+        )
+        self.write()
+
+    def write(self) -> None:
+        """Send everything the client queued to the language server"""
+
+        self.io.write(self.client.send())
+
+    def process(self, message: bytes) -> None:
+        """Handle a message received from the language server
+
+        Args:
+            message (bytes): The framed message"""
+
+        for lsp_event in self.client.recv(message):
+            request_id = getattr(lsp_event, "message_id", None)
+            if request_id is not None and not isinstance(
+                lsp_event, (lsp.ServerRequest, lsp.ServerNotification)
+            ):
+                requests, _ = self.pending_requests.pop(request_id, (None, 0))
+                if request_id in self.cancelled_requests:
+                    self.cancelled_requests.discard(request_id)
+                    continue
+                if requests is not None and isinstance(lsp_event, lsp.ResponseError):
+                    requests.pop(request_id, None)
+
+            self.handler.process(lsp_event)
+
+    def track_request(self, request_id: int, requests: dict, tab: Text) -> None:
+        """Keep track of a request until it is answered, cancelling the
+        unanswered requests of the same kind for the tab first
+
+        Args:
+            request_id (int): The request id
+            requests (dict): Where the request is kept until answered, eg. `completion_requests`
+            tab (Text): The tab the request is about"""
+
+        for stale, value in list(requests.items()):
+            if (value[0] if isinstance(value, tuple) else value) is tab:
+                self.cancel_request(stale)
+
+        self.pending_requests[request_id] = (requests, time.monotonic() + REQUEST_TIMEOUT)
+        if not self._expire_job:
+            self._expire_job = self.base.after(EXPIRE_INTERVAL, self.expire_requests)
+
+    def cancel_request(self, request_id: int) -> None:
+        """Cancel a request, its response will be ignored
+
+        Args:
+            request_id (int): The request id"""
+
+        requests, _ = self.pending_requests.pop(request_id, (None, 0))
+        if requests is None:
+            return
+
+        requests.pop(request_id, None)
+        self.cancelled_requests.add(request_id)
+        if self.client.state == lsp.ClientState.NORMAL:
+            self.client._send_notification("$/cancelRequest", {"id": request_id})
+
+    def expire_requests(self) -> None:
+        """Cancel the requests that were not answered in time"""
+
+        self._expire_job = None
+        now = time.monotonic()
+        for request_id, (_, deadline) in list(self.pending_requests.items()):
+            if deadline <= now:
+                self.base.logger.warning(f"Language server request {request_id} timed out")
+                self.cancel_request(request_id)
+        self.write()
+
+        if self.pending_requests:
+            self._expire_job = self.base.after(EXPIRE_INTERVAL, self.expire_requests)
+
     def open_tab(self, tab: Text) -> None:
         """Send the did_open message to the language server client
 
@@ -118,6 +305,8 @@ class LangServerClient:
         self.tabs_opened.add(tab)
 
         if self.client.state == lsp.ClientState.NORMAL:
+            # the whole text goes with it
+            self.pending_changes.pop(tab, None)
             self.client.did_open(
                 lsp.TextDocumentItem(
                     uri=Path(tab.path).as_uri(),
@@ -126,6 +315,7 @@ class LangServerClient:
                     version=next(self._counter),
                 )
             )
+            self.write()
 
     def close_tab(self, tab: Text) -> None:
         """Send the did_close message to the language server client
@@ -137,10 +327,15 @@ class LangServerClient:
             return
 
         self.tabs_opened.remove(tab)
+        self.pending_changes.pop(tab, None)
+        self.symbols.pop(tab, None)
+        if job := self._outline_jobs.pop(tab, None):
+            self.base.after_cancel(job)
         if self.client.state == lsp.ClientState.NORMAL:
             self.client.did_close(
                 lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri())
             )
+            self.write()
 
         if not self.tabs_opened:
 
@@ -159,9 +354,11 @@ class LangServerClient:
         Args:
             tab (Text): The tab requesting completions"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_completions, tab):
             return
 
+        self.flush_changes(tab)
+
         request = CompletionRequest(next(self._counter), tab.get_cursor_pos())
         req_id = self.client.completion(
             text_document_position=lsp.TextDocumentPosition(
@@ -173,7 +370,9 @@ class LangServerClient:
             ),
         )
 
+        self.track_request(req_id, self.completion_requests, tab)
         self.completion_requests[req_id] = (tab, request)
+        self.write()
 
     def request_hover(self, tab: Text) -> None:
         """Request hover information from the language server
@@ -181,16 +380,20 @@ class LangServerClient:
         Args:
             tab (Text): The tab requesting hover information"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_hover, tab):
             return
 
+        self.flush_changes(tab)
+
         request_id = self.client.hover(
             lsp.TextDocumentPosition(
                 textDocument=lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri()),
                 position=encode_position(tab.get_mouse_pos()),
             )
         )
+        self.track_request(request_id, self.hover_requests, tab)
         self.hover_requests[request_id] = (tab, tab.get_mouse_pos())
+        self.write()
 
     def request_go_to_definition(self, tab: Text) -> None:
         """Request go to definition from the language server
@@ -198,9 +401,11 @@ class LangServerClient:
         Args:
             tab (Text): The tab requesting go to definition"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_go_to_definition, tab):
             return
 
+        self.flush_changes(tab)
+
         # very bad hack to ignore mouse and use cursor position
         tab.focus_set()
         pos = tab.get_mouse_pos()
@@ -213,7 +418,9 @@ class LangServerClient:
                 position=encode_position(pos),
             )
         )
+        self.track_request(request_id, self.gotodef_requests, tab)
         self.gotodef_requests[request_id] = (tab, pos)
+        self.write()
 
     def request_references(self, tab: Text) -> None:
         """Request references from the language server
@@ -221,9 +428,11 @@ class LangServerClient:
         Args:
             tab (Text): The tab requesting references"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_references, tab):
             return
 
+        self.flush_changes(tab)
+
         tab.focus_set()
         pos = tab.get_mouse_pos()
         if pos == "1.0":
@@ -236,6 +445,7 @@ class LangServerClient:
             )
         )
         self.ref_requests.append((tab, pos))
+        self.write()
 
     def request_rename(self, tab: Text, new_name: str) -> None:
         """Request rename from the language server
@@ -244,9 +454,11 @@ class LangServerClient:
             tab (Text): The tab requesting rename
             new_name (str): The new name to be used"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_rename, tab, new_name):
             return
 
+        self.flush_changes(tab)
+
         tab.focus_set()
         pos = tab.get_cursor_pos()
 
@@ -257,42 +469,130 @@ class LangServerClient:
             ),
             new_name=new_name,
         )
+        self.track_request(request_id, self.rename_requests, tab)
         self.rename_requests[request_id] = tab
+        self.write()
 
     def request_outline(self, tab: Text) -> None:
         """Request outline from the language server
 
+        Requests are sent OUTLINE_DELAY milliseconds after the last call, and
+        only if the document changed since the outline that was received last.
+
         Args:
             tab (Text): The tab requesting outline"""
 
-        if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
+        if tab.path is None or self.defer(self.request_outline, tab):
+            return
+
+        version = tab.document.version
+        if tab in self.symbols and self.symbols[tab][0] == version:
+            return
+        if (tab, version) in self.outline_requests.values():
             return
 
+        if job := self._outline_jobs.pop(tab, None):
+            self.base.after_cancel(job)
+        if tab not in self.symbols:
+            # nothing to show yet, don't keep the user waiting
+            return self._send_outline_request(tab)
+        self._outline_jobs[tab] = self.base.after(
+            OUTLINE_DELAY, self._send_outline_request, tab
+        )
+
+    def _send_outline_request(self, tab: Text) -> None:
+        self._outline_jobs.pop(tab, None)
+        if tab not in self.tabs_opened or self.client.state != lsp.ClientState.NORMAL:
+            return
+
+        self.flush_changes(tab)
+
         request_id = self.client.documentSymbol(
             lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri()),
         )
-        self.outline_requests[request_id] = tab
+        self.track_request(request_id, self.outline_requests, tab)
+        self.outline_requests[request_id] = (tab, tab.document.version)
+        self.write()
 
-    def send_change_events(self, tab: Text) -> None:
-        """Send the did_change message to the language server client
+    def show_outline(self, tab: Text) -> None:
+        """Show the last outline received for the tab, if any
 
         Args:
-            tab (Text): The tab that has changed"""
+            tab (Text): The tab to show the outline of"""
 
-        if self.client.state != lsp.ClientState.NORMAL:
+        if tab not in self.symbols:
             return
 
-        self.client.did_change(
-            text_document=lsp.VersionedTextDocumentIdentifier(
-                uri=Path(tab.path).as_uri(), version=next(self._counter)
-            ),
-            content_changes=[
-                lsp.TextDocumentContentChangeEvent(
-                    # range=lsp.Range(
-                    #     start=encode_position(tab.get_begin()),
-                    #     end=encode_position(tab.get_end()),
-                    # ),
-                    text=tab.get_all_text(),
-                )
-            ],
+        _, symbols = self.symbols[tab]
+        self.master._update_symbols(tab, symbols)
+        self.base.outline.update_symbols(tab, symbols)
+
+    def set_capabilities(self, capabilities: dict) -> None:
+        """Pick up what the server told it supports in its initialize result
+
+        Args:
+            capabilities (dict): The server capabilities"""
+
+        self.sync_kind = change_sync_kind(capabilities)
+        workspace = capabilities.get("workspace") or {}
+        self.supports_folders = bool(
+            (workspace.get("workspaceFolders") or {}).get("supported")
         )
+
+    def send_change_events(self, tab: Text, edit: dict | None = None) -> None:
+        """Queue a did_change message for the language server client
+
+        Edits made within CHANGE_DELAY milliseconds are sent together, requests
+        about the tab send them right away so the server has the latest text.
+
+        Args:
+            tab (Text): The tab that has changed
+            edit (dict): Edit record of the text widget, None if the change
+                was not tracked and the whole text has to be sent"""
+
+        if self.client.state != lsp.ClientState.NORMAL:
+            return
+        if self.sync_kind == lsp.TextDocumentSyncKind.NONE:
+            return
+
+        merge_change(self.pending_changes.setdefault(tab, []), edit)
+        if not self._changes_job:
+            self._changes_job = self.base.after(CHANGE_DELAY, self.flush_changes)
+
+    def flush_changes(self, tab: Text | None = None) -> None:
+        """Send the queued changes of a tab, or of every tab
+
+        Args:
+            tab (Text): The tab to send changes of, all tabs if None"""
+
+        if tab is None:
+            self._changes_job = None
+            pending, self.pending_changes = self.pending_changes, {}
+        elif tab in self.pending_changes:
+            pending = {tab: self.pending_changes.pop(tab)}
+        else:
+            return
+
+        if self.client.state != lsp.ClientState.NORMAL:
+            return
+
+        for tab, changes in pending.items():
+            if (
+                self.sync_kind == lsp.TextDocumentSyncKind.INCREMENTAL
+                and None not in changes
+            ):
+                events = [encode_change(change) for change in changes]
+            else:
+                events = [
+                    lsp.TextDocumentContentChangeEvent.whole_document_change(
+                        tab.get_all_text()
+                    )
+                ]
+
+            self.client.did_change(
+                text_document=lsp.VersionedTextDocumentIdentifier(
+                    uri=Path(tab.path).as_uri(), version=next(self._counter)
+                ),
+                content_changes=events,
+            )
+        self.write()
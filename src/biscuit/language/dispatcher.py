@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from biscuit import App
+
+    from .client import LangServerClient
+
+# seconds of messages handled per wakeup before letting Tk handle other events
+DISPATCH_BUDGET = 0.02
+
+
+class Dispatcher:
+    """Delivers the messages of every language server to the Tk thread
+
+    Reader threads post complete messages to one queue shared by all clients.
+    The Tk loop is woken up only when a message arrives, and only once until
+    the queue was drained, so idle servers cost nothing."""
+
+    def __init__(self, base: App) -> None:
+        self.base = base
+        self.queue: queue.Queue[tuple[LangServerClient, bytes]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    def post(self, client: LangServerClient, message: bytes) -> None:
+        """Queue a message received by a client, called from its reader thread
+
+        Args:
+            client (LangServerClient): The client that received the message
+            message (bytes): The framed message"""
+
+        self.queue.put((client, message))
+        self._wake()
+
+    def _wake(self) -> None:
+        with self._lock:
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.base.after(0, self.dispatch)
+
+    def dispatch(self) -> None:
+        """Hand queued messages to their clients, on the Tk thread"""
+
+        with self._lock:
+            self._scheduled = False
+
+        clients = []
+        deadline = time.perf_counter() + DISPATCH_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                client, message = self.queue.get(block=False)
+            except queue.Empty:
+                break
+            try:
+                client.process(message)
+            except Exception as e:
+                self.base.logger.error(f"Language server message failed: {e}")
+            if client not in clients:
+                clients.append(client)
+        else:
+            # out of time, continue after Tk caught up with other events
+            self._wake()
+
+        # replies the handlers queued
+        for client in clients:
+            client.write()
@@ -53,11 +53,8 @@ class EventHandler:
 
         if isinstance(e, lsp.Initialized):
             self.base.logger.info("Capabilities " + pprint.pformat(e.capabilities))
-            for tab in self.master.tabs_opened:
-                self.master.open_tab(tab)
-                # self.master.request_outline(tab)
-
             self.client.did_change_configuration([])
+            self.master.initialized(e.capabilities)
 
             self.base.statusbar.process_indicator.hide()
             return
@@ -189,19 +186,19 @@ class EventHandler:
             return
 
         if isinstance(e, lsp.MDocumentSymbols):
-            tab = self.master.outline_requests.pop(e.message_id)
+            tab, version = self.master.outline_requests.pop(e.message_id)
             if tab not in self.master.tabs_opened:
                 return
 
-            self.base.language_server_manager._update_symbols(tab, e.result)
-            self.base.outline.update_symbols(
-                tab,
+            self.master.symbols[tab] = (
+                version,
                 (
                     e.result
                     if e.result and isinstance(e.result[0], lsp.DocumentSymbol)
                     else to_document_symbol(e.result)
                 ),
             )
+            self.master.show_outline(tab)
             return
 
         # TODO hooks
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import os
+import threading
 import typing
 
 import tarts as lsp
 
 from .client import LangServerClient
+from .dispatcher import Dispatcher
 from .languages import Languages
 from .utils import decode_position
 
@@ -13,12 +15,18 @@ if typing.TYPE_CHECKING:
     from biscuit import App
     from biscuit.editor.text import Text
 
+# directory entries looked at when guessing the languages of an opened folder
+WARM_SCAN_LIMIT = 5000
+
 
 class LanguageServerManager:
     """Language Server Manager
 
     This class is used to manage the language server clients. It is responsible for creating, updating, and deleting
     the language server clients. It also manages the requests made by the user to the language server clients.
+
+    One server is shared by all workspace folders of a language when it supports workspace folders. With the
+    `warm_language_servers` setting, servers for the languages found in an opened folder are started right away.
     """
 
     def __init__(self, base: App):
@@ -29,30 +37,58 @@ class LanguageServerManager:
         # built-in support for python-lsp-server
         self.langservers[Languages.PYTHON] = "pylsp"
 
-        self.existing: dict[str, LangServerClient] = {}
+        # (root directory, language) -> client, a client can serve several roots
+        self.existing: dict[tuple[str, str], LangServerClient] = {}
+        # clients started ahead of time that no tab used yet
+        self.warm: set[LangServerClient] = set()
         self.latest: LangServerClient = None
+        # symbols in the palette, to update only what changed
+        self._symbol_keys: list[tuple[str, str]] = []
+        # messages of all the clients are handed to the Tk thread through this
+        self.dispatcher = Dispatcher(base)
 
         self.kill_thread = None
 
-    def _update_symbols(
-        self, tab: Text, resp: typing.List[lsp.SymbolInformation]
-    ) -> None:
-        try:
-            self.base.settings.symbols_actionset.update(
-                [
-                    (
-                        i.name,
-                        lambda _, i=i: self.base.goto_location_in_active_editor(
-                            decode_position(i.location.range.start)
-                        ),
-                    )
-                    for i in resp
-                ]
+        self.base.bind("<<DirectoryChanged>>", self.warm_up, add=True)
+
+    def instances(self) -> list[LangServerClient]:
+        """Running clients, each once"""
+
+        return list(dict.fromkeys(self.existing.values()))
+
+    def _update_symbols(self, tab: Text, symbols: list[lsp.DocumentSymbol]) -> None:
+        """Update the symbols of the palette, only the entries that changed are replaced"""
+
+        keys = []
+        stack = list(reversed(symbols or []))
+        while stack:
+            symbol = stack.pop()
+            keys.append((symbol.name, decode_position(symbol.selectionRange.start)))
+            stack.extend(reversed(symbol.children or []))
+
+        if keys == self._symbol_keys:
+            return
+
+        actionset = self.base.settings.symbols_actionset
+        for i, (name, position) in enumerate(keys):
+            if i < len(self._symbol_keys) and self._symbol_keys[i] == (name, position):
+                continue
+            action = (
+                name,
+                lambda _, position=position: self.base.goto_location_in_active_editor(
+                    position
+                ),
             )
-            self.base.palette.update()
-        except:
-            # TODO: currently only supports lsp.SymbolInformation; implement this for lsp.DocumentSymbol
-            pass
+            if i < len(actionset):
+                actionset[i] = action
+            else:
+                actionset.append(action)
+        del actionset[len(keys) :]
+        self._symbol_keys = keys
+
+        palette = self.base.palette
+        if palette.active_set is actionset and palette.winfo_ismapped():
+            palette.searchbar.filter()
 
     def register_langserver(self, language: str, command: str) -> None:
         """Register a language server for a specific language
@@ -70,13 +106,14 @@ class LanguageServerManager:
         self.latest = self.request_client_instance(tab)
         if self.latest:
             self.latest.open_tab(tab)
+            self.latest.show_outline(tab)
             self.latest.request_outline(tab)
         return self.latest
 
     def request_removal(self, tab: Text) -> None:
         """Request the language server to remove a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             instance.close_tab(tab)
 
     def tab_closed(self, tab: Text) -> None:
@@ -88,88 +125,178 @@ class LanguageServerManager:
     def request_completions(self, tab: Text) -> None:
         """Request completions from the language server for a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_completions(tab)
 
     def request_goto_definition(self, tab: Text) -> None:
         """Request the language server to go to the definition of a symbol in a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_go_to_definition(tab)
 
     def request_references(self, tab: Text) -> None:
         """Request references to a symbol in a tab from the language server"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_references(tab)
 
     def request_rename(self, tab: Text, new_name: str) -> None:
         """Request the language server to rename a symbol in a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_rename(tab, new_name)
 
     def request_hover(self, tab: Text) -> None:
         """Request the language server to provide a hover for a symbol in a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_hover(tab)
 
     def request_outline(self, tab: Text) -> None:
         """Request the language server to provide an outline for a tab"""
 
-        for instance in list(self.existing.values()):
+        for instance in self.instances():
             if tab in instance.tabs_opened:
                 instance.request_outline(tab)
 
-    def content_changed(self, tab: Text) -> None:
-        """Content of a tab has changed, notify the language server about it"""
+    def content_changed(self, tab: Text, edit: dict | None = None) -> None:
+        """Content of a tab has changed, notify the language server about it
 
-        for instance in list(self.existing.values()):
+        Args:
+            tab (Text): The tab that has changed
+            edit (dict): Edit record of the change, None to send the whole text"""
+
+        for instance in self.instances():
             if tab in instance.tabs_opened:
-                instance.send_change_events(tab)
+                instance.send_change_events(tab, edit)
 
     def request_client_instance(self, tab: Text) -> LangServerClient | None:
         """Request a language server client instance for a specific language and workspace root directory.
 
         If a client instance already exists for the language and the root directory of the tab, it is returned.
+        A client of the language that supports workspace folders is told about the new root and returned.
         Otherwise, a new client instance is created and returned.
 
         Args:
             tab (Text): The tab for which the language server client instance is being requested
         """
 
-        if tab.path is None or (
-            tab.language not in self.langservers.keys()
-            and tab.language.lower() not in self.langservers.keys()
-            and tab.language_alias not in self.langservers.keys()
-        ):
+        if tab.path is None:
+            return
+
+        language = tab.language_alias or tab.language
+        command = self.langservers.get(
+            language,
+            self.langservers.get(
+                language.lower(),
+                self.langservers.get(
+                    tab.language,
+                    self.langservers.get(
+                        tab.language.lower(),
+                        self.langservers.get(tab.language_alias, None),
+                    ),
+                ),
+            ),
+        )
+        if not command:
             return
 
         root_dir = self.base.active_directory or os.path.dirname(tab.path)
+        if instance := self.existing.get((root_dir, language)):
+            self.warm.discard(instance)
+            return instance
+
+        for instance in self.instances():
+            if instance.language == language and not instance.failed:
+                if instance.add_folder(root_dir):
+                    self.base.logger.trace(
+                        f"<<-- Reusing <LSPC>({language}) instance for --[{root_dir}] -->>"
+                    )
+                    self.existing[(root_dir, language)] = instance
+                    self.warm.discard(instance)
+                    return instance
+
+        return self.start_client(language, command, root_dir)
+
+    def start_client(self, language: str, command: str, root_dir: str) -> LangServerClient:
+        """Start a language server client, it initializes in the background
 
-        try:
-            return self.existing[(root_dir, tab.language_alias)]
-        except KeyError:
-            pass
+        Args:
+            language (str): The language served
+            command (str): The command starting the language server
+            root_dir (str): The workspace root directory"""
 
         self.base.statusbar.process_indicator.show()
         self.base.logger.trace(
-            f"<<-- Requesting <LSPC>({tab.language_alias}) instance for --[{root_dir}] -->>"
+            f"<<-- Requesting <LSPC>({language}) instance for --[{root_dir}] -->>"
         )
 
-        # TODO multithread this process
-        langserver = LangServerClient(self, tab, root_dir)
-        langserver.run_loop()
-        self.existing[(root_dir, tab.language_alias)] = langserver
-
+        langserver = LangServerClient(self, language, command, root_dir)
+        self.existing[(root_dir, language)] = langserver
         return langserver
 
+    def warm_up(self, *_) -> None:
+        """Start the servers for the languages used in the opened folder"""
+
+        # the ones started for the previous folder were never used
+        for instance in list(self.warm):
+            if not instance.tabs_opened:
+                self.kill(instance)
+        self.warm.clear()
+
+        root_dir = self.base.active_directory
+        if not (self.base.config.warm_language_servers and root_dir):
+            return
+
+        threading.Thread(
+            target=self._scan_languages, args=(root_dir,), daemon=True
+        ).start()
+
+    def _scan_languages(self, root_dir: str) -> None:
+        from biscuit.editor.text.ts_highlighter import EXTENSION_MAP
+
+        languages = set()
+        seen = 0
+        stack = [root_dir]
+        while stack and seen < WARM_SCAN_LIMIT:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+
+            for entry in entries:
+                seen += 1
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                except OSError:
+                    continue
+                language = EXTENSION_MAP.get(os.path.splitext(entry.name)[1])
+                if language in self.langservers:
+                    languages.add(language)
+
+        self.base.after(0, self._warm, root_dir, languages)
+
+    def _warm(self, root_dir: str, languages: set[str]) -> None:
+        if root_dir != self.base.active_directory:
+            return
+
+        for language in languages:
+            if any(
+                instance.language == language and root_dir in instance.folders
+                for instance in self.instances()
+            ):
+                continue
+            self.warm.add(self.start_client(language, self.langservers[language], root_dir))
+
     def kill(self, instance: LangServerClient) -> None:
         """Kill a language server client instance
 
@@ -177,17 +304,19 @@ class LanguageServerManager:
             instance (LangServerClient): The language server client instance to be killed
         """
 
-        if not self.existing.get((instance.root_dir, instance.language), None):
+        keys = [key for key, value in self.existing.items() if value is instance]
+        if not keys:
             return
 
-        self.base.logger.trace(
-            f"-- Killing LSPC({instance.language}) PID: {instance.io.p.pid} --"
-        )
+        self.base.logger.trace(f"-- Killing LSPC({instance.language}) --")
 
-        self.existing.pop((instance.root_dir, instance.language))
+        for key in keys:
+            self.existing.pop(key)
+        self.warm.discard(instance)
         if instance.client.state == lsp.ClientState.NORMAL:
             instance.client.shutdown()
+            instance.write()
         else:
-            instance.io.p.kill()
+            instance.stop()
 
         del instance
@@ -157,3 +157,71 @@ def equals_range(a: lsp.Range, b: lsp.Range) -> bool:
         and a.end.line == b.end.line
         and a.end.character == b.end.character
     )
+
+
+def change_sync_kind(capabilities: dict) -> lsp.TextDocumentSyncKind:
+    """How the server wants document changes, from its initialize result.
+    `textDocumentSync` is either the kind itself or options holding it."""
+
+    sync = capabilities.get("textDocumentSync")
+    if isinstance(sync, dict):
+        sync = sync.get("change", lsp.TextDocumentSyncKind.NONE)
+    if sync is None:
+        # servers that don't say anything got the whole document before
+        return lsp.TextDocumentSyncKind.FULL
+    return lsp.TextDocumentSyncKind(sync)
+
+
+def merge_change(changes: list[dict | None], edit: dict | None) -> None:
+    """Append an edit record of the text widget to the changes waiting to be
+    sent, None for an edit that was not tracked.
+
+    Typing and backspacing at the end of the last change extend it, so a
+    burst of keystrokes goes out as one range change."""
+
+    if edit is None or None in changes:
+        changes.append(None)
+        return
+
+    start, end, text = edit["start_point"], edit["old_end_point"], edit["new_text"]
+    last = changes[-1] if changes else None
+    if last is not None:
+        if start == end == last["new_end"]:
+            # typed at the end of the last change
+            last["text"] += text
+            last["new_end"] = edit["new_end_point"]
+            return
+        if (
+            not text
+            and end == last["new_end"]
+            and "\n" not in last["text"]
+            and start[0] == last["start"][0]
+            and start[1] >= last["start"][1]
+        ):
+            # backspaced over text the last change inserted
+            last["text"] = last["text"][: start[1] - last["start"][1]]
+            last["new_end"] = start
+            return
+        if not text and not last["text"] and end == last["start"]:
+            # backspaced over more of the text before the last deletion
+            last["start"] = last["new_end"] = start
+            return
+
+    changes.append(
+        {"start": start, "end": end, "text": text, "new_end": edit["new_end_point"]}
+    )
+
+
+def encode_change(change: dict) -> lsp.TextDocumentContentChangeEvent:
+    """Range change event of a change built by `merge_change`, points are
+    0-based (row, column) like the edit records."""
+
+    (start_line, start_col), (end_line, end_col) = change["start"], change["end"]
+    return lsp.TextDocumentContentChangeEvent(
+        range=lsp.Range(
+            start=lsp.Position(line=start_line, character=start_col),
+            end=lsp.Position(line=end_line, character=end_col),
+        ),
+        rangeLength=None,
+        text=change["text"],
+    )
@@ -79,6 +79,14 @@ class Statusbar(Frame):
             padx=(2, 0),
         )
 
+        # ---------------------------------------------------------------------
+        self.file_loading = self.add_button(
+            icon=Icons.SYNC,
+            description="Loading file, click to stop",
+            side=tk.LEFT,
+            padx=(2, 0),
+        )
+
         # ---------------------------------------------------------------------
         self.lc_actionset = self.create_actionset(
             "Goto line in active editor",
@@ -274,6 +282,22 @@ class Statusbar(Frame):
         # self.encoding.change_text(text.encoding.upper())
         # self.eol.change_text(get_eol_label(text.eol))
 
+    def set_loading_progress(self, text: Text, progress: float | None) -> None:
+        """Shows the loading progress of a file, hidden when progress is None.
+
+        Args:
+            text (Text): The text object loading the file.
+            progress (float): Fraction of the file loaded.
+        """
+
+        if progress is None:
+            self.file_loading.hide()
+            return
+
+        self.file_loading.change_text(f"{text.filename} {int(progress * 100)}%")
+        self.file_loading.change_callback(lambda *_: text.cancel_loading())
+        self.file_loading.show()
+
     def set_line_col_info(self, line: int, col: int, selected: int = None) -> None:
         """Sets the line and column information on the status bar.
 
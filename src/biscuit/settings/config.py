@@ -70,6 +70,15 @@ class Config:
         self.cursor_style = self.get_value("cursor_style", "line")
         self.relative_line_numbers = self.get_value("relative_line_numbers", False)
         self.vim_mode = self.get_value("vim_mode", False)
+        self.undo_memory_limit = self.get_value("undo_memory_limit", 64)
+        # tree-sitter languages loaded in the background at startup
+        self.preload_languages = self.get_value("preload_languages", ["python"])
+        # files larger than this (MB) open in the read-only large file viewer
+        self.large_file_threshold = self.get_value("large_file_threshold", 50)
+        # start the language servers of an opened folder before a file is opened
+        self.warm_language_servers = self.get_value("warm_language_servers", False)
+        # keep a trigram index of the opened folder to speed up searching it
+        self.workspace_search_index = self.get_value("workspace_search_index", False)
 
         # Display
         self.show_minimap = self.get_value("show_minimap", True)
@@ -4,16 +4,18 @@ import platform
 import shutil
 import subprocess
 import threading
+import time
 import tkinter as tk
 from tkinter.messagebox import askyesno
-from typing import Iterator
 
 import pyperclip
 
+from biscuit.common.frames import FRAME_BUDGET, FRAME_INTERVAL
 from biscuit.common.icons import Icons
 from biscuit.common.ui import Tree
 
 from ..sidebar_item import SideBarViewItem
+from .listing import DirectoryListing
 from .menu import DirectoryContextMenu
 from .placeholder import DirectoryTreePlaceholder
 from .watcher import DirectoryTreeWatcher
@@ -44,6 +46,9 @@ class DirectoryTree(SideBarViewItem):
         super().__init__(master, itembar=itembar, *args, **kwargs)
 
         self.nodes = {}
+        self.listing: DirectoryListing = None
+        # node -> token of its latest load, older loads are dropped
+        self.loads = {}
 
         self.hide_dirs = [
             ".git",
@@ -119,6 +124,8 @@ class DirectoryTree(SideBarViewItem):
         self.nodes.clear()
         self.path = os.path.abspath(path) if path else path
         self.nodes[self.path] = ""
+        self.loads.clear()
+        self.listing = DirectoryListing(self.path) if self.path else None
         if self.path:
             self.placeholder.grid_remove()
             self.tree.grid()
@@ -134,33 +141,29 @@ class DirectoryTree(SideBarViewItem):
             self.set_title("No folder opened")
 
     def create_root(self, path: str, parent="", subdir=True) -> None:
-        """Creates the root node of the treeview."""
+        """Creates the root node of the treeview.
 
-        if self.loading:
+        The directory is listed on a worker thread unless its listing is
+        cached, its entries replace the children of the node on the Tk thread."""
+
+        if not self.listing:
+            return
+
+        load = self.loads[parent] = object()
+        if not subdir:
+            self.loading = True
+
+        if (entries := self.listing.get(path)) is not None:
+            self.populate(parent, entries, load, subdir)
             return
 
-        self.loading = True
         t = threading.Thread(
-            target=self.run_create_sub_root if subdir else self.run_create_root,
-            args=(path, parent),
+            target=self.update_treeview,
+            args=(path, parent, load, subdir),
         )
         t.daemon = True
         t.start()
 
-    def run_create_root(self, path: str, parent="") -> None:
-        """Updates the treeview with the contents of the given directory."""
-
-        self.update_treeview(path, parent)
-        self.loading = False
-
-        self.base.statusbar.process_indicator.hide()
-
-    def run_create_sub_root(self, path: str, parent="") -> None:
-        """Updates the treeview with the contents of the given directory."""
-
-        self.update_treeview(path, parent)
-        self.loading = False
-
     def get_all_files(self) -> list:
         """Returns a list of all files in the treeview."""
 
@@ -176,21 +179,6 @@ class DirectoryTree(SideBarViewItem):
 
         return files
 
-    def scandir(self, path: str) -> Iterator:
-        """Scans the given directory and yields its contents."""
-
-        for entry in os.scandir(path):
-            isdir = os.path.isdir(entry.path)
-            data = (
-                entry.name,
-                os.path.join(self.path, entry.path),
-                isdir,
-                entry.path.replace("\\", "/")
-                + ("/" if isdir else ""),  # unix-like path
-            )
-
-            yield data
-
     def update_path(self, path: str) -> None:
         """Updates the treeview with the contents of the given directory."""
 
@@ -198,51 +186,81 @@ class DirectoryTree(SideBarViewItem):
             return
 
         node = self.nodes.get(os.path.abspath(path))
-        for i in self.tree.get_children(node):
-            try:
-                self.tree.delete(i)
-            except:
-                pass
+        if node is None:
+            return
 
         self.create_root(path, node)
 
-    def update_treeview(self, parent_path: str, parent="") -> None:
+    def invalidate(self, path: str) -> None:
+        """Drops the cached listings affected by a change to the given path.
+        Called from the watcher thread."""
+
+        if self.listing:
+            self.listing.invalidate(path)
+
+    def update_treeview(self, parent_path: str, parent="", load=None, subdir=True) -> None:
         """Lazy loads the treeview with the contents of the given directory.
 
         Initially this was done recursively, but it was changed to a lazy load
         to improve performance. The treeview is updated only when the user
-        expands a directory node."""
+        expands a directory node.
+
+        Runs on a worker thread, the directory is scanned here and the entries
+        are handed to the Tk thread to be inserted."""
 
         if not os.path.exists(parent_path):
             return
 
-        # sort: directories first, then files (alphabetic order)
-        entries = sorted(self.scandir(parent_path), key=lambda x: (not x[2], x[0]))
+        entries = self.listing.scan(parent_path)
+        self.base.after(0, self.populate, parent, entries, load, subdir)
+
+    def populate(self, parent: str, entries: list, load, subdir=True, start=0) -> None:
+        """Replaces the children of a node with the entries of its directory.
 
-        ignored = []
-        if paths := [i[3] for i in entries]:
-            ignored = self.git.ignore.check(paths)
+        Entries are inserted in batches that fit the frame budget, so large
+        directories don't freeze the UI. A newer load of the node, or the node
+        being deleted, drops the rest of the entries."""
+
+        if self.loads.get(parent) is not load:
+            return
+        if parent and not self.tree.exists(parent):
+            # deleted while loading, eg. its parent folder was loaded again
+            del self.loads[parent]
+            return
+
+        if not start:
+            for i in self.tree.get_children(parent):
+                self.tree.delete(i)
+            # loads of the deleted nodes have nowhere to go
+            for node in [n for n in self.loads if n and not self.tree.exists(n)]:
+                del self.loads[node]
+
+        deadline = time.perf_counter() + FRAME_BUDGET
+        for i in range(start, len(entries)):
+            if time.perf_counter() > deadline:
+                self.after(
+                    FRAME_INTERVAL, self.populate, parent, entries, load, subdir, i
+                )
+                return
 
-        for name, path, isdir, unixlike in entries:
+            name, path, isdir, ignored = entries[i]
             if isdir:
                 if name in self.hide_dirs:
                     continue
 
-                try:
-                    node = self.tree.insert(
-                        parent or "",
-                        "end",
-                        text=f"  {name}",
-                        values=[path, "directory"],
-                        # image="foldericon",
-                        open=False,
-                        tags="ignored" if ignored and (unixlike in ignored) else "",
-                    )
-                    self.nodes[os.path.abspath(path)] = node
-                    self.tree.insert(node, "end", text="loading...", tags="ignored")
-                except:
-                    self.refresh_root()
+                node = self.tree.insert(
+                    parent,
+                    "end",
+                    text=f"  {name}",
+                    values=[path, "directory"],
+                    # image="foldericon",
+                    open=False,
+                    tags="ignored" if ignored else "",
+                )
+                if node is None:
                     break
+                self.nodes[os.path.abspath(path)] = node
+                self.tree.insert(node, "end", text="loading...", tags="ignored")
 
                 # NOTE: recursive mode loading (not good for large projects)
                 # self.update_treeview(path, node)
@@ -250,20 +268,23 @@ class DirectoryTree(SideBarViewItem):
                 if name.split(".")[-1] in self.ignore_exts:
                     continue
 
-                try:
-                    # TODO check filetype and get matching icon, cases
-                    node = self.tree.insert(
-                        parent,
-                        "end",
-                        text=f"  {name}",
-                        values=[path, "file"],
-                        # image="document",
-                        tags="ignored" if ignored and (unixlike in ignored) else "",
-                    )
-                    self.nodes[os.path.abspath(path)] = node
-                except:
-                    self.refresh_root()
+                # TODO check filetype and get matching icon, cases
+                node = self.tree.insert(
+                    parent,
+                    "end",
+                    text=f"  {name}",
+                    values=[path, "file"],
+                    # image="document",
+                    tags="ignored" if ignored else "",
+                )
+                if node is None:
                     break
+                self.nodes[os.path.abspath(path)] = node
+
+        del self.loads[parent]
+        if not subdir:
+            self.loading = False
+            self.base.statusbar.process_indicator.hide()
 
     def selected_directory(self) -> str:
         """Returns the selected directory path, or the current path if no directory is selected."""
@@ -445,6 +466,8 @@ class DirectoryTree(SideBarViewItem):
     def refresh_root(self, *_) -> None:
         """Reloads entire treeview from the root."""
 
+        if self.listing:
+            self.listing.clear()
         self.update_path(self.path)
 
     def close_directory(self) -> None:
@@ -456,9 +479,6 @@ class DirectoryTree(SideBarViewItem):
         """Toggles the selected node, if it's a directory."""
 
         node = self.tree.focus()
-        for i in self.tree.get_children(node):
-            self.tree.delete(i)
-
         self.create_root(self.tree.selected_path(), node)
 
     def openfile(self, _) -> None:
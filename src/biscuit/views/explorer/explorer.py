@@ -1,7 +1,9 @@
 import os
 import tkinter as tk
 
-from biscuit.common import ActionSet
+from biscuit.common import ActionSet, FileIndex
+from biscuit.common.frames import FRAME_BUDGET, FRAME_INTERVAL
+from biscuit.common.fuzzy import FuzzySearch
 from biscuit.common.icons import Icons
 
 from ..sidebar_view import SideBarView
@@ -32,7 +34,13 @@ class Explorer(SideBarView):
         self.directory = DirectoryTree(self, observe_changes=True)
         self.add_item(self.directory)
 
-        self.filesearch_actionset = ActionSet("Search files", "file:", [])
+        self.file_index = FileIndex(
+            self.base, ignore=self.directory.search_ignore_dirs
+        )
+        self.filesearch_actionset = ActionSet("Search files", "file:", [], ranked=True)
+        self.file_search: FuzzySearch = None
+        self._file_search_version = None
+        self._file_search_job = None
 
         self.newfile_actionset = ActionSet(
             "Add new file to directory",
@@ -75,22 +83,52 @@ class Explorer(SideBarView):
         return self.filesearch_actionset
 
     def filesearch(self, t):
+        """Files of the workspace matching the term, best first
+
+        The file index is fuzzy searched for as long as fits in a frame, the
+        palette is updated with better matches while the rest is searched.
+        Each term narrows down the search of the term before it."""
+
+        if self._file_search_job:
+            self.after_cancel(self._file_search_job)
+            self._file_search_job = None
+
         if not self.base.active_directory:
             return []
 
-        pys = []
-        for r, d, f in os.walk(self.base.active_directory):
-            if any(i in r for i in self.directory.search_ignore_dirs):
-                d[:] = []
-                continue
-            for file in f:
-                if t in file:
-                    pys.append(
-                        (
-                            file,
-                            lambda _, path=os.path.join(r, file): self.base.open_editor(
-                                path
-                            ),
-                        )
-                    )
-        return pys
+        # read before the paths, a change in between only redoes the next search
+        version = self.file_index.version
+        if self.file_search and self._file_search_version == version:
+            self.file_search = self.file_search.refine(t)
+        else:
+            self.file_search = FuzzySearch(t, self.file_index.paths())
+        self._file_search_version = version
+
+        if not self.file_search.step(FRAME_BUDGET):
+            self._file_search_job = self.after(FRAME_INTERVAL, self._pump_filesearch)
+        return self.filesearch_items(self.file_search.results())
+
+    def _pump_filesearch(self) -> None:
+        self._file_search_job = None
+        palette = self.base.palette
+        if palette.active_set is not self.filesearch_actionset:
+            return
+
+        search = self.file_search
+        shown = search.results()
+        done = search.step(FRAME_BUDGET)
+        if (results := search.results()) != shown:
+            self.filesearch_actionset.update(self.filesearch_items(results))
+            palette.update_results()
+        if not done:
+            self._file_search_job = self.after(FRAME_INTERVAL, self._pump_filesearch)
+
+    def filesearch_items(self, paths: list) -> list:
+        root = self.file_index.root or self.base.active_directory
+        return [
+            (
+                path,
+                lambda _, path=os.path.join(root, path): self.base.open_editor(path),
+            )
+            for path in paths
+        ]
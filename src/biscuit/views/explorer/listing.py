@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import threading
+import typing
+
+from biscuit.common.gitignore import IgnoreMatcher
+
+if typing.TYPE_CHECKING:
+    from typing import List, Tuple
+
+    # name, path, is directory, ignored by a .gitignore
+    Entry = Tuple[str, str, bool, bool]
+
+
+class DirectoryListing:
+    """Cached listings of the directories of the explorer
+
+    A listing is scanned once with `os.scandir`, using the type info of the
+    `DirEntry`s, and ignored entries are resolved in process with the
+    .gitignore files of the tree. Listings are reused while the modification
+    time of the directory is unchanged, and dropped by the watcher on changes.
+
+    Safe to use from the worker threads, the watcher and the Tk thread.
+
+    Args:
+        root (str): The folder opened in the explorer"""
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.abspath(root)
+        self.matcher = IgnoreMatcher(self.root)
+        self._cache: dict[str, tuple[int, List[Entry]]] = {}
+        self._lock = threading.Lock()
+        # bumped on invalidation, listings scanned before it are not cached
+        self._generation = 0
+
+    def get(self, path: str) -> List[Entry] | None:
+        """The cached listing of a directory, None if it has to be scanned"""
+
+        path = os.path.abspath(path)
+        with self._lock:
+            cached = self._cache.get(path)
+        if not cached:
+            return None
+        try:
+            if os.stat(path).st_mtime_ns == cached[0]:
+                return cached[1]
+        except OSError:
+            pass
+        with self._lock:
+            self._cache.pop(path, None)
+        return None
+
+    def scan(self, path: str) -> List[Entry]:
+        """Lists a directory, directories first then files in alphabetic order"""
+
+        path = os.path.abspath(path)
+        with self._lock:
+            generation = self._generation
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                scanned = list(it)
+        except OSError:
+            return []
+
+        # children of an ignored directory are ignored too
+        parent_ignored = path != self.root and self.matcher.excluded(path, True)
+        entries = []
+        for entry in scanned:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append(
+                (
+                    entry.name,
+                    entry.path,
+                    is_dir,
+                    parent_ignored or self.matcher.ignored(entry.path, is_dir),
+                )
+            )
+        entries.sort(key=lambda e: (not e[2], e[0]))
+
+        with self._lock:
+            if generation == self._generation:
+                self._cache[path] = (mtime, entries)
+        return entries
+
+    def listing(self, path: str) -> List[Entry]:
+        """The cached listing of a directory, scanned if it's not cached"""
+
+        entries = self.get(path)
+        return self.scan(path) if entries is None else entries
+
+    def invalidate(self, path: str) -> None:
+        """Drop the listings affected by a change to a path
+
+        The listing of its directory is dropped, and the listings below it if
+        it was a directory. A changed .gitignore drops its directory's rules
+        and every listing below them."""
+
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        below = path
+        if os.path.basename(path) == ".gitignore":
+            self.matcher.invalidate(directory)
+            below = directory
+
+        prefix = below + os.sep
+        with self._lock:
+            self._generation += 1
+            self._cache.pop(directory, None)
+            for cached in [p for p in self._cache if p == below or p.startswith(prefix)]:
+                del self._cache[cached]
+
+    def clear(self) -> None:
+        """Drop every listing and the rules read"""
+
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+        self.matcher.invalidate()
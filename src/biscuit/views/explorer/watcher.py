@@ -37,35 +37,58 @@ class DirectoryTreeWatcher(PatternMatchingEventHandler):
     def stop_watch(self) -> None:
         self.observer.stop()
 
+    def refresh(self, path: str) -> None:
+        """Updates the directory of the path in the tree, on the Tk thread"""
+
+        self.base.after(0, self.master.update_path, os.path.dirname(path))
+
     def on_created(self, event) -> None:
+        self.base.search_index.changed(event.src_path, event.is_directory)
+        self.base.explorer.file_index.changed(event.src_path, event.is_directory)
+        self.master.invalidate(event.src_path)
         for i in self.master.search_ignore_dirs:
             if i in event.src_path:
                 return
 
-        self.master.update_path(os.path.dirname(event.src_path))
+        self.refresh(event.src_path)
         self.base.source_control.reload_tree()
 
     def on_deleted(self, event) -> None:
+        self.base.search_index.changed(event.src_path, event.is_directory)
+        self.base.explorer.file_index.changed(event.src_path, event.is_directory)
+        self.master.invalidate(event.src_path)
         for i in self.master.search_ignore_dirs:
             if i in event.src_path:
                 return
 
-        self.master.update_path(os.path.dirname(event.src_path))
+        self.refresh(event.src_path)
         self.base.source_control.reload_tree()
 
     def on_modified(self, event) -> None:
+        if not event.is_directory:
+            self.base.search_index.changed(event.src_path)
+            if os.path.basename(event.src_path) == ".gitignore":
+                self.master.invalidate(event.src_path)
+                self.refresh(event.src_path)
+                self.base.after(0, self.base.explorer.file_index.open)
         # self.master.update_path(os.path.dirname(event.src_path))
         # self.base.source_control.reload_tree()
         # print('modified', event.src_path)
         ...
 
     def on_moved(self, event):
+        self.base.search_index.changed(event.src_path, event.is_directory)
+        self.base.search_index.changed(event.dest_path, event.is_directory)
+        self.base.explorer.file_index.changed(event.src_path, event.is_directory)
+        self.base.explorer.file_index.changed(event.dest_path, event.is_directory)
+        self.master.invalidate(event.src_path)
+        self.master.invalidate(event.dest_path)
         for i in self.master.search_ignore_dirs:
             if i in event.src_path:
                 return
 
         try:
-            self.master.update_path(os.path.dirname(event.src_path))
+            self.refresh(event.src_path)
             self.base.source_control.reload_tree()
             print("moved", event.src_path, event.dest_path)
         except FileNotFoundError:
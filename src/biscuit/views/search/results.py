@@ -1,10 +1,13 @@
 __author__ = "nfoert"
 
 import os
-import re
+import queue
+import time
 import tkinter as tk
 from tkinter.messagebox import askyesno
 
+from biscuit.common.frames import FRAME_BUDGET, FRAME_INTERVAL
+from biscuit.common.search import SearchEngine, SearchQuery
 from biscuit.common.ui import Frame, Label, Tree
 
 
@@ -28,6 +31,7 @@ class Results(Frame):
 
         self.treeview = Tree(self)
         self.treeview.pack(fill=tk.BOTH, expand=True)
+        self.treeview.bind("<Double-1>", self.click)
 
         self.ignore_folders = [
             ".git",
@@ -46,6 +50,10 @@ class Results(Frame):
 
         self.results = []
 
+        self.engine: SearchEngine | None = None
+        self._job = None
+        self._files = 0
+
         self.searching = False
         self.case_sensitive = False
         self.whole_word = False
@@ -113,129 +121,109 @@ class Results(Frame):
 
     def search(self, *_) -> None:
         """
-        Find every file in the selected directory and then search for occurrences in it
+        Search every file in the active directory, on worker threads/processes.
+        Results are added to the tree in batches as they come in; starting a
+        new search cancels the running one.
         """
-        if not self.searching:
-            self.searching = True
-
-            self.label.config(text="Searching...")
-            self.base.notifications.info("Searching...")
-
-            found_files = []
-            search_string = self.master.searchbox.get()
-
-            self.clear_tree()
-            self.results = []
-
-            if self.base.active_directory:
-                for root, _, files in os.walk(self.base.active_directory):
-                    if root in self.ignore_folders:
-                        continue
-
-                    for file in files:
-                        file_path = os.path.join(root, file)
-
-                        if any(file.endswith(ext) for ext in self.ignore_exts):
-                            continue
-
-                        result = self.search_in_file(file_path, search_string)
+        self.cancel()
 
-                        if result:
-                            found_files.append(result[0])
-                            self.label.config(
-                                text=f"Searched {len(found_files)} files..."
-                            )
-
-                        self.base.root.update()
-
-                if len(found_files) > 0:
-                    self.label.config(
-                        text=f"{len(self.results)} results for '{search_string}'"
-                    )
-
-                else:
-                    self.label.config(text="No results.")
+        search_string = self.master.searchbox.get()
+        self.clear_tree()
+        self.results = []
+        self._files = 0
 
-            else:
-                self.label.config(text="No folder selected.")
+        if not self.base.active_directory:
+            self.label.config(text="No folder selected.")
+            return
+        if not search_string:
+            self.label.config(text="Search")
+            return
 
-            self.base.notifications.hide()
-            self.searching = False
+        self.searching = True
+        self.label.config(text="Searching...")
+
+        query = SearchQuery(
+            search_string,
+            case_sensitive=self.case_sensitive,
+            whole_word=self.whole_word,
+            regex=self.regex,
+        )
+        # files that can match, when the workspace index narrows them down
+        candidates = self.base.search_index.candidates(query)
+        self.engine = SearchEngine(
+            self.base.active_directory,
+            query,
+            ignore=self.ignore_folders,
+            paths=candidates,
+            backend="python" if candidates is not None else None,
+        )
+        self.engine.start()
+        self._job = self.after(FRAME_INTERVAL, self._pump)
+
+    def cancel(self, *_) -> None:
+        "Stop the running search, results shown so far stay"
+        if self._job:
+            self.after_cancel(self._job)
+            self._job = None
+        if self.engine:
+            self.engine.cancel()
+            self.engine = None
+        self.searching = False
 
+    def _pump(self) -> None:
+        "Add the results that fit in this frame's time budget to the tree"
+        self._job = None
+        engine = self.engine
+
+        # check before draining, results queued before it was set still count
+        done = engine.done.is_set()
+        deadline = time.perf_counter() + FRAME_BUDGET
+        while time.perf_counter() < deadline:
+            try:
+                file_path, matches = engine.results.get(block=False)
+            except queue.Empty:
+                break
+            self.add_file(file_path, matches)
         else:
-            self.base.notifications.warning("Already searching!")
+            done = False
 
-    def search_in_file(self, file_path: str, search_string: str) -> list:
-        """
-        Search a file for occurrences
-        - Case insensitive
-        - Case sensitive
-        - Whole word
-        - Regex
-        """
-        found = False
-        occurrences = 0
-        result_lines = []
-
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line_number, line in enumerate(f, start=1):
-                    if self.case_sensitive:
-                        if search_string in line:
-                            found = True
-                            occurrences += line.count(search_string)
-                            result_lines.append((line_number, line.strip()))
-                            text = search_string
-
-                    elif self.whole_word:
-                        result = re.search(r"\b" + search_string + r"\b", line)
-                        if result:
-                            found = True
-                            occurrences += len(
-                                re.findall(r"\b" + search_string + r"\b", line)
-                            )
-                            result_lines.append((line_number, line.strip()))
-                            text = result.group()
-
-                    elif self.regex:
-                        result = re.search(search_string, line)
-
-                        if result:
-                            found = True
-                            occurrences += len(re.findall(search_string, line))
-                            result_lines.append((line_number, line.strip()))
-                            text = result.group()
-
-                    else:
-                        if search_string.lower() in line.lower():
-                            found = True
-                            occurrences += line.count(search_string.lower())
-                            result_lines.append((line_number, line.strip()))
-                            text = search_string
-        except UnicodeDecodeError:
-            # case: file is non-text
+        if not done:
+            self.label.config(
+                text=f"Searching... {len(self.results)} results in {self._files} files"
+            )
+            self._job = self.after(FRAME_INTERVAL, self._pump)
             return
 
-        if found:
-            parent = self.add_item(
-                parent="",
-                index=tk.END,
-                open=True,
-                text=f"{os.path.basename(file_path)} | {file_path}",
+        self.engine = None
+        self.searching = False
+        if engine.error:
+            self.label.config(text=engine.error)
+        elif self.results:
+            self.label.config(
+                text=f"{len(self.results)} results for '{engine.query.pattern}'"
             )
+        else:
+            self.label.config(text="No results.")
+
+    def add_file(self, file_path: str, matches: list) -> None:
+        "Add the matches found in a file to the tree"
+        self._files += 1
+        parent = self.add_item(
+            parent="",
+            index=tk.END,
+            open=True,
+            text=f"{os.path.basename(file_path)} | {file_path}",
+        )
+
+        for line_number, line, text in matches:
+            child_elm = self.add_item(
+                parent=parent, index=tk.END, text=f"line {line_number}: {line}"
+            )
+            self.treeview.item(child_elm, tags=(file_path, line_number))
 
-            for line_number, line in result_lines:
-                child_elm = self.add_item(
-                    parent=parent, index=tk.END, text=f"line {line_number}: {line}"
-                )
-                self.treeview.item(child_elm, tags=(file_path, line_number))
-                self.treeview.bind("<Double-1>", self.click)
-
-                self.results.append(
-                    {"file_path": file_path, "line": line_number, "text": text}
-                )
-
-            return [file_path, occurrences, line_number]
+            self.results.append(
+                {"file_path": file_path, "line": line_number, "text": text}
+            )
 
     def replace(self) -> None:
         """
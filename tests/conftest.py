@@ -1,5 +1,6 @@
 import os
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, PropertyMock
 
@@ -29,6 +30,10 @@ def mock_base():
     base.config.show_minimap = True
     base.config.show_linenumbers = True
     base.config.vim_mode = False
+    base.config.undo_memory_limit = 64
+    base.config.large_file_threshold = 50
+    base.config.warm_language_servers = False
+    base.config.workspace_search_index = False
     base.config.render_indent_guides = True
     base.config.auto_save_enabled = False
     base.config.auto_closing_pairs = True
@@ -50,3 +55,80 @@ def mock_base():
     base.settings.resources = MagicMock()
     base.settings.bindings = MagicMock()
     return base
+
+
+@pytest.fixture
+def write():
+    """Write a file under a folder, making its parent folders, and return
+    its path. Bytes content is written as is."""
+
+    def write(root, relpath, content=""):
+        path = os.path.join(root, *relpath.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+        return path
+
+    return write
+
+
+@pytest.fixture
+def edit():
+    """Apply an edit to a document and return its edit record, like the
+    ones the editor's Text produces"""
+
+    from biscuit.editor.text.undo import make_change
+
+    def edit(doc, start, end, text):
+        change = make_change(start, doc.replace(start, end, text), text)
+        return {
+            "start_point": change.start,
+            "old_end_point": change.old_end,
+            "new_end_point": change.new_end,
+        }
+
+    return edit
+
+
+class FakeWidget:
+    """Widget keeping the callbacks scheduled with `after` and `after_idle`,
+    they run when the test asks instead of from an event loop"""
+
+    def __init__(self):
+        self.idle = []
+        self.timers = []
+        self.jobs = {}
+
+    def after_idle(self, callback):
+        return self._schedule(self.idle, callback)
+
+    def after(self, _, callback):
+        return self._schedule(self.timers, callback)
+
+    def _schedule(self, jobs, callback):
+        jobs.append(callback)
+        job = f"job{len(self.jobs)}"
+        self.jobs[job] = (jobs, callback)
+        return job
+
+    def after_cancel(self, job):
+        jobs, callback = self.jobs[job]
+        if callback in jobs:
+            jobs.remove(callback)
+
+    def run(self, timeout=5):
+        """Run the scheduled callbacks, and the ones they schedule, until
+        none are left"""
+
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            jobs = self.idle or self.timers
+            if not jobs:
+                return
+            jobs.pop(0)()
+        raise TimeoutError
+
+
+@pytest.fixture
+def widget():
+    return FakeWidget()
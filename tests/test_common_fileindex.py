@@ -0,0 +1,67 @@
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.common.fileindex import FileIndex
+
+
+def wait(index, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not index.ready:
+        if time.monotonic() > deadline:
+            raise TimeoutError
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def index(tmp_path, write):
+    root = str(tmp_path)
+    write(root, ".gitignore", "*.log\n")
+    write(root, "deep/er/c.py")
+    write(root, "a.py")
+    write(root, "debug.log")
+    write(root, "node_modules/pkg/index.js")
+    write(root, "src/b.py")
+
+    base = MagicMock()
+    base.active_directory = root
+    index = FileIndex(base, ignore=["node_modules"])
+    index.open()
+    wait(index)
+    yield index
+    index.close()
+
+
+def relpaths(*paths):
+    return [os.path.join(*p.split("/")) for p in paths]
+
+
+class TestFileIndex:
+    def test_build(self, index):
+        assert index.paths() == relpaths(".gitignore", "a.py", "src/b.py", "deep/er/c.py")
+
+    def test_changes(self, index, write):
+        root = index.root
+        version = index.version
+        index.changed(write(root, "src/new.py"))
+        index.changed(write(root, "new.log"))
+        os.remove(os.path.join(root, "a.py"))
+        index.changed(os.path.join(root, "a.py"))
+        assert index.version > version
+        assert sorted(index.paths()) == sorted(
+            relpaths(".gitignore", "src/b.py", "src/new.py", "deep/er/c.py")
+        )
+
+    def test_directory_changes(self, index, write):
+        root = index.root
+        write(root, "lib/x/y.py")
+        index.changed(os.path.join(root, "lib"), is_dir=True)
+        assert os.path.join("lib", "x", "y.py") in index.paths()
+
+        os.remove(os.path.join(root, "deep", "er", "c.py"))
+        os.rmdir(os.path.join(root, "deep", "er"))
+        os.rmdir(os.path.join(root, "deep"))
+        index.changed(os.path.join(root, "deep"), is_dir=True)
+        assert not [p for p in index.paths() if p.startswith("deep")]
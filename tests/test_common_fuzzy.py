@@ -0,0 +1,70 @@
+import random
+import string
+
+from biscuit.common.fuzzy import FuzzySearch, fuzzy_score
+
+
+def search_all(query, candidates, **kwargs):
+    search = FuzzySearch(query, candidates, **kwargs)
+    while not search.step(0.01):
+        pass
+    return search
+
+
+class TestFuzzyScore:
+    def test_subsequence(self):
+        assert fuzzy_score("abc", "a_b_c") is not None
+        assert fuzzy_score("abc", "acb") is None
+        assert fuzzy_score("", "anything") == 0
+
+    def test_smart_case(self):
+        assert fuzzy_score("readme", "README.md") is not None
+        assert fuzzy_score("ReadMe", "README.md") is None
+        assert fuzzy_score("ReadMe", "ReadMe.md") is not None
+
+    def test_boundaries_score_more(self):
+        assert fuzzy_score("fb", "foo/bar") > fuzzy_score("fb", "xfxxbx")
+        assert fuzzy_score("fb", "fooBar") > fuzzy_score("fb", "foobar")
+        assert fuzzy_score("main", "src/main.py") > fuzzy_score("main", "src/domain.py")
+
+    def test_consecutive_score_more(self):
+        assert fuzzy_score("init", "__init__.py") > fuzzy_score("init", "i_n_i_t.py")
+
+    def test_shortest_run(self):
+        # the match ending first is scored from its latest start
+        assert fuzzy_score("ab", "a/x/ab") == fuzzy_score("ab", "x/ab")
+
+
+class TestFuzzySearch:
+    def test_ranking(self):
+        paths = ["src/domain.py", "docs/main.md", "src/main.py", "tests/maintenance.py"]
+        assert search_all("main", paths).results()[:2] == ["src/main.py", "docs/main.md"]
+
+    def test_limit(self):
+        paths = [f"file{i}.py" for i in range(100)]
+        search = search_all("file", paths, limit=10)
+        assert len(search.results()) == 10
+        assert len(search.matched) == 100
+        assert search_all("", paths, limit=10).results() == paths[:10]
+
+    def test_refine_matches_fresh_search(self):
+        rng = random.Random(0)
+        paths = [
+            "/".join("".join(rng.choices(string.ascii_lowercase, k=5)) for _ in range(3))
+            for _ in range(5000)
+        ]
+        search = FuzzySearch("a", paths)
+        search.step(0)
+        for query in ("ab", "abc", "abcd"):
+            search = search.refine(query)
+            search.step(0)
+        while not search.step(0.01):
+            pass
+        assert search.matched == search_all("abcd", paths).matched
+        assert search.results() == search_all("abcd", paths).results()
+
+        # a query that doesn't extend the last one searches everything again
+        assert search.refine("b").candidates is paths
+        assert sorted(search_all("b", paths).matched) == sorted(
+            p for p in paths if "b" in p
+        )
@@ -0,0 +1,111 @@
+from unittest.mock import MagicMock
+
+from biscuit.common.actionset import ActionSet
+from biscuit.common.palette import palette
+from biscuit.common.palette.palette import Palette, rank_actions
+
+
+class FakeRow:
+    def __init__(self):
+        self.text = None
+        self.shown = False
+        self.selected = False
+
+    def set_data(self, text, command, description=""):
+        self.text = text
+
+    def mark_term(self, term):
+        pass
+
+    def select(self):
+        self.selected = True
+
+    def deselect(self):
+        self.selected = False
+
+    def grid(self):
+        self.shown = True
+
+    def grid_remove(self):
+        self.shown = False
+
+
+def make_palette():
+    p = Palette.__new__(Palette)
+    p.rows = [FakeRow() for _ in range(palette.VISIBLE_ROWS)]
+    p.active_items = []
+    p.selected = p.offset = p._generation = 0
+    p.searchbar = MagicMock(term="")
+    p.scrollbar = MagicMock()
+    p.base = MagicMock()
+    p.base.after = lambda _, callback, *args: callback(*args)
+    return p
+
+
+def shown(p):
+    return [row.text for row in p.rows if row.shown]
+
+
+def noop(_):
+    pass
+
+
+class TestRankActions:
+    def test_order(self):
+        actions = [("xab", noop), ("abc", noop), ("ab", noop), ("zz", noop), ("", noop)]
+        assert [a[0] for a in rank_actions(actions, "AB")] == ["ab", "abc", "xab"]
+
+    def test_cancelled(self):
+        assert rank_actions([("a", noop)] * 10, "a", lambda: True) is None
+
+
+class TestPalette:
+    def test_rows_are_reused(self):
+        p = make_palette()
+        p.show_items([(f"item {i}", noop) for i in range(1000)])
+        assert shown(p) == [f"item {i}" for i in range(palette.VISIBLE_ROWS)]
+
+        p.show_items([("one", noop)])
+        assert shown(p) == ["one"]
+
+    def test_selection_scrolls(self):
+        p = make_palette()
+        p.show_items([(f"item {i}", noop) for i in range(100)])
+        for _ in range(palette.VISIBLE_ROWS + 2):
+            p.select(1)
+        assert p.offset == 3
+        assert shown(p)[-1] == f"item {palette.VISIBLE_ROWS + 2}"
+        assert p.rows[-1].selected and not p.rows[0].selected
+
+        p.yview("moveto", "0.5")
+        assert shown(p)[0] == "item 50"
+        p.select(-1)
+        assert shown(p)[0] == f"item {palette.VISIBLE_ROWS + 1}"
+
+    def test_large_sets_ranked_on_worker(self, monkeypatch):
+        p = make_palette()
+        threads = []
+        monkeypatch.setattr(
+            palette.threading, "Thread", lambda target, args, daemon: threads.append((target, args)) or MagicMock()
+        )
+        p.active_set = ActionSet("test", "", [(f"item {i}", noop) for i in range(2000)], pinned=[])
+        p.searchbar.term = "item 1999"
+        p.update_results()
+        p.searchbar.term = "item 2"
+        p.update_results()
+        assert len(threads) == 2
+
+        # the ranking of the newer term is shown, the older one is dropped
+        target, args = threads[1]
+        target(*args)
+        assert shown(p)[0] == "item 2"
+        target, args = threads[0]
+        target(*args)
+        assert shown(p)[0] == "item 2"
+
+    def test_ranked_sets_shown_as_they_are(self):
+        p = make_palette()
+        p.active_set = ActionSet("files", "", [("b", noop), ("a", noop)], pinned=[], ranked=True)
+        p.searchbar.term = "zzz"
+        p.update_results()
+        assert shown(p) == ["b", "a"]
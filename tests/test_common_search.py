@@ -0,0 +1,164 @@
+import json
+import os
+
+import pytest
+
+from biscuit.common.gitignore import IgnoreMatcher, parse_rules, walk_files
+from biscuit.common.search import (
+    SearchEngine,
+    SearchQuery,
+    parse_rg_message,
+    search_file,
+)
+
+
+def run(engine):
+    engine.start()
+    assert engine.done.wait(30)
+    results = {}
+    while not engine.results.empty():
+        path, matches = engine.results.get()
+        results[path] = matches
+    return results
+
+
+@pytest.fixture
+def tree(tmp_path, write):
+    root = str(tmp_path)
+    write(root, ".gitignore", "*.log\nbuild/\n!keep.log\n")
+    write(root, "src/main.py", "import os\nprint('needle')\n")
+    write(root, "src/.gitignore", "generated.py\n")
+    write(root, "src/generated.py", "needle\n")
+    write(root, "debug.log", "needle\n")
+    write(root, "keep.log", "needle\n")
+    write(root, "build/out.txt", "needle\n")
+    write(root, "node_modules/lib.js", "needle\n")
+    write(root, "image.bin", b"needle\0\x01\x02")
+    return root
+
+
+class TestGitIgnore:
+    def test_rules(self):
+        rules = parse_rules(["# comment", "", "*.pyc", "/root.txt", "docs/**/*.md"])
+        assert [r.match(p, False) for r, p in zip(rules, ["a/b.pyc", "root.txt", "docs/a/b/c.md"])] == [True] * 3
+        assert not rules[1].match("sub/root.txt", False)
+
+    def test_dir_only(self):
+        (rule,) = parse_rules(["build/"])
+        assert rule.match("build", True)
+        assert not rule.match("build", False)
+
+    def test_matcher(self, tree):
+        matcher = IgnoreMatcher(tree)
+        assert matcher.ignored(os.path.join(tree, "debug.log"))
+        assert not matcher.ignored(os.path.join(tree, "keep.log"))
+        assert matcher.ignored(os.path.join(tree, "build"), is_dir=True)
+        assert matcher.ignored(os.path.join(tree, "src", "generated.py"))
+        assert not matcher.ignored(os.path.join(tree, "generated.py"))
+        assert matcher.ignored(os.path.join(tree, ".git"), is_dir=True)
+
+    def test_walk_files(self, tree):
+        matcher = IgnoreMatcher(tree, always=(".git", "node_modules"))
+        files = [os.path.relpath(p, tree).replace(os.sep, "/") for p in walk_files(tree, matcher)]
+        assert sorted(files) == [".gitignore", "image.bin", "keep.log", "src/.gitignore", "src/main.py"]
+
+
+class TestSearchQuery:
+    def test_literal(self):
+        regex = SearchQuery("a.b").compile()
+        assert regex.search("xA.Bx")
+        assert not regex.search("axb")
+
+    def test_case_sensitive_whole_word(self):
+        regex = SearchQuery("foo", case_sensitive=True, whole_word=True).compile()
+        assert regex.search("a foo b")
+        assert not regex.search("a Foo b")
+        assert not regex.search("foobar")
+
+    def test_rg_command(self):
+        command = SearchQuery("x", regex=True).rg_command(["/root"], ["venv"], ["*.py"])
+        assert "-i" in command and "-F" not in command
+        assert command[-3:] == ["-e", "x", "/root"]
+        assert "!venv" in command and "*.py" in command
+
+
+class TestSearchFile:
+    def test_matches(self, tmp_path, write):
+        path = write(str(tmp_path), "a.txt", "one\n  two two\nthree\ntwo\n")
+        assert search_file(path, SearchQuery("two").compile()) == [
+            (2, "two two", "two"),
+            (4, "two", "two"),
+        ]
+
+    def test_binary(self, tmp_path, write):
+        path = write(str(tmp_path), "a.bin", b"two\0")
+        assert search_file(path, SearchQuery("two").compile()) == []
+
+    def test_parse_rg_message(self):
+        match = {
+            "type": "match",
+            "data": {
+                "path": {"text": "/a.py"},
+                "lines": {"text": "  x = needle\n"},
+                "line_number": 3,
+                "absolute_offset": 10,
+                "submatches": [{"match": {"text": "needle"}, "start": 6, "end": 12}],
+            },
+        }
+        line = json.dumps(match, separators=(",", ":"))
+        assert parse_rg_message(line) == ("/a.py", (3, "x = needle", "needle"))
+        assert parse_rg_message(line.encode()) == ("/a.py", (3, "x = needle", "needle"))
+        assert parse_rg_message(json.dumps({"type": "begin", "data": {}})) is None
+        assert parse_rg_message("not json") is None
+
+
+class TestSearchEngine:
+    def test_python_backend(self, tree):
+        engine = SearchEngine(tree, SearchQuery("needle"), ignore=["node_modules"])
+        engine.backend = "python"
+        results = run(engine)
+        assert engine.error is None
+        assert sorted(os.path.relpath(p, tree) for p in results) == ["keep.log", os.path.join("src", "main.py")]
+        assert results[os.path.join(tree, "src", "main.py")] == [(2, "print('needle')", "needle")]
+
+    def test_globs(self, tree):
+        engine = SearchEngine(tree, SearchQuery("needle"), globs=["*.py", "*.log", "!src/**"])
+        engine.backend = "python"
+        assert list(run(engine)) == [os.path.join(tree, "keep.log")]
+
+    def test_paths(self, tree):
+        path = os.path.join(tree, "debug.log")
+        engine = SearchEngine(tree, SearchQuery("needle"), paths=[path])
+        engine.backend = "python"
+        assert list(run(engine)) == [path]
+
+    def test_paused_while_results_wait(self, tmp_path, monkeypatch, write):
+        monkeypatch.setattr("biscuit.common.search.RESULTS_QUEUE_SIZE", 2)
+        root = str(tmp_path)
+        for i in range(20):
+            write(root, f"{i:02}.txt", "needle\n")
+        engine = SearchEngine(root, SearchQuery("needle"))
+        engine.backend = "python"
+        engine.start()
+        assert not engine.done.wait(0.5)
+        assert engine.results.full()
+
+        found = []
+        while not (engine.done.is_set() and engine.results.empty()):
+            try:
+                found.append(engine.results.get(timeout=5)[0])
+            except Exception:
+                break
+        assert len(found) == 20
+
+    def test_invalid_pattern(self, tree):
+        engine = SearchEngine(tree, SearchQuery("(", regex=True))
+        assert run(engine) == {}
+        assert engine.error.startswith("Invalid pattern")
+
+    def test_cancel(self, tree):
+        engine = SearchEngine(tree, SearchQuery("needle"))
+        engine.backend = "python"
+        engine.cancel()
+        run(engine)
+        assert engine.done.is_set()
@@ -0,0 +1,129 @@
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.common.search import SearchQuery
+from biscuit.common.searchindex import (
+    IndexFile,
+    SearchIndex,
+    build_index,
+    query_trigrams,
+    trigrams,
+)
+
+
+@pytest.fixture
+def workspace(tmp_path, write):
+    root = str(tmp_path)
+    write(root, ".gitignore", "ignored.txt\n")
+    write(root, "a.py", "def Needle(): pass\n")
+    write(root, "b.py", "haystack only\n")
+    write(root, "sub/c.txt", "needle and thread\n")
+    write(root, "ignored.txt", "needle\n")
+    write(root, "image.bin", b"needle\0")
+    return root
+
+
+class FakeBase:
+    def __init__(self, root):
+        self.active_directory = root
+        self.config = MagicMock(workspace_search_index=True)
+        self.logger = MagicMock()
+        self.scheduled = []
+
+    def bind(self, *_, **__):
+        pass
+
+    def after(self, _, callback, *args):
+        self.scheduled.append((callback, args))
+
+    def run_scheduled(self, timeout=30):
+        """Run scheduled callbacks until the index is ready"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            while self.scheduled:
+                callback, args = self.scheduled.pop(0)
+                callback(*args)
+            time.sleep(0.01)
+            if self.index.ready and not self.index.building and not self.scheduled:
+                return
+        raise TimeoutError
+
+
+def relpaths(root, paths):
+    return sorted(os.path.relpath(p, root).replace(os.sep, "/") for p in paths)
+
+
+class TestTrigrams:
+    def test_trigrams(self):
+        assert trigrams(b"AbCd") == {b"abc", b"bcd"}
+
+    def test_literal_query(self):
+        assert query_trigrams(SearchQuery("Needle")) == trigrams(b"needle")
+        assert query_trigrams(SearchQuery("ab")) is None
+
+    def test_regex_query(self):
+        assert query_trigrams(SearchQuery(r"foo\d+bar", regex=True)) == {b"foo", b"bar"}
+        assert query_trigrams(SearchQuery("foo|bar", regex=True)) is None
+        assert query_trigrams(SearchQuery("[", regex=True)) is None
+
+    def test_non_ascii_ignoring_case(self):
+        assert query_trigrams(SearchQuery("é")) is None
+        assert query_trigrams(SearchQuery("éa", case_sensitive=True)) == trigrams("éa".encode())
+
+
+class TestIndexFile:
+    def test_candidates(self, workspace, tmp_path_factory):
+        path = str(tmp_path_factory.mktemp("index") / "index.bin")
+        build_index(workspace, path)
+        index = IndexFile(path)
+        try:
+            files = [index.file(i)[0] for i in index.candidates(trigrams(b"needle"))]
+            assert relpaths(workspace, files) == ["a.py", "sub/c.txt"]
+            assert index.candidates(trigrams(b"nothing here")) == set()
+            assert "ignored.txt" not in relpaths(workspace, (f for f, *_ in index.files()))
+        finally:
+            index.close()
+
+
+class TestSearchIndex:
+    def test_build_and_query(self, workspace):
+        base = FakeBase(workspace)
+        base.index = index = SearchIndex(base)
+        assert index.candidates(SearchQuery("needle")) is None
+
+        index.open()
+        base.run_scheduled()
+        assert os.path.isfile(os.path.join(workspace, ".biscuit", "search-index.bin"))
+        assert relpaths(workspace, index.candidates(SearchQuery("needle"))) == ["a.py", "sub/c.txt"]
+        assert index.candidates(SearchQuery("ne")) is None
+        index.close()
+
+    def test_changes(self, workspace, write):
+        base = FakeBase(workspace)
+        base.index = index = SearchIndex(base)
+        index.open()
+        base.run_scheduled()
+
+        new = write(workspace, "new.py", "needle\n")
+        index.changed(new)
+        index.changed(write(workspace, "ignored.txt", "needle again\n"))
+        os.remove(os.path.join(workspace, "a.py"))
+        index.changed(os.path.join(workspace, "a.py"))
+        assert relpaths(workspace, index.candidates(SearchQuery("needle"))) == ["new.py", "sub/c.txt"]
+        index.close()
+
+    def test_changes_since_last_session(self, workspace, write):
+        base = FakeBase(workspace)
+        base.index = index = SearchIndex(base)
+        index.open()
+        base.run_scheduled()
+        index.close()
+
+        write(workspace, "b.py", "needle in the haystack now\n")
+        index.open()
+        base.run_scheduled()
+        assert relpaths(workspace, index.candidates(SearchQuery("needle"))) == ["a.py", "b.py", "sub/c.txt"]
+        index.close()
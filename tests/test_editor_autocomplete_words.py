@@ -0,0 +1,76 @@
+import time
+
+from biscuit.editor.autocomplete.words import WordIndex
+from biscuit.editor.text.document import Document
+
+
+def document(text):
+    doc = Document()
+    doc.set_text(text)
+    return doc
+
+
+class TestWordIndex:
+    def test_frequency(self):
+        index = WordIndex()
+        words = index.open("Python", document("format\nfoo foo foo\nfor\nx"))
+        assert words.completions("fo", 3) == ["foo", "for", "format"]
+        assert words.completions("zz", 3) == []
+
+    def test_proximity(self):
+        index = WordIndex()
+        text = "\n".join(["value_far"] * 2 + [""] * 150 + ["value_near", "va"])
+        words = index.open("Python", document(text))
+        assert words.completions("va", 153)[0] == "value_near"
+        assert words.completions("va", 0)[0] == "value_far"
+
+    def test_typed_word_is_not_completed(self):
+        index = WordIndex()
+        words = index.open("Python", document("alpha\nal"))
+        assert words.completions("al", 1) == ["alpha"]
+        words = index.open("Python", document("al"))
+        assert "al" in words.completions("al", 0)
+
+    def test_incremental_updates(self, edit):
+        index = WordIndex()
+        doc = document("apple\nbanana\n")
+        words = index.open("Python", doc)
+        words.completions("ap", 0)
+
+        words.update(edit(doc, (1, 0), (1, 6), "apricot\navocado"))
+        assert words.completions("a", 0) == ["apple", "apricot", "avocado"]
+        words.update(edit(doc, (0, 0), (2, 0), ""))
+        assert words.lines[0] == ["avocado"]
+        assert words.completions("a", 0) == ["avocado"]
+
+        # untracked edits rescan on the next completion
+        doc.set_text("apex")
+        words.update(None)
+        assert words.completions("ap", 0) == ["apex"]
+
+    def test_shared_per_language(self):
+        index = WordIndex()
+        first = index.open("Python", document("shared_name"))
+        second = index.open("Python", document("sh"))
+        other = index.open("Rust", document("sh"))
+        first.completions("sh", 0)
+        assert second.completions("sh", 0) == ["shared_name"]
+        assert other.completions("sh", 0) == []
+
+        first.close()
+        assert second.completions("sh", 0) == []
+        second.close()
+        other.close()
+        assert index.languages == {}
+
+    def test_large_document(self, edit):
+        index = WordIndex()
+        doc = document("\n".join(f"name_{i} = value_{i % 100} + other" for i in range(30_000)))
+        words = index.open("Python", doc)
+        words.completions("va", 0)
+
+        start = time.perf_counter()
+        for i in range(100):
+            words.update(edit(doc, (15_000, 0), (15_000, 0), "v"))
+            words.completions("va", 15_000)
+        assert (time.perf_counter() - start) / 100 < 0.005
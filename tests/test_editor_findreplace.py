@@ -0,0 +1,224 @@
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.editor.findreplace import find_replace
+from biscuit.editor.findreplace.find_replace import FindReplace, line_local
+from biscuit.editor.text.document import Document
+
+
+class FakeText:
+    """Text widget showing `height` lines from `top`, edits produce the edit
+    records the editor's Text does"""
+
+    def __init__(self, findreplace, content, height=20):
+        self.findreplace = findreplace
+        self.document = Document()
+        self.document.set_text(content)
+        self.insert = (0, 0)
+        self.top = 0
+        self.height = height
+        self.tagged = []
+
+    def point(self, index):
+        if index == "insert":
+            return self.insert
+        if index.startswith("@0,"):
+            y = int(index[3:])
+            return (min(self.top + y // 10, self.document.line_count - 1), 0)
+        row, col = index.split(".")
+        return int(row) - 1, int(col)
+
+    def index(self, index):
+        row, col = self.point(index)
+        return f"{row + 1}.{col}"
+
+    def winfo_height(self):
+        return self.height * 10
+
+    def mark_set(self, mark, index):
+        self.insert = self.point(index)
+
+    def see(self, index):
+        row = self.point(index)[0]
+        if not self.top <= row < self.top + self.height:
+            self.top = max(row - self.height // 2, 0)
+
+    def focus(self):
+        pass
+
+    def tag_add(self, tag, *indices):
+        if tag == "found":
+            self.tagged.extend(self.point(i) for i in indices[::2])
+
+    def tag_remove(self, tag, start, end):
+        if tag == "found":
+            first = self.point(start)
+            last = (self.document.line_count, 0) if end == "end" else (int(end.split(".")[0]), 0)
+            self.tagged = [p for p in self.tagged if not first <= p < last]
+
+    @staticmethod
+    def shift(point, end, new_end):
+        if point < end:
+            return point
+        if point[0] == end[0]:
+            return new_end[0], new_end[1] + point[1] - end[1]
+        return point[0] + new_end[0] - end[0], point[1]
+
+    def replace(self, start, end, text):
+        start, end = self.point(start), self.point(end)
+        lines = text.split("\n")
+        if len(lines) == 1:
+            new_end = (start[0], start[1] + len(text))
+        else:
+            new_end = (start[0] + len(lines) - 1, len(lines[-1]))
+        self.document.replace(start, end, text)
+        # tags move with the text after the edit, like in Tk
+        self.tagged = [
+            self.shift(p, end, new_end) for p in self.tagged if not start <= p < end
+        ]
+        if self.insert >= end:
+            self.insert = new_end if self.insert == end else self.insert
+        self.findreplace.content_changed(
+            self, {"start_point": start, "old_end_point": end, "new_end_point": new_end}
+        )
+
+
+class Entry:
+    def __init__(self, value=""):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+@pytest.fixture
+def make():
+    def make(content, pattern, height=20):
+        fr = FindReplace.__new__(FindReplace)
+        fr.active = True
+        fr.matchstring = None
+        fr.re_ = None
+        fr.starts, fr.ends = [], []
+        fr._shown = None
+        fr._stale = False
+        fr._replacing = False
+        fr._rescan_job = None
+        fr._view_job = None
+        fr.findbox = Entry(pattern)
+        fr.replacebox = Entry()
+        fr.results_count = MagicMock()
+        fr.lift = lambda: None
+        fr.after = MagicMock(return_value="job")
+        fr.after_cancel = MagicMock()
+        fr.text = FakeText(fr, content, height)
+        fr.get_find_input()
+        return fr
+
+    return make
+
+
+class TestFindReplace:
+    def test_scan_points(self, make):
+        fr = make("ab ab\nx\nyab\n", "ab")
+        assert fr.starts == [(0, 0), (0, 3), (2, 1)]
+        assert fr.ends == [(0, 2), (0, 5), (2, 3)]
+
+    def test_multiline_match(self, make):
+        fr = make("a\nb\na\nb", "a\\nb")
+        assert fr.starts == [(0, 0), (2, 0)]
+        assert fr.ends == [(1, 1), (3, 1)]
+
+    def test_invalid_pattern(self, make):
+        fr = make("text", "(")
+        assert fr.starts == []
+
+    def test_navigation_wraps(self, make):
+        fr = make("ab ab\nx\nyab\n", "ab")
+        fr.text.insert = (0, 1)
+        fr.next_match()
+        assert fr.text.insert == (0, 3)
+        fr.next_match()
+        fr.next_match()
+        assert fr.text.insert == (0, 0)
+        fr.prev_match()
+        assert fr.text.insert == (2, 1)
+        assert fr.is_on_match()
+
+    def test_highlights_visible_rows_only(self, make):
+        fr = make("match\n" * 1000, "match", height=20)
+        assert len(fr.text.tagged) == 21 + find_replace.VIEW_MARGIN
+        fr.text.top = 500
+        fr._update_view()
+        rows = {row for row, _ in fr.text.tagged}
+        assert 500 - find_replace.VIEW_MARGIN in rows and 520 + find_replace.VIEW_MARGIN in rows
+        assert 300 not in rows
+
+    def test_edit_updates_matches(self, make):
+        fr = make("ab\nx\nab ab\n", "ab")
+        fr.text.replace("2.0", "2.1", "ab\nnew ab")
+        assert fr.starts == [(0, 0), (1, 0), (2, 4), (3, 0), (3, 3)]
+        assert fr.ends[1:3] == [(1, 2), (2, 6)]
+        fr.text.replace("1.0", "3.0", "")
+        assert fr.starts == [(0, 4), (1, 0), (1, 3)]
+        assert sorted(fr.text.tagged) == fr.starts
+
+    def test_multiline_pattern_rescans(self, make):
+        fr = make("ab\n", "^ab")
+        fr.text.replace("1.0", "1.0", "ab\n")
+        assert fr._stale
+        fr.next_match()
+        assert fr.starts == [(0, 0)]
+
+    def test_lines_added_above_the_highlights(self, make):
+        fr = make("match\n" * 1000, "match", height=20)
+        fr.text.top = 500
+        fr.highlight_matches()
+        fr.text.replace("10.0", "10.0", "match\n" * 5)
+        assert not fr._stale
+
+        fr.text.top = 440
+        fr._update_view()
+        rows = {row for row, _ in fr.text.tagged}
+        assert rows >= set(range(440 - find_replace.VIEW_MARGIN, 460 + find_replace.VIEW_MARGIN))
+
+    @pytest.mark.parametrize(
+        "pattern",
+        ["ab", r"\bab\d+", "[a-z]+", "(?m)^ab$", r"(?<=a)b", r"a(?!\S)", "[^\n]+", "(a|b)*"],
+    )
+    def test_line_local(self, pattern):
+        assert line_local(pattern)
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            r"a\nb", r"a\x0ab", r"a\012b", "a\nb", r"[\t-\r]", r"[\x00-\x7f]+", r"a\sb",
+            r"[^a]", r"a\Wb", "(?s)a.b", "(?s:a.)b", "^ab", "ab$", r"\Aab", r"(?x) a \n b",
+            r"(?<=\n)a", "(", "a(?:b|[^c])",
+        ],
+    )
+    def test_not_line_local(self, pattern):
+        assert not line_local(pattern)
+
+    def test_replace(self, make):
+        fr = make("ab x ab", "ab")
+        fr.replacebox.value = "cd"
+        fr.text.insert = (0, 5)
+        fr.replace()
+        assert fr.text.document.text() == "ab x cd"
+        assert fr.starts == [(0, 0)]
+
+    def test_replace_all_is_one_edit(self, make):
+        fr = make("x ab\n" * 100_000, "ab")
+        fr.replacebox.value = "abc"
+        edits = []
+        replace = fr.text.replace
+        fr.text.replace = lambda *a: edits.append(a) or replace(*a)
+
+        start = time.perf_counter()
+        fr.replace_all()
+        assert time.perf_counter() - start < 1
+        assert len(edits) == 1
+        assert fr.text.document.text() == "x abc\n" * 100_000
+        assert len(fr.starts) == 100_000
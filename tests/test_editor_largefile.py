@@ -0,0 +1,142 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.editor import types
+from biscuit.editor.largefile import mapped as mapped_module
+from biscuit.editor.largefile import LargeFileViewer, MappedFile
+from biscuit.events import EventManager
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(mapped_module, "BLOCK_SIZE", 16)
+
+
+def open_file(tmp_path, content: bytes, index=True) -> MappedFile:
+    path = tmp_path / "big.log"
+    path.write_bytes(content)
+    mapped = MappedFile(str(path))
+    if index:
+        mapped.start_indexing().join()
+    return mapped
+
+
+LINES = [f"line {i} " + "x" * (i % 7) for i in range(200)]
+CONTENT = "\n".join(LINES).encode()
+
+
+class TestMappedFile:
+    def test_line_count(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT)
+        assert mapped.complete
+        assert mapped.line_count == len(LINES)
+
+    def test_trailing_newline_ends_with_empty_line(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, b"a\nb\n")
+        assert mapped.line_count == 3
+        assert mapped.lines(0, 10) == ["a", "b", ""]
+
+    def test_empty_file(self, tmp_path):
+        mapped = open_file(tmp_path, b"")
+        assert mapped.line_count == 1
+        assert mapped.lines(0, 10) == [""]
+        assert mapped.search("a") is None
+        mapped.close()
+
+    def test_window(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT)
+        assert mapped.lines(0, 3) == LINES[:3]
+        assert mapped.lines(150, 5) == LINES[150:155]
+        assert mapped.lines(198, 5) == LINES[198:]
+        assert mapped.lines(500, 5) == []
+
+    def test_lookups_before_indexing(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT, index=False)
+        assert mapped.lines(120, 2) == LINES[120:122]
+        assert not mapped.complete
+
+        offset = mapped.line_offset(180)
+        assert CONTENT[offset:].startswith(LINES[180].encode())
+        assert mapped.line_at(offset) == 180
+
+    def test_line_at(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT)
+        for line in (0, 1, 57, 199):
+            offset = mapped.line_offset(line)
+            assert mapped.line_at(offset) == line
+            assert mapped.line_at(offset + 3) == line
+        assert mapped.line_at(mapped.size) == 199
+
+    def test_crlf_and_long_lines(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(mapped_module, "MAX_LINE_BYTES", 4)
+        mapped = open_file(tmp_path, b"abcdefgh\r\nij\r\n")
+        assert mapped.lines(0, 3) == ["abcd", "ij", ""]
+
+    def test_search(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT)
+        start, end = mapped.search("line 42 ")
+        assert mapped.line_at(start) == 42
+        assert CONTENT[start:end] == b"line 42 "
+
+        # continues after the previous match, wrapping around to the start
+        assert mapped.line_at(mapped.search("line 1", end)[0]) == 100
+        assert mapped.line_at(mapped.search("line 0 ", end)[0]) == 0
+        assert mapped.search("line 0 ", end, wrap=False) is None
+
+    def test_search_regex_and_case(self, tmp_path, small_blocks):
+        mapped = open_file(tmp_path, CONTENT)
+        start, _ = mapped.search(r"line 1\d5 x{6}$", regex=True)
+        assert mapped.line_at(start) == 125
+        assert mapped.search("LINE 3 ") is None
+        assert mapped.line_at(mapped.search("LINE 3 ", case=False)[0]) == 3
+
+    def test_column(self, tmp_path):
+        mapped = open_file(tmp_path, "añb\nc€d".encode())
+        start, end = mapped.search("d")
+        assert mapped.column(start) == (1, 2)
+        assert mapped.column(mapped.search("b")[0]) == (0, 2)
+
+
+class FakeViewer(LargeFileViewer):
+    """LargeFileViewer without its widgets, recording the lines it goes to"""
+
+    def __init__(self, master, path):
+        self.path = path
+        self.text = MagicMock()
+        self.bindings = []
+        self.lines = []
+
+    def bind(self, sequence, func, add=None):
+        self.bindings.append((sequence, func))
+
+    def event_generate(self, sequence, **_):
+        for bound, func in self.bindings:
+            if bound == sequence:
+                func(None)
+
+    def goto_line(self, line):
+        self.lines.append(line)
+
+
+def test_goto_location_in_large_file(tmp_path, mock_base, monkeypatch):
+    path = tmp_path / "big.log"
+    path.write_bytes(CONTENT)
+    mock_base.config.large_file_threshold = 1 / 1024
+    monkeypatch.setattr(types, "LargeFileViewer", FakeViewer)
+    editor_types = types.EditorTypes(mock_base)
+
+    opened = []
+
+    def open_editor(path, **kw):
+        opened.append(SimpleNamespace(content=editor_types.get_editor(None, path, **kw)))
+        return opened[-1]
+
+    mock_base.editorsmanager.is_open.return_value = False
+    mock_base.open_editor = open_editor
+    EventManager.goto_location(mock_base, str(path), "120.4")
+
+    viewer = opened[0].content
+    assert isinstance(viewer, LargeFileViewer)
+    assert viewer.lines == [120]
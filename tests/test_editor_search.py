@@ -0,0 +1,57 @@
+from unittest.mock import MagicMock
+
+from biscuit.common.search import SearchEngine, SearchQuery
+from biscuit.editor.search import results as results_module
+from biscuit.editor.search.results import SearchResults
+
+
+def make(root, monkeypatch):
+    monkeypatch.setattr("biscuit.common.search.RESULTS_QUEUE_SIZE", 2)
+    monkeypatch.setattr(results_module, "askyesno", lambda *_: True)
+
+    view = SearchResults.__new__(SearchResults)
+    view.base = MagicMock()
+    view.editor = MagicMock()
+    view.editor.searchbox.get.return_value = "needle"
+    view.editor.replacebox.get.return_value = "pin"
+    view.search = MagicMock()
+    view.files = {}
+    view._job = None
+    view.case_sensitive = view.whole_word = view.regex = False
+    view.replacing = False
+
+    view.engine = SearchEngine(root, SearchQuery("needle"), backend="python")
+    view.engine.start()
+    view.searching = True
+    return view
+
+
+def test_replace_all_past_the_limit(tmp_path, monkeypatch, write):
+    root = str(tmp_path)
+    paths = [write(root, f"{i:02}.txt", "needle\nhay\nneedle needle\n" * 100) for i in range(30)]
+
+    view = make(root, monkeypatch)
+    # only the first file was listed before the limit paused the search
+    path, matches = view.engine.results.get(timeout=5)
+    view.files[path] = matches
+    assert len(paths) * len(matches) > results_module.RESULT_LIMIT
+    assert not view.engine.done.is_set()
+
+    view.replace_all()
+    assert view.engine is None and not view.searching
+    for path in paths:
+        with open(path) as f:
+            assert f.read() == "pin\nhay\npin pin\n" * 100
+    view.search.assert_called_once()
+
+
+def test_replace_all_failed_search(tmp_path, monkeypatch, write):
+    path = write(str(tmp_path), "a.txt", "needle\n")
+    view = make(str(tmp_path), monkeypatch)
+    view.files["listed"] = [(1, "needle", "needle")]
+    view.engine.error = "failed"
+
+    view.replace_all()
+    view.base.logger.error.assert_called_once()
+    with open(path) as f:
+        assert f.read() == "needle\n"
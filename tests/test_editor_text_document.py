@@ -0,0 +1,155 @@
+import random
+
+import pytest
+
+from biscuit.editor.text import document as document_module
+from biscuit.editor.text.document import Document
+
+
+def point_to_offset(text: str, point: tuple[int, int]) -> int:
+    lines = text.split("\n")
+    row, col = point
+    return sum(len(line) + 1 for line in lines[:row]) + col
+
+
+class TestDocument:
+    def test_empty(self):
+        doc = Document()
+        assert doc.line_count == 1
+        assert doc.text() == ""
+        assert doc.to_bytes() == b"\n"
+
+    def test_set_text(self):
+        doc = Document()
+        doc.set_text("hello\nworld")
+        assert doc.line_count == 2
+        assert doc.line(0) == "hello"
+        assert doc.line(1) == "world"
+        assert list(doc.lines()) == ["hello", "world"]
+
+    def test_point_to_byte_unicode(self):
+        doc = Document()
+        doc.set_text("añb\nx€y")
+        assert doc.point_to_byte((0, 2)) == 3
+        assert doc.point_to_byte((1, 0)) == 5
+        assert doc.point_to_byte((1, 2)) == 9
+        assert doc.byte_count == len("añb\nx€y\n".encode("utf-8"))
+
+    def test_clamp_like_tk_end(self):
+        doc = Document()
+        doc.set_text("ab\ncd")
+        assert doc.clamp((5, 0)) == (1, 2)
+        assert doc.clamp((0, 10)) == (0, 2)
+
+    def test_insert(self):
+        doc = Document()
+        doc.set_text("hello world")
+        doc.insert((0, 5), ",\nbig")
+        assert doc.text() == "hello,\nbig world"
+
+    def test_delete_returns_removed_text(self):
+        doc = Document()
+        doc.set_text("one\ntwo\nthree")
+        removed = doc.delete((0, 1), (2, 2))
+        assert removed == "ne\ntwo\nth"
+        assert doc.text() == "oree"
+
+    def test_replace(self):
+        doc = Document()
+        doc.set_text("abc\ndef")
+        assert doc.replace((0, 1), (1, 1), "X") == "bc\nd"
+        assert doc.text() == "aXef"
+
+    def test_delete_reversed_range_is_noop(self):
+        doc = Document()
+        doc.set_text("abc")
+        assert doc.delete((0, 2), (0, 1)) == ""
+        assert doc.text() == "abc"
+
+    def test_get(self):
+        doc = Document()
+        doc.set_text("abc\ndef\nghi")
+        assert doc.get((0, 1), (2, 1)) == "bc\ndef\ng"
+        assert doc.get((1, 1), (1, 3)) == "ef"
+
+    def test_version_bumps_on_edit(self):
+        doc = Document()
+        version = doc.version
+        doc.insert((0, 0), "x")
+        assert doc.version > version
+
+    def test_read_callback_chunks(self, monkeypatch):
+        monkeypatch.setattr(document_module, "CHUNK_SIZE", 2)
+        doc = Document()
+        doc.set_text("añ\nb\nc€\nd\ne")
+        expected = doc.to_bytes()
+
+        data, offset = b"", 0
+        assert isinstance(doc.read(0), bytes)
+        while chunk := doc.read(offset):
+            data += chunk
+            offset += len(chunk)
+        assert data == expected
+        assert doc.read(3) == expected[3 : len(b"a\xc3\xb1\nb\n")]
+
+    def test_read_size_and_reuse(self, monkeypatch):
+        monkeypatch.setattr(document_module, "READ_SIZE", 8)
+        doc = Document()
+        doc.set_text("0123456789" * 5)
+        expected = doc.to_bytes()
+
+        assert doc.read(0) == expected[:8]
+        assert doc.read(3) == expected[3:8]
+        # reads are cached, not copied again
+        assert doc.read(3) is doc.read(3)
+        assert doc.read(16) is doc.read(16)
+
+    def test_read_after_edit(self, monkeypatch):
+        monkeypatch.setattr(document_module, "CHUNK_SIZE", 2)
+        doc = Document()
+        doc.set_text("one\ntwo\nthree\nfour")
+        doc.read(0)
+        doc.insert((2, 0), "new ")
+        assert doc.read(doc.point_to_byte((2, 0))).startswith(b"new three\n")
+
+    def test_loader_resync(self):
+        content = ["first"]
+        doc = Document(lambda: content[0])
+        assert doc.text() == "first"
+
+        content[0] = "second\nline"
+        doc.invalidate()
+        assert doc.line_count == 2
+        assert doc.line(1) == "line"
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_random_edits_match_string_model(self, seed, monkeypatch):
+        monkeypatch.setattr(document_module, "CHUNK_SIZE", 4)
+        rng = random.Random(seed)
+        words = ["a", "bc", "\n", "é", "€\n", "xyz\n\n", ""]
+
+        text = "\n".join(f"line {i}" for i in range(40))
+        doc = Document()
+        doc.set_text(text)
+
+        for _ in range(300):
+            lines = text.split("\n")
+            srow = rng.randrange(len(lines))
+            start = (srow, rng.randint(0, len(lines[srow])))
+            erow = rng.randrange(srow, min(srow + 12, len(lines)))
+            end = (erow, rng.randint(0, len(lines[erow])))
+            if end < start:
+                end = start
+            new = "".join(rng.choice(words) for _ in range(rng.randint(0, 3)))
+
+            s, e = point_to_offset(text, start), point_to_offset(text, end)
+            assert doc.replace(start, end, new) == text[s:e]
+            text = text[:s] + new + text[e:]
+
+            assert doc.text() == text
+            assert doc.line_count == text.count("\n") + 1
+            row = rng.randrange(doc.line_count)
+            point = (row, len(text.split("\n")[row]))
+            assert doc.point_to_byte(point) == len(
+                text[: point_to_offset(text, point)].encode("utf-8")
+            )
@@ -0,0 +1,162 @@
+from collections import defaultdict
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from biscuit.editor.text import ts_highlighter
+from biscuit.editor.text.ts_highlighter import (
+    LanguageCache,
+    LineRanges,
+    TreeSitterHighlighter,
+)
+
+
+class TestLineRanges:
+    def test_add_merges_overlapping(self):
+        r = LineRanges()
+        r.add(0, 5)
+        r.add(10, 20)
+        r.add(4, 11)
+        assert list(r) == [(0, 20)]
+
+    def test_add_empty_range_ignored(self):
+        r = LineRanges()
+        r.add(5, 5)
+        assert not r
+
+    def test_discard_splits(self):
+        r = LineRanges()
+        r.add(0, 100)
+        r.discard(10, 20)
+        assert list(r) == [(0, 10), (20, 100)]
+        r.discard(0, 10)
+        assert list(r) == [(20, 100)]
+
+    def test_intersection(self):
+        r = LineRanges()
+        r.add(0, 10)
+        r.add(20, 30)
+        assert r.intersection(5, 25) == [(5, 10), (20, 25)]
+        assert r.intersection(10, 20) == []
+
+    def test_shift_after_inserted_lines(self):
+        r = LineRanges()
+        r.add(0, 6)
+        r.add(10, 20)
+        # three lines inserted at row 5
+        r.shift(5, 5, 8)
+        assert list(r) == [(0, 9), (13, 23)]
+
+    def test_shift_after_deleted_lines(self):
+        r = LineRanges()
+        r.add(7, 20)
+        # rows 5..8 collapsed into row 5
+        r.shift(5, 8, 5)
+        assert list(r) == [(6, 17)]
+
+    def test_shift_before_ranges_unchanged(self):
+        r = LineRanges()
+        r.add(0, 3)
+        r.shift(10, 10, 15)
+        assert list(r) == [(0, 3)]
+
+    def test_next_batch_prefers_after_near(self):
+        r = LineRanges()
+        r.add(0, 100)
+        r.add(200, 300)
+        assert r.next_batch(150, 50) == (200, 250)
+        assert r.next_batch(50, 10) == (50, 60)
+
+    def test_next_batch_falls_back_before_near(self):
+        r = LineRanges()
+        r.add(0, 100)
+        assert r.next_batch(500, 30) == (70, 100)
+        assert LineRanges().next_batch(0, 10) is None
+
+
+class TestTagBatching:
+    def make_highlighter(self):
+        highlighter = TreeSitterHighlighter.__new__(TreeSitterHighlighter)
+        highlighter.text = MagicMock()
+        highlighter.tag_colors = {"keyword": "#f00", "string": "#0f0"}
+        highlighter._applied_tags = set()
+        return highlighter
+
+    def test_one_tag_add_per_tag(self):
+        highlighter = self.make_highlighter()
+        node = lambda start, end: SimpleNamespace(start_point=start, end_point=end)
+        captures = {
+            "keyword": [node((0, 0), (0, 3)), node((2, 4), (2, 6))],
+            "keyword.function": [node((1, 0), (1, 3))],
+            "string": [node((3, 1), (4, 2))],
+            "unknown": [node((5, 0), (5, 1))],
+        }
+
+        tag_indices = defaultdict(list)
+        highlighter._collect_captures(captures, tag_indices)
+        highlighter._apply_tags(tag_indices)
+
+        highlighter.text.tag_add.assert_has_calls(
+            [
+                call("ts.keyword", "1.0", "1.3", "3.4", "3.6", "2.0", "2.3"),
+                call("ts.string", "4.1", "5.2"),
+            ]
+        )
+        assert highlighter.text.tag_add.call_count == 2
+        assert highlighter._applied_tags == {"ts.keyword", "ts.string"}
+
+    def test_clear_only_applied_tags_in_one_call(self):
+        highlighter = self.make_highlighter()
+        highlighter._applied_tags = {"ts.keyword"}
+
+        highlighter._clear_ranges(["1.0", "3.0", "10.0", "12.0"])
+
+        highlighter.text.tk.call.assert_called_once_with(
+            highlighter.text._w, "tag", "remove", "ts.keyword", "1.0", "3.0", "10.0", "12.0"
+        )
+
+
+class TestLanguageCache:
+    @pytest.fixture
+    def loads(self, monkeypatch):
+        loads = []
+
+        def get_language(key):
+            loads.append(key)
+            if key == "missing":
+                raise LookupError(key)
+            return f"<{key}>"
+
+        monkeypatch.setattr(ts_highlighter, "TREE_SITTER_AVAILABLE", True)
+        monkeypatch.setattr(ts_highlighter, "get_language", get_language, raising=False)
+        monkeypatch.setattr(ts_highlighter, "Query", lambda lang, text: (lang, len(text)), raising=False)
+        monkeypatch.setattr(ts_highlighter, "Parser", lambda lang: object(), raising=False)
+        return loads
+
+    def test_language_loaded_once(self, loads):
+        cache = LanguageCache()
+        python = cache.get("python")
+        assert python.language == "<python>"
+        assert python.query[0] == "<python>"
+        assert cache.get("python") is python
+        assert loads == ["python"]
+
+    def test_missing_language_probed_once(self, loads):
+        cache = LanguageCache()
+        assert cache.get("missing") is None
+        assert cache.get("missing") is None
+        assert loads == ["missing"]
+
+    def test_parsers_are_reused(self, loads):
+        language = LanguageCache().get("python")
+        with language.parser() as first:
+            with language.parser() as second:
+                assert first is not second
+        with language.parser() as again:
+            assert again in (first, second)
+
+    def test_warm_in_background(self, loads):
+        cache = LanguageCache()
+        cache.warm(["py", "rust"]).join()
+        assert loads == ["python", "rust"]
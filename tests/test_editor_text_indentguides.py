@@ -0,0 +1,82 @@
+from biscuit.editor.text.document import Document
+from biscuit.editor.text.indentguides import BLANK, IndentTable
+
+SOURCE = """\
+class A:
+    def f(self):
+        if x:
+            pass
+
+        return 1
+
+def g():
+\treturn 2"""
+
+
+def make_table(text=SOURCE):
+    doc = Document()
+    doc.set_text(text)
+    return doc, IndentTable(doc, 4)
+
+
+class TestIndentTable:
+    def test_levels(self):
+        _, table = make_table()
+        assert [table.level(row) for row in range(9)] == [0, 1, 2, 3, BLANK, 2, BLANK, 0, 1]
+
+    def test_blank_lines_continue_guides(self):
+        _, table = make_table()
+        # between `pass` and `return 1`
+        assert table.guide_level(4) == 2
+        # the block ended, next line is at the top level
+        assert table.guide_level(6) == 2
+
+    def test_segments(self):
+        _, table = make_table()
+        assert sorted(table.segments(0, 8)) == [
+            (0, 1, 6),
+            (0, 8, 8),
+            (1, 2, 6),
+            (2, 3, 3),
+        ]
+        # clipped to the rows asked for
+        assert sorted(table.segments(3, 4)) == [(0, 3, 4), (1, 3, 4), (2, 3, 3)]
+
+    def test_typing_without_indent_change_keeps_version(self, edit):
+        doc, table = make_table()
+        table.segments(0, 8)
+        version = table.version
+
+        table.apply([edit(doc, (3, 16), (3, 16), "  # comment")])
+        assert table.version == version
+
+    def test_indent_change_bumps_version(self, edit):
+        doc, table = make_table()
+        table.segments(0, 8)
+        version = table.version
+
+        table.apply([edit(doc, (3, 0), (3, 0), "    ")])
+        assert table.version > version
+        assert table.level(3) == 4
+
+    def test_inserted_lines_shift_rows(self, edit):
+        doc, table = make_table()
+        table.segments(0, 8)
+        version = table.version
+
+        table.apply([edit(doc, (0, 8), (0, 8), "\n    x = 1\n    y = 2")])
+        assert table.version > version
+        assert [table.level(row) for row in range(11)] == [
+            0, 1, 1, 1, 2, 3, BLANK, 2, BLANK, 0, 1
+        ]
+
+    def test_untracked_edit_resets(self):
+        doc, table = make_table()
+        table.segments(0, 8)
+        version = table.version
+
+        doc.set_text("if x:\n  y")
+        table.tab_spaces = 2
+        table.apply([None])
+        assert table.version > version
+        assert table.segments(0, 5) == [(0, 1, 1)]
@@ -0,0 +1,160 @@
+import tkinter as tk
+
+from biscuit.editor.text.linenumbers import LineNumbers
+
+LINE_HEIGHT = 20
+
+
+class FakeText:
+    """Text widget with fixed height lines, scrolled to `top`"""
+
+    def __init__(self, lines=1000, height=200):
+        self.lines = lines
+        self.height = height
+        self.top = 1
+        self.cursor = 1
+        self.relative_line_numbers = False
+
+    def winfo_height(self):
+        return self.height
+
+    def index(self, index):
+        if index == tk.END:
+            return f"{self.lines + 1}.0"
+        if index == tk.INSERT:
+            return f"{self.cursor}.0"
+        y = int(index.split(",")[1])
+        return f"{min(self.top + y // LINE_HEIGHT, self.lines)}.0"
+
+    def dlineinfo(self, index):
+        line = int(float(index))
+        y = (line - self.top) * LINE_HEIGHT
+        if line > self.lines or not 0 <= y < self.height:
+            return None
+        return (0, y, 100, LINE_HEIGHT, 15)
+
+
+class RecordingLineNumbers(LineNumbers):
+    """LineNumbers recording the canvas calls instead of drawing"""
+
+    def __init__(self, text):
+        self.text = text
+        self.font = None
+        self.bg, self.fg, self.hfg = "bg", "fg", "hfg"
+        self.bp_hover_color, self.bp_enabled_color = "hover", "enabled"
+        self._breakpoints = set()
+        self._slots, self._free, self._line_slots = [], [], {}
+        self._state = None
+        self.items = {}
+        self.calls = []
+        self.bindings = 0
+
+    def _create(self, kind, coords, options):
+        self.calls.append(kind)
+        self.items[len(self.items) + 1] = {"coords": coords, **options}
+        return len(self.items)
+
+    def create_oval(self, *coords, **options):
+        return self._create("create_oval", coords, options)
+
+    def create_text(self, *coords, **options):
+        return self._create("create_text", coords, options)
+
+    def coords(self, item, *coords):
+        self.calls.append("coords")
+        self.items[item]["coords"] = coords
+
+    def itemconfig(self, item, **options):
+        self.calls.append("itemconfig")
+        self.items[item].update(options)
+
+    def move(self, tag, dx, dy):
+        self.calls.append("move")
+        for item in self.items.values():
+            x, y, *rest = item["coords"]
+            item["coords"] = (x, y + dy, *rest)
+
+    def tag_bind(self, *_):
+        self.bindings += 1
+
+    def delete(self, *_):
+        self.calls.append("delete")
+
+    def shown(self):
+        """Visible line numbers by y, and the color of each"""
+
+        return {
+            item["coords"][1]: (item["text"], item["fill"])
+            for item in self.items.values()
+            if "text" in item and item.get("state") != tk.HIDDEN
+        }
+
+    def redraw(self):
+        self.calls = []
+        super().redraw()
+        return [call for call in self.calls if call != "delete"]
+
+
+class TestLineNumbers:
+    def test_draws_visible_lines(self):
+        text = FakeText()
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+
+        assert linenumbers.shown() == {
+            i * LINE_HEIGHT: (i + 1, "hfg" if i == 0 else "fg") for i in range(10)
+        }
+
+    def test_unchanged_view_is_not_redrawn(self):
+        text = FakeText()
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+
+        assert linenumbers.redraw() == []
+
+    def test_scroll_reuses_items(self):
+        text = FakeText()
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+        bindings = linenumbers.bindings
+
+        text.top = 4
+        calls = linenumbers.redraw()
+
+        assert "create_text" not in calls and "create_oval" not in calls
+        assert linenumbers.bindings == bindings
+        # one move for the lines still visible, the 3 new lines reconfigured
+        assert calls.count("move") == 1
+        assert len(calls) <= 1 + 3 * 4
+        assert linenumbers.shown() == {
+            i * LINE_HEIGHT: (i + 4, "fg") for i in range(10)
+        }
+
+    def test_cursor_move_updates_two_numbers(self):
+        text = FakeText()
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+
+        text.cursor = 3
+        assert linenumbers.redraw() == ["itemconfig", "itemconfig"]
+        assert linenumbers.shown()[2 * LINE_HEIGHT] == (3, "hfg")
+        assert linenumbers.shown()[0] == (1, "fg")
+
+    def test_fewer_lines_hides_items(self):
+        text = FakeText(lines=20)
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+
+        text.lines = 4
+        linenumbers.redraw()
+        assert sorted(number for number, _ in linenumbers.shown().values()) == [1, 2, 3, 4]
+
+    def test_breakpoints_redraw(self):
+        text = FakeText()
+        linenumbers = RecordingLineNumbers(text)
+        linenumbers.redraw()
+
+        linenumbers.breakpoints = {2}
+        linenumbers.redraw()
+        ovals = [item for item in linenumbers.items.values() if "text" not in item]
+        assert [item["fill"] for item in ovals].count("enabled") == 1
@@ -0,0 +1,66 @@
+
+from biscuit.editor.text import loader as loader_module
+from biscuit.editor.text.loader import FileLoader
+
+
+def load(widget, path, encoding="utf-8", **callbacks):
+    content = []
+    file_loader = FileLoader(widget, str(path), encoding, content.append, **callbacks)
+    file_loader.start()
+    widget.run()
+    return file_loader, "".join(content)
+
+
+class TestFileLoader:
+    def test_decodes_across_read_boundaries(self, tmp_path, monkeypatch, widget):
+        monkeypatch.setattr(loader_module, "READ_SIZE", 3)
+        path = tmp_path / "file.txt"
+        path.write_bytes("añb€\r\nline\rlast\r\n".encode("utf-8"))
+
+        file_loader, content = load(widget, path)
+
+        assert file_loader.finished
+        assert content == "añb€\nline\nlast\n"
+
+    def test_progress_and_done(self, tmp_path, monkeypatch, widget):
+        monkeypatch.setattr(loader_module, "READ_SIZE", 16)
+        monkeypatch.setattr(loader_module, "FRAME_BUDGET", 0)
+        path = tmp_path / "file.txt"
+        path.write_text("x" * 1000)
+        progress, done = [], []
+
+        file_loader, content = load(
+            widget, path, on_progress=progress.append, on_done=lambda: done.append(True)
+        )
+
+        assert content == "x" * 1000
+        assert done == [True]
+        assert progress and progress == sorted(progress)
+        assert file_loader.progress == 1.0
+
+    def test_cancel_stops_writing(self, tmp_path, monkeypatch, widget):
+        monkeypatch.setattr(loader_module, "READ_SIZE", 16)
+        path = tmp_path / "file.txt"
+        path.write_text("x" * 1000)
+        content, done = [], []
+
+        file_loader = FileLoader(
+            widget, str(path), "utf-8", content.append, on_done=lambda: done.append(True)
+        )
+        file_loader.start()
+        file_loader.cancel()
+        widget.run()
+
+        assert file_loader.cancelled
+        assert not done
+        assert not content
+
+    def test_decode_error(self, tmp_path, widget):
+        path = tmp_path / "file.txt"
+        path.write_bytes(b"ok\xff\xfe")
+        errors, done = [], []
+
+        load(widget, path, on_error=errors.append, on_done=lambda: done.append(True))
+
+        assert isinstance(errors[0], UnicodeDecodeError)
+        assert not done
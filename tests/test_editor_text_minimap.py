@@ -0,0 +1,85 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.editor.text import minimap
+from biscuit.editor.text.minimap import Minimap, line_colors, minimap_top
+from biscuit.editor.text.ts_highlighter import TreeSitterHighlighter, language_cache
+
+
+def edit(start, old_end, new_end):
+    return {
+        "start_point": (start, 0),
+        "old_end_point": (old_end, 0),
+        "new_end_point": (new_end, 0),
+    }
+
+
+class TestLineColors:
+    def test_spans_over_default(self):
+        assert line_colors("def f(x)", [(0, 3, "k"), (4, 5, "f")], "t") == [
+            "k", "k", "k", None, "f", "t", "t", "t"
+        ]
+
+    def test_span_to_end_of_line(self):
+        assert line_colors('  "ab', [(2, None, "s")], "t") == [None, None, "s", "s", "s"]
+
+    def test_tabs_and_width(self):
+        assert line_colors("\tx", [], "t", tab_size=4) == [None] * 4 + ["t"]
+        assert len(line_colors("x" * 500, [], "t")) == minimap.WIDTH
+        assert len(line_colors("\t" + "x" * 500, [], "t")) == minimap.WIDTH
+
+
+class TestMinimapTop:
+    def test_short_file_not_scrolled(self):
+        assert minimap_top(0.0, 1.0, 50, 400) == 0
+        assert minimap_top(0.5, 0.6, 300, 400) == 0
+
+    def test_follows_editor(self):
+        # 10000 lines, 100 in view, 400 in the minimap
+        assert minimap_top(0.0, 0.01, 10000, 400) == 0
+        assert minimap_top(0.99, 1.0, 10000, 400) == 9600
+        assert minimap_top(0.495, 0.505, 10000, 400) == 4800
+
+
+class TestInvalidation:
+    def make(self, tiles):
+        mm = Minimap.__new__(Minimap)
+        mm.tiles = {t: (None, t) for t in tiles}
+        mm.dirty = set()
+        return mm
+
+    def test_edit_within_lines(self):
+        mm = self.make(range(5))
+        mm.content_changed(edit(70, 70, 70))
+        assert mm.dirty == {1}
+        mm.content_changed(edit(120, 130, 130))
+        assert mm.dirty == {1, 2}
+
+    def test_lines_added_or_removed_move_the_rest(self):
+        mm = self.make(range(5))
+        mm.content_changed(edit(130, 130, 131))
+        assert mm.dirty == {2, 3, 4}
+
+        mm = self.make(range(5))
+        mm.content_changed(None)
+        assert mm.dirty == {0, 1, 2, 3, 4}
+
+
+@pytest.mark.skipif(
+    not language_cache.get("python"), reason="tree-sitter python grammar not available"
+)
+def test_row_tags():
+    source = 'x = """a\nb"""\ndef f(): pass\n'
+    highlighter = TreeSitterHighlighter.__new__(TreeSitterHighlighter)
+    highlighter.tag_colors = {"keyword": "#f00", "string": "#0f0"}
+    highlighter.language = language_cache.get("python")
+    highlighter.query = highlighter.language.query
+    with highlighter.language.parser() as parser:
+        highlighter.tree = parser.parse(source.encode())
+
+    rows = highlighter.row_tags(1, 3)
+    # the string runs on from the row above
+    assert (0, 4, "ts.string") in rows[0]
+    assert (0, 3, "ts.keyword") in rows[1]
+    assert highlighter.row_tags(0, 1)[0] == [(4, None, "ts.string")]
@@ -0,0 +1,76 @@
+import time
+from unittest.mock import MagicMock
+
+from biscuit.editor.text import scheduler
+from biscuit.editor.text.scheduler import RenderScheduler
+from biscuit.editor.text.text import Text
+
+
+def make(widget, calls, slow=()):
+    def task(name):
+        def run():
+            calls.append(name)
+            if name in slow:
+                time.sleep(0.002)
+
+        return name, run
+
+    return RenderScheduler(
+        widget, [task(name) for name in ("cursor", "highlight", "view", "outline")]
+    )
+
+
+def test_marks_coalesced_into_one_flush(widget):
+    calls = []
+    renderer = make(widget, calls)
+    for _ in range(30):
+        renderer.mark("outline", "cursor")
+    renderer.mark("view")
+    assert len(widget.idle) == 1 and not calls
+
+    widget.idle.pop()()
+    assert calls == ["cursor", "view", "outline"]
+    assert renderer.timings["cursor"].requests == 30
+    assert renderer.timings["cursor"].runs == 1
+    assert renderer.timings["highlight"].runs == 0
+
+
+def test_rest_waits_for_next_frame(widget, monkeypatch):
+    monkeypatch.setattr(scheduler, "FRAME_BUDGET", 0.001)
+    calls = []
+    renderer = make(widget, calls, slow=("cursor",))
+    renderer.mark("outline", "highlight", "cursor")
+    widget.idle.pop()()
+    assert calls == ["cursor"] and len(widget.timers) == 1
+
+    # marked again meanwhile, still redrawn once
+    renderer.mark("highlight")
+    widget.timers.pop()()
+    assert calls == ["cursor", "highlight", "outline"]
+    assert not widget.idle and not renderer.dirty
+
+
+def test_report(widget):
+    calls = []
+    renderer = make(widget, calls)
+    renderer.mark("view")
+    widget.idle.pop()()
+    report = renderer.report()
+    assert len(report) == 4
+    assert report[2].startswith("view: 1 requests, 1 runs")
+
+
+def test_cancelled_when_text_destroyed(widget):
+    calls = []
+    renderer = make(widget, calls)
+    renderer.mark("cursor", "view")
+
+    text = Text.__new__(Text)
+    text.master = MagicMock(renderer=renderer)
+    text.base = MagicMock()
+    text.hide_autocomplete = lambda: None
+    text.words = None
+    text.event_destroy(None)
+
+    assert not renderer.dirty and renderer._job is None
+    assert not widget.idle
@@ -0,0 +1,209 @@
+import random
+
+import pytest
+
+from biscuit.editor.text import undo as undo_module
+from biscuit.editor.text.document import Document
+from biscuit.editor.text.text import Text
+from biscuit.editor.text.undo import UndoStack
+
+
+def apply(doc: Document, changes) -> None:
+    for change in changes:
+        doc.replace(change.start, change.old_end, change.new_text)
+
+
+def type_text(stack: UndoStack, doc: Document, point, text: str) -> None:
+    """Type text one character at a time, each keystroke a separate event"""
+
+    row, col = point
+    for char in text:
+        doc.insert((row, col), char)
+        stack.record((row, col), "", char)
+        stack.separate()
+        col += 1
+
+
+class TestUndoStack:
+    def test_typing_run_is_one_step(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        type_text(stack, doc, (0, 0), "hello")
+
+        assert len(stack.undo_steps) == 1
+        apply(doc, stack.undo())
+        assert doc.text() == ""
+        apply(doc, stack.redo())
+        assert doc.text() == "hello"
+
+    def test_new_word_starts_new_step(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        type_text(stack, doc, (0, 0), "hello world")
+
+        apply(doc, stack.undo())
+        assert doc.text() == "hello"
+        apply(doc, stack.undo())
+        assert doc.text() == ""
+
+    def test_pause_starts_new_step(self, monkeypatch):
+        now = [0.0]
+        monkeypatch.setattr(undo_module.time, "monotonic", lambda: now[0])
+        stack, doc = UndoStack(1 << 20), Document()
+
+        type_text(stack, doc, (0, 0), "ab")
+        now[0] += undo_module.COALESCE_TIMEOUT + 1
+        type_text(stack, doc, (0, 2), "cd")
+
+        apply(doc, stack.undo())
+        assert doc.text() == "ab"
+
+    def test_backspace_run_is_one_step(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        doc.set_text("abcdef")
+        for col in range(6, 2, -1):
+            stack.record((0, col - 1), doc.delete((0, col - 1), (0, col)), "")
+            stack.separate()
+
+        assert doc.text() == "ab"
+        assert len(stack.undo_steps) == 1
+        apply(doc, stack.undo())
+        assert doc.text() == "abcdef"
+
+    def test_forward_delete_run_is_one_step(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        doc.set_text("abcdef")
+        for _ in range(3):
+            stack.record((0, 1), doc.delete((0, 1), (0, 2)), "")
+            stack.separate()
+
+        assert doc.text() == "aef"
+        assert len(stack.undo_steps) == 1
+        apply(doc, stack.undo())
+        assert doc.text() == "abcdef"
+
+    def test_changes_until_separate_are_one_step(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        doc.set_text("one\ntwo")
+        # moving a line: delete and insert in the same event
+        stack.record((1, 0), doc.delete((0, 3), (1, 3)), "")
+        doc.insert((0, 0), "two\n")
+        stack.record((0, 0), "", "two\n")
+        stack.separate()
+
+        assert doc.text() == "two\none"
+        assert len(stack.undo_steps) == 1
+        apply(doc, stack.undo())
+        assert doc.text() == "one\ntwo"
+
+    def test_record_clears_redo(self):
+        stack, doc = UndoStack(1 << 20), Document()
+        type_text(stack, doc, (0, 0), "a")
+        apply(doc, stack.undo())
+        assert stack.can_redo
+
+        type_text(stack, doc, (0, 0), "b")
+        assert not stack.can_redo
+        assert stack.redo() == []
+
+    def test_memory_limit_drops_oldest_steps(self):
+        stack = UndoStack(3 * (1000 + undo_module.CHANGE_OVERHEAD))
+        for i in range(10):
+            stack.record((i, 0), "", "x" * 999 + "\n")
+            stack.separate()
+
+        assert len(stack.undo_steps) == 3
+        assert stack.size <= stack.memory_limit
+
+    def test_memory_is_proportional_to_changes(self):
+        stack, doc = UndoStack(1 << 30), Document()
+        doc.set_text("x" * 2_000_000)
+        type_text(stack, doc, (0, 0), "abc")
+        assert stack.size < 1000
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_random_edits_round_trip(self, seed):
+        rng = random.Random(seed)
+        stack, doc = UndoStack(1 << 30), Document()
+        doc.set_text("\n".join(f"line {i}" for i in range(20)))
+        history = [doc.text()]
+
+        for _ in range(50):
+            row = rng.randrange(doc.line_count)
+            start = (row, rng.randint(0, len(doc.line(row))))
+            erow = rng.randrange(row, doc.line_count)
+            end = max(start, (erow, rng.randint(0, len(doc.line(erow)))))
+            new = rng.choice(["", "a", "b c", "\n", "x\ny"])
+            stack.record(start, doc.replace(start, end, new), new)
+            stack.separate()
+            if doc.text() != history[-1]:
+                history.append(doc.text())
+
+        while stack.can_undo:
+            apply(doc, stack.undo())
+        assert doc.text() == history[0]
+
+        while stack.can_redo:
+            apply(doc, stack.redo())
+        assert doc.text() == history[-1]
+
+
+class FakeTk:
+    """Tcl interpreter of a text widget with tk's own undo off"""
+
+    def __init__(self):
+        self.calls = []
+
+    def call(self, *args):
+        if len(args) == 1:
+            args = args[0]
+        self.calls.append(args)
+        return 0 if args[1:] == ("cget", "-undo") else ""
+
+    def getboolean(self, value):
+        return bool(value)
+
+
+class TestTextUndo:
+    def make(self):
+        text = Text.__new__(Text)
+        text.tk = FakeTk()
+        text._orig = ".text_orig"
+        text.undo_stack = UndoStack(1 << 20)
+        text._applying_undo = False
+        text._undo_separator = "separator"
+
+        doc = Document()
+        doc.set_text("hello")
+
+        def point(index):
+            row, col = index.split(".")
+            return int(row) - 1, int(col)
+
+        text.delete = lambda start, end: doc.replace(point(start), point(end), "")
+        text.insert = lambda index, chars: doc.insert(point(index), chars)
+        text.mark_set = text.see = lambda *_: None
+
+        doc.insert((0, 5), " world")
+        text.undo_stack.record((0, 5), "", " world")
+        text.undo_stack.separate()
+        return text, doc
+
+    def test_undo_event(self):
+        text, doc = self.make()
+        # the widget binding stops tk's class binding and the root one
+        assert text.event_undo() == "break"
+        assert doc.text() == "hello"
+        assert text.event_redo() == "break"
+        assert doc.text() == "hello world"
+
+    def test_tk_edit_undo_keeps_history(self):
+        text, doc = self.make()
+        # what tk's class binding runs before the root <Control-z> binding
+        text._proxy("edit", "undo")
+        assert (".text_orig", "edit", "undo") in text.tk.calls
+        assert text.undo_stack.can_undo
+
+        text.edit_undo()
+        assert doc.text() == "hello"
+        text._proxy("edit", "redo")
+        text.edit_redo()
+        assert doc.text() == "hello world"
@@ -153,3 +153,20 @@ class TestEditorTypes:
                 with patch("biscuit.editor.types.is_image", return_value=False):
                     et.get_editor(mock_master, path="test.md")
                     mock_md.assert_called_once()
+
+    def test_get_editor_large_file(self, mock_base, tmp_path):
+        et = EditorTypes(mock_base)
+        mock_master = MagicMock()
+        mock_master.base = mock_base
+        mock_base.config.large_file_threshold = 0.001
+        small, large = tmp_path / "small.log", tmp_path / "large.log"
+        small.write_text("x")
+        large.write_text("x" * 2048)
+        with patch("biscuit.editor.types.LargeFileViewer") as mock_viewer:
+            with patch("biscuit.editor.types.TextEditor") as mock_te:
+                et.get_editor(mock_master, path=str(small))
+                mock_te.assert_called_once()
+                mock_viewer.assert_not_called()
+
+                et.get_editor(mock_master, path=str(large))
+                mock_viewer.assert_called_once()
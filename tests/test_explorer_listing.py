@@ -0,0 +1,156 @@
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from biscuit.views.explorer import directorytree
+from biscuit.views.explorer.directorytree import DirectoryTree
+from biscuit.views.explorer.listing import DirectoryListing
+
+
+def names(entries):
+    return [(name, isdir, ignored) for name, _, isdir, ignored in entries]
+
+
+@pytest.fixture
+def workspace(tmp_path, write):
+    root = str(tmp_path)
+    write(root, ".gitignore", "build/\n*.log\n")
+    write(root, "b.py")
+    write(root, "a.log")
+    write(root, "src/main.py")
+    write(root, "build/out/x.txt")
+    return root
+
+
+class FakeTree:
+    def __init__(self):
+        self.children = {"": []}
+        self.count = 0
+
+    def exists(self, node):
+        return node in self.children
+
+    def get_children(self, node):
+        return list(self.children.get(node, []))
+
+    def delete(self, node):
+        for child in self.children.pop(node, []):
+            self.delete(child)
+        for children in self.children.values():
+            if node in children:
+                children.remove(node)
+
+    def insert(self, parent, index, text="", **kw):
+        if parent not in self.children:
+            return None
+        self.count += 1
+        node = f"I{self.count}"
+        self.children[parent].append(node)
+        self.children[node] = []
+        return node
+
+
+class TestDirectoryListing:
+    def test_scan(self, workspace):
+        listing = DirectoryListing(workspace)
+        assert names(listing.listing(workspace)) == [
+            ("build", True, True),
+            ("src", True, False),
+            (".gitignore", False, False),
+            ("a.log", False, True),
+            ("b.py", False, False),
+        ]
+        # below an ignored directory
+        assert names(listing.listing(os.path.join(workspace, "build"))) == [
+            ("out", True, True)
+        ]
+
+    def test_cache(self, workspace, write):
+        listing = DirectoryListing(workspace)
+        assert listing.get(workspace) is None
+        entries = listing.listing(workspace)
+        assert listing.get(workspace) is entries
+
+        write(workspace, "c.py")
+        os.utime(workspace, ns=(time.time_ns(), time.time_ns() + 10**9))
+        assert listing.get(workspace) is None
+
+    def test_invalidate(self, workspace, write):
+        listing = DirectoryListing(workspace)
+        src = os.path.join(workspace, "src")
+        listing.listing(workspace)
+        listing.listing(src)
+
+        listing.invalidate(src)
+        assert listing.get(workspace) is None and listing.get(src) is None
+
+        listing.listing(workspace)
+        write(workspace, ".gitignore", "*.py\n")
+        listing.invalidate(os.path.join(workspace, ".gitignore"))
+        assert ("b.py", False, True) in names(listing.listing(workspace))
+
+
+class TestPopulate:
+    def make(self, root):
+        tree = DirectoryTree.__new__(DirectoryTree)
+        tree.base = MagicMock()
+        tree.tree = FakeTree()
+        tree.nodes = {root: ""}
+        tree.loads = {}
+        tree.hide_dirs = [".git"]
+        tree.ignore_exts = [".pyc"]
+        tree.listing = DirectoryListing(root)
+        tree.scheduled = []
+        tree.after = lambda _, *args: tree.scheduled.append(args)
+        return tree
+
+    def test_batches(self, tmp_path, monkeypatch, write):
+        root = str(tmp_path)
+        for i in range(2000):
+            write(root, f"file{i:04}.txt")
+        tree = self.make(root)
+        monkeypatch.setattr(directorytree, "FRAME_BUDGET", 0.0001)
+
+        entries = tree.listing.listing(root)
+        tree.loads[""] = load = object()
+        tree.populate("", entries, load, subdir=False)
+        assert tree.scheduled and len(tree.tree.get_children("")) < 2000
+        while tree.scheduled:
+            callback, *args = tree.scheduled.pop(0)
+            callback(*args)
+        assert len(tree.tree.get_children("")) == 2000
+        assert not tree.loads
+
+    def test_newer_load_wins(self, workspace):
+        tree = self.make(workspace)
+        entries = tree.listing.listing(workspace)
+        old = object()
+        tree.loads[""] = new = object()
+        tree.populate("", entries, old)
+        assert tree.tree.get_children("") == []
+
+        tree.populate("", entries, new)
+        tree.loads[""] = newer = object()
+        tree.populate("", entries, newer)
+        # the children are replaced, not added twice
+        assert len(tree.tree.get_children("")) == 5
+
+    def test_deleted_node_dropped(self, workspace, monkeypatch):
+        tree = self.make(workspace)
+        entries = tree.listing.listing(workspace)
+        tree.loads[""] = root = object()
+        tree.populate("", entries, root)
+        src = tree.nodes[os.path.join(workspace, "src")]
+        tree.loads[src] = sub = object()
+
+        # the root is loaded again while src is loading
+        monkeypatch.setattr(directorytree, "FRAME_BUDGET", 0)
+        tree.loads[""] = again = object()
+        tree.populate("", entries, again)
+        assert src not in tree.loads and tree.scheduled
+
+        tree.loads[src] = sub
+        tree.populate(src, [], sub)
+        assert src not in tree.loads
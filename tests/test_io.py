@@ -1,11 +1,12 @@
 import os
 import queue
+import sys
 import tempfile
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from biscuit.common.io import IO
+from biscuit.common.io import IO, FrameParser
 
 
 class TestIO:
@@ -61,3 +62,69 @@ class TestIO:
         io_instance.write(b"hello")
         data = io_instance.in_queue.get_nowait()
         assert data == b"hello"
+
+    def test_read_messages(self, io_instance):
+        io_instance.out_queue.put(b"one")
+        io_instance.out_queue.put(b"two")
+        assert io_instance.read_messages() == [b"one", b"two"]
+        assert io_instance.read_messages() == []
+
+    def test_write_skips_empty(self, io_instance):
+        io_instance.write(b"")
+        assert io_instance.in_queue.empty()
+
+    def test_process_output_is_framed(self, mock_base, tmp_path):
+        script = tmp_path / "server.py"
+        script.write_text(
+            "import sys\n"
+            "out = sys.stdout.buffer\n"
+            "for body in (b'{\"a\": 1}', b'x' * 200000):\n"
+            "    out.write(b'Content-Length: %d\\r\\n\\r\\n' % len(body) + body)\n"
+            "    out.flush()\n"
+        )
+        master = MagicMock()
+        master.base = mock_base
+        io_obj = IO(master, f'"{sys.executable}" "{script}"', str(tmp_path))
+        io_obj.start()
+        io_obj.t_out.join(timeout=10)
+
+        messages = io_obj.read_messages()
+        assert messages == [
+            b'Content-Length: 8\r\n\r\n{"a": 1}',
+            b"Content-Length: 200000\r\n\r\n" + b"x" * 200000,
+        ]
+        io_obj.stop()
+
+
+def message(body: bytes, header=b"Content-Length") -> bytes:
+    return header + b": %d\r\n\r\n" % len(body) + body
+
+
+class TestFrameParser:
+    def test_split_across_chunks(self):
+        parser = FrameParser()
+        data = message(b'{"id": 1}') + message(b'{"id": 2}')
+        messages = []
+        for i in range(0, len(data), 3):
+            messages += parser.feed(data[i : i + 3])
+        assert messages == [message(b'{"id": 1}'), message(b'{"id": 2}')]
+        assert not parser.buffer
+
+    def test_many_in_one_chunk(self):
+        parser = FrameParser()
+        bodies = [b"a" * i for i in range(1, 50)]
+        data = b"".join(map(message, bodies))
+        assert parser.feed(data + b"Content-Le") == list(map(message, bodies))
+        assert parser.feed(b"ngth: 1\r\n\r\nz") == [message(b"z")]
+
+    def test_headers(self):
+        parser = FrameParser()
+        data = (
+            b"content-length: 2\r\n"
+            b"Content-Type: application/vscode-jsonrpc; charset=utf-8\r\n\r\n{}"
+        )
+        assert parser.feed(data) == [data]
+
+    def test_drops_headers_without_length(self):
+        parser = FrameParser()
+        assert parser.feed(b"starting server\r\n\r\n" + message(b"{}")) == [message(b"{}")]
@@ -0,0 +1,350 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+import tarts as lsp
+
+from biscuit.language.client import LangServerClient
+from biscuit.language.dispatcher import Dispatcher
+from biscuit.language.manager import LanguageServerManager
+
+
+def message(payload: dict) -> bytes:
+    body = json.dumps(payload).encode()
+    return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+
+class FakeBase:
+    """Records the callbacks scheduled on the Tk loop"""
+
+    def __init__(self):
+        self.scheduled = []
+        self.arguments = []
+        self.logger = MagicMock()
+
+    def after(self, ms, callback, *args):
+        self.scheduled.append(callback)
+        self.arguments.append(args)
+        return len(self.scheduled)
+
+    def after_cancel(self, job):
+        self.scheduled[job - 1] = None
+
+
+def make_client(base, initialized=True):
+    """Client talking to no process, initialized by a fake response"""
+
+    client = LangServerClient.__new__(LangServerClient)
+    client.base = base
+    client.language = "python"
+    client._counter = iter(range(1000))
+    client.deferred_requests = {}
+    client.folders = ["/tmp"]
+    client.supports_folders = False
+    client.failed = False
+    client.io = MagicMock()
+    client.handler = MagicMock()
+    client.completion_requests = {}
+    client.outline_requests = {}
+    client.pending_changes = {}
+    client.tabs_opened = set()
+    client.symbols = {}
+    client._outline_jobs = {}
+    client.pending_requests = {}
+    client.cancelled_requests = set()
+    client._expire_job = None
+    client.client = lsp.Client(process_id=1, root_uri="file:///tmp")
+    client.client.send()
+    if initialized:
+        initialize(client)
+    return client
+
+
+def sent(client):
+    """Everything the client wrote to the server so far"""
+
+    data = b"".join(bytes(call.args[0]) for call in client.io.write.call_args_list)
+    client.io.write.reset_mock()
+    return data + bytes(client.client.send())
+
+
+def initialize(client, capabilities=None):
+    client.process(
+        message({"jsonrpc": "2.0", "id": 0, "result": {"capabilities": capabilities or {}}})
+    )
+    client.handler.reset_mock()
+
+
+def completion(client, tab):
+    request_id = client.client.completion(
+        text_document_position=lsp.TextDocumentPosition(
+            textDocument=lsp.TextDocumentIdentifier(uri="file:///tmp/a.py"),
+            position=lsp.Position(line=0, character=0),
+        ),
+        context=lsp.CompletionContext(triggerKind=lsp.CompletionTriggerKind.INVOKED),
+    )
+    client.track_request(request_id, client.completion_requests, tab)
+    client.completion_requests[request_id] = (tab, None)
+    return request_id
+
+
+def completion_response(request_id):
+    return message(
+        {"jsonrpc": "2.0", "id": request_id, "result": {"isIncomplete": False, "items": []}}
+    )
+
+
+class TestDispatcher:
+    def test_wakes_once_until_drained(self):
+        base = FakeBase()
+        dispatcher = Dispatcher(base)
+        client = MagicMock()
+
+        for i in range(3):
+            dispatcher.post(client, b"%d" % i)
+        assert base.scheduled == [dispatcher.dispatch]
+
+        dispatcher.dispatch()
+        assert [call.args[0] for call in client.process.call_args_list] == [b"0", b"1", b"2"]
+        client.write.assert_called_once()
+
+        dispatcher.post(client, b"3")
+        assert len(base.scheduled) == 2
+
+    def test_failing_message_does_not_stop_others(self):
+        base = FakeBase()
+        dispatcher = Dispatcher(base)
+        client = MagicMock()
+        client.process.side_effect = [ValueError, None]
+
+        dispatcher.post(client, b"bad")
+        dispatcher.post(client, b"good")
+        dispatcher.dispatch()
+        assert client.process.call_count == 2
+        base.logger.error.assert_called_once()
+
+
+class TestRequests:
+    def test_response_is_handled(self):
+        client = make_client(FakeBase())
+        tab = object()
+        request_id = completion(client, tab)
+
+        client.process(completion_response(request_id))
+        assert isinstance(client.handler.process.call_args.args[0], lsp.Completion)
+        assert not client.pending_requests
+
+    def test_newer_request_cancels_stale_one(self):
+        client = make_client(FakeBase())
+        tab = object()
+        stale = completion(client, tab)
+        client.client.send()
+        latest = completion(client, tab)
+
+        assert stale not in client.completion_requests
+        assert b"$/cancelRequest" in client.client.send()
+
+        client.process(completion_response(stale))
+        client.handler.process.assert_not_called()
+        client.process(completion_response(latest))
+        client.handler.process.assert_called_once()
+
+    def test_requests_time_out(self, monkeypatch):
+        base = FakeBase()
+        client = make_client(base)
+        request_id = completion(client, object())
+        assert base.scheduled == [client.expire_requests]
+
+        now = time.monotonic()
+        monkeypatch.setattr(time, "monotonic", lambda: now + 60)
+        client.expire_requests()
+
+        assert request_id not in client.completion_requests
+        assert request_id in client.cancelled_requests
+        client.io.write.assert_called()
+        # nothing left to watch
+        assert base.scheduled == [client.expire_requests]
+
+
+class FakeTab:
+    path = "/tmp/a.py"
+
+    def __init__(self):
+        self.document = MagicMock(version=1)
+
+    def get_all_text(self):
+        return "x = 1"
+
+
+def symbol(name, line, children=()):
+    position = lsp.Range(
+        start=lsp.Position(line=line, character=4), end=lsp.Position(line=line, character=8)
+    )
+    return lsp.DocumentSymbol(
+        name=name,
+        kind=lsp.SymbolKind.FUNCTION,
+        range=position,
+        selectionRange=position,
+        children=list(children),
+    )
+
+
+class TestOutline:
+    def outline_sent(self, client):
+        return [tab for tab, _ in client.outline_requests.values()]
+
+    def test_first_request_is_sent_right_away(self):
+        client = make_client(FakeBase())
+        tab = FakeTab()
+        client.tabs_opened.add(tab)
+
+        client.request_outline(tab)
+        assert self.outline_sent(client) == [tab]
+        # same version already asked for
+        client.request_outline(tab)
+        assert len(client.outline_requests) == 1
+
+    def test_cached_version_is_not_requested(self):
+        base = FakeBase()
+        client = make_client(base)
+        tab = FakeTab()
+        client.tabs_opened.add(tab)
+        client.symbols[tab] = (1, [])
+
+        client.request_outline(tab)
+        assert not client.outline_requests and not base.scheduled
+
+    def test_changes_are_debounced(self):
+        base = FakeBase()
+        client = make_client(base)
+        tab = FakeTab()
+        client.tabs_opened.add(tab)
+        client.symbols[tab] = (1, [])
+
+        for version in range(2, 6):
+            tab.document.version = version
+            client.request_outline(tab)
+        assert [job for job in base.scheduled if job] == [client._send_outline_request]
+        assert not client.outline_requests
+
+        client._send_outline_request(tab)
+        assert list(client.outline_requests.values()) == [(tab, 5)]
+
+
+class TestPaletteSymbols:
+    def make_manager(self):
+        manager = LanguageServerManager.__new__(LanguageServerManager)
+        manager.base = MagicMock()
+        manager.base.settings.symbols_actionset = []
+        manager._symbol_keys = []
+        return manager
+
+    def test_nested_symbols(self):
+        manager = self.make_manager()
+        manager._update_symbols(None, [symbol("A", 0, [symbol("f", 1)]), symbol("g", 5)])
+
+        actions = manager.base.settings.symbols_actionset
+        assert [name for name, _ in actions] == ["A", "f", "g"]
+        actions[1][1](None)
+        manager.base.goto_location_in_active_editor.assert_called_with("2.4")
+
+    def test_only_changed_entries_are_replaced(self):
+        manager = self.make_manager()
+        manager._update_symbols(None, [symbol("a", 0), symbol("b", 1), symbol("c", 2)])
+        actions = manager.base.settings.symbols_actionset
+        first, second = actions[0], actions[1]
+
+        manager._update_symbols(None, [symbol("a", 0), symbol("x", 1)])
+        assert actions[0] is first and actions[1] is not second
+        assert [name for name, _ in actions] == ["a", "x"]
+
+
+class TestStartup:
+    def test_requests_wait_for_initialize(self):
+        client = make_client(FakeBase(), initialized=False)
+        tab = FakeTab()
+        client.tabs_opened.add(tab)
+
+        client.request_outline(tab)
+        client.request_outline(tab)
+        assert not client.outline_requests
+        assert len(client.deferred_requests) == 1
+
+        initialize(client)
+        client.initialized({})
+        data = sent(client)
+        assert b"textDocument/didOpen" in data and b"textDocument/documentSymbol" in data
+        assert self.outline_tabs(client) == [tab]
+        assert not client.deferred_requests
+
+    def outline_tabs(self, client):
+        return [tab for tab, _ in client.outline_requests.values()]
+
+    def test_folders_need_server_support(self):
+        client = make_client(FakeBase())
+        assert client.add_folder("/other") is False
+
+        client.set_capabilities({"workspace": {"workspaceFolders": {"supported": True}}})
+        sent(client)
+        assert client.add_folder("/other") is True
+        assert client.folders == ["/tmp", "/other"]
+        assert b"workspace/didChangeWorkspaceFolders" in sent(client)
+
+    def test_folders_added_while_starting_are_sent_once_initialized(self):
+        client = make_client(FakeBase(), initialized=False)
+        assert client.add_folder("/other") is True
+
+        initialize(client)
+        client.initialized({"workspace": {"workspaceFolders": {"supported": True}}})
+        assert b"/other" in sent(client)
+
+
+class TestClientPool:
+    def make_manager(self, tmp_path=None):
+        manager = LanguageServerManager.__new__(LanguageServerManager)
+        manager.base = FakeBase()
+        manager.base.active_directory = str(tmp_path) if tmp_path else "/work/b"
+        manager.langservers = {"python": "pylsp"}
+        manager.existing = {}
+        manager.warm = set()
+        manager.start_client = MagicMock()
+        return manager
+
+    def make_tab(self):
+        tab = MagicMock(path="/work/b/x.py", language="Python", language_alias="python")
+        return tab
+
+    def test_server_is_shared_across_folders(self):
+        manager = self.make_manager()
+        instance = MagicMock(language="python", failed=False)
+        instance.add_folder.return_value = True
+        manager.existing[("/work/a", "python")] = instance
+
+        assert manager.request_client_instance(self.make_tab()) is instance
+        instance.add_folder.assert_called_once_with("/work/b")
+        assert manager.instances() == [instance]
+        manager.start_client.assert_not_called()
+
+    def test_server_without_folder_support_is_not_shared(self):
+        manager = self.make_manager()
+        instance = MagicMock(language="python", failed=False)
+        instance.add_folder.return_value = False
+        manager.existing[("/work/a", "python")] = instance
+
+        manager.request_client_instance(self.make_tab())
+        manager.start_client.assert_called_once_with("python", "pylsp", "/work/b")
+
+    def test_warm_pool_finds_languages(self, tmp_path):
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "main.py").write_text("")
+        (tmp_path / ".venv").mkdir()
+        (tmp_path / ".venv" / "ignored.js").write_text("")
+        manager = self.make_manager(tmp_path)
+        manager.langservers["javascript"] = "typescript-language-server"
+
+        manager._scan_languages(str(tmp_path))
+        assert manager.base.arguments[-1] == (str(tmp_path), {"python"})
+
+        manager._warm(str(tmp_path), {"python"})
+        manager.start_client.assert_called_once_with("python", "pylsp", str(tmp_path))
+        assert len(manager.warm) == 1
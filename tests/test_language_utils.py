@@ -0,0 +1,103 @@
+import tarts as lsp
+
+from biscuit.editor.text.document import Document
+from biscuit.editor.text.undo import make_change
+from biscuit.language.utils import change_sync_kind, encode_change, merge_change
+
+
+def edit(doc, start, end, text):
+    """Apply an edit to the document and return its edit record"""
+
+    change = make_change(start, doc.replace(start, end, text), text)
+    return {
+        "start_point": change.start,
+        "old_end_point": change.old_end,
+        "new_end_point": change.new_end,
+        "new_text": text,
+    }
+
+
+def apply(doc, changes):
+    """Apply changes the way a server does, one after the other"""
+
+    for change in changes:
+        doc.replace(change["start"], change["end"], change["text"])
+
+
+class TestChangeSyncKind:
+    def test_kind(self):
+        assert change_sync_kind({"textDocumentSync": 2}) == lsp.TextDocumentSyncKind.INCREMENTAL
+
+    def test_options(self):
+        assert (
+            change_sync_kind({"textDocumentSync": {"openClose": True, "change": 1}})
+            == lsp.TextDocumentSyncKind.FULL
+        )
+        assert change_sync_kind({"textDocumentSync": {}}) == lsp.TextDocumentSyncKind.NONE
+
+    def test_missing(self):
+        assert change_sync_kind({}) == lsp.TextDocumentSyncKind.FULL
+
+
+class TestMergeChange:
+    def setup_method(self):
+        self.doc = Document()
+        self.doc.set_text("def f():\n    return 1\n")
+        self.server = Document()
+        self.server.set_text(self.doc.text())
+
+    def test_typing_is_one_change(self):
+        changes = []
+        for i, char in enumerate("x = 2"):
+            merge_change(changes, edit(self.doc, (1, 4 + i), (1, 4 + i), char))
+
+        assert changes == [{"start": (1, 4), "end": (1, 4), "text": "x = 2", "new_end": (1, 9)}]
+        apply(self.server, changes)
+        assert self.server.text() == self.doc.text()
+
+    def test_backspace_over_typed_text(self):
+        changes = []
+        for i, char in enumerate("abc"):
+            merge_change(changes, edit(self.doc, (0, 8 + i), (0, 8 + i), char))
+        merge_change(changes, edit(self.doc, (0, 10), (0, 11), ""))
+        merge_change(changes, edit(self.doc, (0, 9), (0, 10), ""))
+
+        assert len(changes) == 1 and changes[0]["text"] == "a"
+        apply(self.server, changes)
+        assert self.server.text() == self.doc.text()
+
+    def test_backspace_over_existing_text(self):
+        changes = []
+        for col in range(12, 8, -1):
+            merge_change(changes, edit(self.doc, (1, col - 1), (1, col), ""))
+        merge_change(changes, edit(self.doc, (1, 8), (1, 8), "None"))
+
+        assert len(changes) == 1
+        apply(self.server, changes)
+        assert self.server.text() == self.doc.text() == "def f():\n    retuNone\n"
+
+    def test_separate_edits_keep_order(self):
+        changes = []
+        merge_change(changes, edit(self.doc, (1, 11), (1, 12), "2"))
+        merge_change(changes, edit(self.doc, (0, 6), (0, 6), "x"))
+        merge_change(changes, edit(self.doc, (0, 0), (1, 0), ""))
+
+        assert len(changes) == 3
+        apply(self.server, changes)
+        assert self.server.text() == self.doc.text()
+
+    def test_untracked_edit(self):
+        changes = []
+        merge_change(changes, edit(self.doc, (0, 0), (0, 0), "#"))
+        merge_change(changes, None)
+        merge_change(changes, edit(self.doc, (0, 1), (0, 1), "!"))
+
+        assert changes[1:] == [None, None]
+
+
+def test_encode_change():
+    event = encode_change({"start": (1, 4), "end": (2, 0), "text": "x", "new_end": (1, 5)})
+
+    assert event.text == "x"
+    assert (event.range.start.line, event.range.start.character) == (1, 4)
+    assert (event.range.end.line, event.range.end.character) == (2, 0)